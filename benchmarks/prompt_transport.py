@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark process spawn cost as prompt size grows, passing the prompt inline
+in argv versus through a file.
+
+By default the spawned command is `true`, which ignores its arguments, so the
+numbers are the cost of getting the prompt to a new process and nothing else.
+Use the results to pick GOOSE_PROMPT_ARG_MAX_BYTES.
+
+    python benchmarks/prompt_transport.py
+    python benchmarks/prompt_transport.py --sizes 1024,65536 --runs 50
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from agent_honk.prompt_transport import PromptTransport
+
+DEFAULT_SIZES = "256,1024,4096,16384,65536,120000"
+
+
+async def spawn(cmd_args):
+    process = await asyncio.create_subprocess_exec(
+        *cmd_args,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    await process.wait()
+
+
+async def measure(command: str, prompt: str, directory: str, max_arg_bytes: int, runs: int) -> float:
+    """Median milliseconds to build the command and run it to completion"""
+    transport = PromptTransport(max_arg_bytes=max_arg_bytes)
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        with transport.command(command, prompt, directory) as cmd_args:
+            await spawn(cmd_args)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--command', default=shutil.which('true') or '/bin/true', help="Command to spawn in place of goose")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Comma-separated prompt sizes in bytes")
+    parser.add_argument('--runs', type=int, default=30, help="Spawns per size and transport")
+    args = parser.parse_args(argv)
+
+    print(f"{'bytes':>8}  {'argv ms':>9}  {'file ms':>9}")
+    with tempfile.TemporaryDirectory(prefix="prompt_bench_") as directory:
+        for size in [int(size) for size in args.sizes.split(',')]:
+            prompt = "honk " * (size // 5) + "h" * (size % 5)
+            # A threshold above the size keeps the prompt inline, zero forces the file
+            inline = await measure(args.command, prompt, directory, size + 1, args.runs)
+            via_file = await measure(args.command, prompt, directory, 0, args.runs)
+            print(f"{size:>8}  {inline:>9.2f}  {via_file:>9.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
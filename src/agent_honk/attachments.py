@@ -0,0 +1,222 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+import urllib.request
+import logging
+from typing import AsyncIterator, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import aiohttp
+except ImportError:  # Installed with discord.py; fall back to urllib in a thread without it
+    aiohttp = None
+
+ATTACHMENTS_DIR = "attachments"
+MANIFEST_NAME = ".manifest.json"
+DOWNLOAD_FAILED = "download failed"
+
+
+class AttachmentTooLarge(Exception):
+    """Raised when a download grows past its size limit"""
+
+
+def format_size(size: int) -> str:
+    for unit in ("bytes", "KiB", "MiB"):
+        if size < 1024 or unit == "MiB":
+            return f"{size} {unit}" if unit == "bytes" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _safe_filename(filename: str) -> str:
+    name = re.sub(r'[^A-Za-z0-9._-]+', '_', os.path.basename(filename)).strip('._')
+    return name[:100] or "attachment"
+
+
+def _open_partial(path: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    return open(path, 'wb')
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class AttachmentStore:
+    """Downloads Discord attachments into session workspaces for Goose to read
+
+    Attachments are streamed to disk in chunks under `attachments/` in the
+    workspace, never held in memory whole, and stored once per content hash.
+    Disk writes and manifest reads run in threads, off the event loop.
+    A manifest in that directory remembers which attachments were already
+    fetched, so a thread's history can be passed in every turn without
+    downloading anything twice. Prompts get a one-line reference per
+    attachment instead of its contents.
+    """
+
+    def __init__(self, max_bytes: int = 10 * 1024 * 1024, max_session_bytes: int = 50 * 1024 * 1024, chunk_size: int = 64 * 1024, timeout: float = 60.0):
+        self.max_bytes = max_bytes
+        self.max_session_bytes = max_session_bytes
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.downloaded = 0
+        self.deduplicated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.bytes = 0
+        self._locks: Dict[str, asyncio.Lock] = {}  # session_dir -> lock, as turns of a thread can overlap
+        self._http: Optional["aiohttp.ClientSession"] = None
+
+    @classmethod
+    def from_env(cls) -> "AttachmentStore":
+        """Build a store with limits from GOOSE_ATTACHMENT_* environment variables"""
+        return cls(
+            max_bytes=int(float(os.getenv('GOOSE_ATTACHMENT_MAX_MB', '10')) * 1024 * 1024),
+            max_session_bytes=int(float(os.getenv('GOOSE_ATTACHMENT_SESSION_MAX_MB', '50')) * 1024 * 1024),
+        )
+
+    async def close(self):
+        if self._http is not None:
+            await self._http.close()
+            self._http = None
+
+    def forget(self, session_dir: str):
+        """Drop state for a workspace that was cleaned up"""
+        self._locks.pop(session_dir, None)
+
+    async def add_references(self, session_dir: str, history: List[Dict]) -> List[Dict]:
+        """Fetch the attachments of a history into the workspace, returning the history with references"""
+        if not any(msg.get("attachments") for msg in history):
+            return history
+        lock = self._locks.setdefault(session_dir, asyncio.Lock())
+        async with lock:
+            manifest = await asyncio.to_thread(self._load_manifest, session_dir)
+            result = []
+            for msg in history:
+                if msg.get("attachments"):
+                    references = []
+                    for attachment in msg["attachments"]:
+                        entry = await self._ingest(session_dir, manifest, attachment)
+                        references.append(self.reference(attachment, entry))
+                    msg = dict(msg, references=references)
+                result.append(msg)
+            await asyncio.to_thread(self._save_manifest, session_dir, manifest)
+        return result
+
+    def reference(self, attachment: Dict, entry: Dict) -> str:
+        """Describe an attachment in one line for the prompt"""
+        described = f"{attachment['filename']} ({format_size(attachment.get('size') or entry.get('bytes', 0))})"
+        if entry.get('path'):
+            return f"[Attachment {described} saved as {entry['path']} in the working directory]"
+        return f"[Attachment {described} not downloaded: {entry['skipped']}]"
+
+    async def _ingest(self, session_dir: str, manifest: Dict, attachment: Dict) -> Dict:
+        attachment_id = str(attachment['id'])
+        if attachment_id in manifest['ids']:
+            return manifest['ids'][attachment_id]
+
+        size = attachment.get('size') or 0
+        remaining = self.max_session_bytes - manifest['bytes']
+        if size > self.max_bytes:
+            entry = {'skipped': f"larger than the {format_size(self.max_bytes)} limit"}
+        elif size > remaining:
+            entry = {'skipped': "this session's attachment space is used up"}
+        else:
+            entry = await self._download(session_dir, manifest, attachment, min(self.max_bytes, remaining))
+        if entry.get('skipped') and entry['skipped'] != DOWNLOAD_FAILED:
+            self.skipped += 1
+        manifest['ids'][attachment_id] = entry
+        return entry
+
+    async def _download(self, session_dir: str, manifest: Dict, attachment: Dict, limit: int) -> Dict:
+        partial = os.path.join(session_dir, ATTACHMENTS_DIR, f".{attachment['id']}.partial")
+        digest = hashlib.sha256()
+        total = 0
+        try:
+            f = await asyncio.to_thread(_open_partial, partial)
+            try:
+                async for chunk in self._chunks(attachment['url']):
+                    total += len(chunk)
+                    if total > limit:
+                        raise AttachmentTooLarge()
+                    digest.update(chunk)
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+        except AttachmentTooLarge:
+            await asyncio.to_thread(_remove, partial)
+            return {'skipped': f"larger than the {format_size(limit)} allowed"}
+        except Exception as e:
+            logger.warning(f"Couldn't download attachment {attachment['filename']}: {e}")
+            await asyncio.to_thread(_remove, partial)
+            self.failed += 1
+            # Not recorded in the manifest, so the next turn tries again
+            return {'skipped': DOWNLOAD_FAILED}
+
+        sha256 = digest.hexdigest()
+        if sha256 in manifest['hashes']:
+            await asyncio.to_thread(os.remove, partial)
+            self.deduplicated += 1
+            return {'path': manifest['hashes'][sha256], 'bytes': total, 'sha256': sha256}
+
+        relative = os.path.join(ATTACHMENTS_DIR, f"{sha256[:12]}-{_safe_filename(attachment['filename'])}")
+        await asyncio.to_thread(os.replace, partial, os.path.join(session_dir, relative))
+        manifest['hashes'][sha256] = relative
+        manifest['bytes'] += total
+        self.downloaded += 1
+        self.bytes += total
+        logger.info(f"Saved attachment {attachment['filename']} ({total} bytes) as {relative}")
+        return {'path': relative, 'bytes': total, 'sha256': sha256}
+
+    async def _chunks(self, url: str) -> AsyncIterator[bytes]:
+        if aiohttp is not None:
+            if self._http is None:
+                self._http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout))
+            async with self._http.get(url) as response:
+                response.raise_for_status()
+                async for chunk in response.content.iter_chunked(self.chunk_size):
+                    yield chunk
+            return
+
+        response = await asyncio.to_thread(urllib.request.urlopen, url, timeout=self.timeout)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(response.read, self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            response.close()
+
+    def _load_manifest(self, session_dir: str) -> Dict:
+        path = os.path.join(session_dir, ATTACHMENTS_DIR, MANIFEST_NAME)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'ids': {}, 'hashes': {}, 'bytes': 0}
+
+    def _save_manifest(self, session_dir: str, manifest: Dict):
+        # Failed downloads are left out so they are retried
+        manifest = dict(manifest, ids={key: entry for key, entry in manifest['ids'].items() if entry.get('skipped') != DOWNLOAD_FAILED})
+        directory = os.path.join(session_dir, ATTACHMENTS_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, MANIFEST_NAME)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(f"{path}.tmp", path)
+
+    def get_stats(self) -> Dict:
+        """Get how many attachments were fetched, deduplicated or skipped"""
+        return {
+            'downloaded': self.downloaded,
+            'deduplicated': self.deduplicated,
+            'skipped': self.skipped,
+            'failed': self.failed,
+            'bytes': self.bytes,
+        }
@@ -0,0 +1,236 @@
+"""
+Run a file of prompts through GooseClient without Discord
+
+Each input line is a JSON object with a `prompt` and optionally a unique `id`
+(the line number by default), a `mode` (assistant, session, text, history or
+recipe), a `recipe` name for the recipe mode and a `history` list for the
+history mode. Results are appended to the output file as they finish, one JSON
+object per line with the response and timings, so an interrupted run picks up
+where it left off with --resume.
+
+    python -m agent_honk.batch questions.jsonl -o answers.jsonl --mode assistant --concurrency 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import time
+import logging
+from typing import Dict, Iterator, Optional, Set
+
+from .goose_client import HELP_RECIPE, BAREBONES_RECIPE, GooseClient
+
+logger = logging.getLogger(__name__)
+
+MODES = ("assistant", "session", "text", "history", "recipe")
+
+
+def read_items(path: str) -> Iterator[Dict]:
+    """Read input items, giving each one without an id its line number
+
+    Ids name each item's result and Goose thread, so a repeated one raises
+    ValueError.
+    """
+    seen = set()
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            item.setdefault('id', str(line_number))
+            item['id'] = str(item['id'])
+            if item['id'] in seen:
+                raise ValueError(f"Duplicate item id {item['id']!r} on line {line_number} of {path}")
+            seen.add(item['id'])
+            yield item
+
+
+def finished_ids(path: str, retry_errors: bool = False) -> Set[str]:
+    """Get ids already in an output file, skipping failed ones when retrying errors"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # a line cut short by the interruption
+            if record.get('ok') or not retry_errors:
+                done.add(str(record['id']))
+    return done
+
+
+def _looks_like_error(response: Optional[str]) -> bool:
+    # GooseClient reports failures as in-character messages like "🦆 *Error honking* - ..."
+    return not response or response.startswith("🦆 *")
+
+
+class BatchRunner:
+    """Runs a file of prompts through a GooseClient with bounded concurrency
+
+    Results are written as each item finishes, so stopping part way only loses
+    the items that were still running; with `resume` those are the ones that
+    run next time.
+    """
+    
+    def __init__(
+        self,
+        client: GooseClient,
+        input_path: str,
+        output_path: str,
+        default_mode: str = "assistant",
+        concurrency: int = 4,
+        resume: bool = False,
+        retry_errors: bool = False,
+    ):
+        self.client = client
+        self.input_path = input_path
+        self.output_path = output_path
+        self.default_mode = default_mode
+        self.concurrency = concurrency
+        self.resume = resume
+        self.retry_errors = retry_errors
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self._stopping = False
+        self._output = None
+    
+    def stop(self):
+        """Stop taking new items and let the running ones finish"""
+        if not self._stopping:
+            logger.info("Stopping: finishing running items, run again with --resume for the rest")
+        self._stopping = True
+    
+    async def run(self) -> Dict:
+        """Run every item not already finished, returning a summary"""
+        # Check the whole input up front rather than stopping on a bad line part way
+        for _ in read_items(self.input_path):
+            pass
+        skip = finished_ids(self.output_path, self.retry_errors) if self.resume else set()
+        if skip:
+            logger.info(f"Resuming: {len(skip)} item(s) already in {self.output_path}")
+        
+        started = time.monotonic()
+        await self.client.start()
+        try:
+            with open(self.output_path, 'a' if self.resume else 'w', encoding='utf-8') as output:
+                self._output = output
+                queue: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency)
+                workers = [asyncio.create_task(self._worker(queue)) for _ in range(self.concurrency)]
+                try:
+                    for item in read_items(self.input_path):
+                        if self._stopping:
+                            break
+                        if item['id'] in skip:
+                            self.skipped += 1
+                            continue
+                        await queue.put(item)
+                    for _ in workers:
+                        await queue.put(None)
+                    await asyncio.gather(*workers)
+                finally:
+                    for worker in workers:
+                        worker.cancel()
+                    await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            self._output = None
+            await self.client.close()
+        
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'skipped': self.skipped,
+            'seconds': round(time.monotonic() - started, 1),
+        }
+    
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                return
+            record = await self._run_item(item)
+            self._output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._output.flush()
+            self.completed += 1
+            if not record['ok']:
+                self.failed += 1
+            logger.info(f"Item {record['id']} finished in {record['seconds']:.1f}s ({'ok' if record['ok'] else 'failed'})")
+    
+    async def _run_item(self, item: Dict) -> Dict:
+        mode = item.get('mode', self.default_mode)
+        thread_id = f"batch-{item['id']}"
+        record = {'id': item['id'], 'mode': mode, 'prompt': item.get('prompt')}
+        started_at = time.time()
+        started = time.monotonic()
+        try:
+            if mode in ("assistant", "session", "recipe"):
+                name = {'assistant': HELP_RECIPE, 'session': BAREBONES_RECIPE}.get(mode) or item['recipe']
+                # The version lets runs against different recipe edits be compared
+                record['recipe'] = name
+                record['recipe_version'] = self.client.recipes.get(name).version
+                response = await self.client.run_recipe(thread_id, name, item['prompt'])
+            elif mode == "text":
+                response = await self.client.run_initial(thread_id, item['prompt'])
+            elif mode == "history":
+                await self.client.ensure_session(thread_id)
+                history = item.get('history') or [{'role': 'user', 'content': item['prompt']}]
+                response = await self.client.run_with_history(thread_id, history)
+            else:
+                raise ValueError(f"Unknown mode {mode}, expected one of {', '.join(MODES)}")
+            record['response'] = response
+            record['ok'] = not _looks_like_error(response)
+        except Exception as e:
+            record['response'] = None
+            record['ok'] = False
+            record['error'] = str(e)
+        finally:
+            await self.client.cleanup_session(thread_id)
+        record['started_at'] = started_at
+        record['seconds'] = round(time.monotonic() - started, 3)
+        return record
+
+
+async def main(argv=None):
+    """Run a JSONL file of prompts through Goose and write the answers as JSONL"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="JSONL file of prompts")
+    parser.add_argument('-o', '--output', required=True, help="JSONL file to write results to")
+    parser.add_argument('--mode', choices=MODES, default="assistant", help="Mode for items that don't set one")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('GOOSE_BATCH_CONCURRENCY', '4')), help="Items to run at once")
+    parser.add_argument('--resume', action='store_true', help="Skip items already in the output file and append to it")
+    parser.add_argument('--retry-errors', action='store_true', help="With --resume, run failed items again")
+    args = parser.parse_args(argv)
+    
+    runner = BatchRunner(
+        GooseClient(),
+        args.input,
+        args.output,
+        default_mode=args.mode,
+        concurrency=args.concurrency,
+        resume=args.resume,
+        retry_errors=args.retry_errors,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, runner.stop)
+    try:
+        summary = await runner.run()
+    except ValueError as e:
+        parser.error(f"Invalid input: {e}")
+    logger.info(f"Batch finished: {summary['completed']} run ({summary['failed']} failed), {summary['skipped']} skipped, {summary['seconds']}s")
+    return summary
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(
+        level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
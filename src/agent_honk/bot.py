@@ -1,14 +1,38 @@
-import os
-import logging
-import discord
-from discord.ext import commands
-from dotenv import load_dotenv
-from .goose_client import GooseClient
-from .thread_manager import ThreadManager
+from .startup import StartupProfiler
+
+# Start the clock before the heavy imports so they show up in the startup profile;
+# the imports below are deliberately not at the top of the module
+startup_profiler = StartupProfiler()
+
+import asyncio  # noqa: E402
+import os  # noqa: E402
+import signal  # noqa: E402
+import time  # noqa: E402
+import logging  # noqa: E402
+from typing import Literal  # noqa: E402
+import discord  # noqa: E402
+from discord.ext import commands  # noqa: E402
+from dotenv import load_dotenv  # noqa: E402
+from .command_sync import CommandSyncer  # noqa: E402
+from .dispatcher import GooseDispatcher  # noqa: E402
+from .drain import TURN_ASSISTANT, TURN_SESSION, TURN_THREAD, DrainController  # noqa: E402
+from .goose_client import GooseClient  # noqa: E402
+from .health import HealthServer  # noqa: E402
+from .history_cache import HistoryCache  # noqa: E402
+from .memory import HeapProfiler, account, process_rss  # noqa: E402
+from .paths import get_state_dir  # noqa: E402
+from .state_store import load_state_store  # noqa: E402
+from .thread_manager import ThreadManager  # noqa: E402
+from .watchdog import LoopWatchdog  # noqa: E402
+
+startup_profiler.mark('imports')
 
 # Load environment variables
 load_dotenv()
 
+if os.getenv('STARTUP_TARGET_SECONDS'):
+    startup_profiler.target_seconds = float(os.getenv('STARTUP_TARGET_SECONDS'))
+
 # Set up logging
 logging.basicConfig(
     level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
@@ -16,26 +40,206 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Reacting with this emoji in a Goose thread cancels the running turn
+CANCEL_EMOJI = "🛑"
+
+# Posted instead of an answer when a turn arrives while the bot is restarting
+RESTARTING_MESSAGE = "🦆 *Migrating honking* - I'm restarting, I'll answer here in a moment!"
+
+
+def _shard_config() -> dict:
+    """Read shard settings for running shards across multiple processes
 
-class AgentHonk(commands.Bot):
+    DISCORD_SHARD_COUNT is the total number of shards and DISCORD_SHARD_IDS the
+    comma-separated shards this process runs. Without them discord.py picks the
+    recommended shard count and runs every shard here.
+    """
+    config = {}
+    if os.getenv('DISCORD_SHARD_COUNT'):
+        config['shard_count'] = int(os.getenv('DISCORD_SHARD_COUNT'))
+    if os.getenv('DISCORD_SHARD_IDS'):
+        config['shard_ids'] = [int(shard_id) for shard_id in os.getenv('DISCORD_SHARD_IDS').split(',')]
+    return config
+
+
+class AgentHonk(commands.AutoShardedBot):
     """Discord bot that wraps Goose AI functionality"""
     
     def __init__(self):
         intents = discord.Intents.default()
         intents.message_content = True
-        super().__init__(command_prefix='!', intents=intents)
+        super().__init__(command_prefix='!', intents=intents, **_shard_config())
+        
+        # Thread and session state, shared between shard processes when configured
+        self.state_store = load_state_store()
+        
+        # Run Goose locally, or hand turns to worker nodes through a job queue
+        if os.getenv('GOOSE_DISPATCH', 'local').lower() == 'queue':
+            self.goose_client = GooseDispatcher.from_env()
+        else:
+            self.goose_client = GooseClient(self.state_store)
+        self.thread_manager = ThreadManager(self.state_store)
+        # thread_id -> id of the newest message already in the transcript archive
+        self.archived_through = self.state_store.mapping('archived_through')
+        
+        # Thread histories are fetched incrementally, and the next turn is prepared while its user types
+        self.history_cache = HistoryCache.from_env()
+        self.prefetch_on_typing = os.getenv('GOOSE_PREFETCH_ON_TYPING', 'true').lower() in ('1', 'true', 'yes')
+        self.prefetch_interval = float(os.getenv('GOOSE_PREFETCH_MIN_INTERVAL', '5'))
+        
+        # Accepted turns are journaled so a restart can finish what this instance couldn't
+        shards = self.shard_ids
+        suffix = f"-shards-{'-'.join(str(shard_id) for shard_id in shards)}" if shards is not None else ""
+        self.drain = DrainController.from_env(get_state_dir(), f"turn_journal{suffix}")
+        # How often to look for journals left by instances that have exited
+        self.journal_adopt_interval = float(os.getenv('GOOSE_JOURNAL_ADOPT_INTERVAL', '10'))
         
-        self.goose_client = GooseClient()
-        self.thread_manager = ThreadManager()
+        # Loop lag watchdog and the optional /healthz and /readyz server
+        self.watchdog = LoopWatchdog.from_env()
+        self.health_server = HealthServer.from_env(self)
+        self.disconnected_at = None  # monotonic time the gateway connection was lost
+        
+        # Users allowed to run operator commands such as /heap
+        self.admin_user_ids = {int(user_id) for user_id in os.getenv('ADMIN_USER_IDS', '').split(',') if user_id.strip()}
+        self.heap_profiler = HeapProfiler(os.path.join(get_state_dir(), 'heap'))
     
-    async def on_ready(self):
-        """Called when the bot is ready"""
-        logger.info(f'{self.user} has landed! 🦆')
+    @property
+    def is_primary_shard(self) -> bool:
+        """Whether this process runs shard 0 and should do once-per-bot work"""
+        return self.shard_ids is None or 0 in self.shard_ids
+    
+    async def setup_hook(self):
+        """Called once after login, before connecting to the gateway"""
+        startup_profiler.mark('login')
+        await self.watchdog.start()
+        if self.health_server:
+            await self.health_server.start()
+        await self.goose_client.start()
+        
+        guild_id = os.getenv('DISCORD_SYNC_GUILD_ID')
+        syncer = CommandSyncer(
+            self.tree,
+            get_state_dir(),
+            guild_id=int(guild_id) if guild_id else None,
+            force=os.getenv('DISCORD_FORCE_SYNC', '').lower() in ('1', 'true', 'yes')
+        )
         try:
-            synced = await self.tree.sync()
-            logger.info(f"Synced {len(synced)} command(s)")
+            # Commands are global, so only one shard process needs to sync them
+            if self.is_primary_shard:
+                await syncer.sync_if_changed()
         except Exception as e:
             logger.error(f"Failed to sync commands: {e}")
+        startup_profiler.mark('command_sync')
+    
+    async def close(self):
+        """Release Goose resources before disconnecting"""
+        await self.goose_client.close()
+        await super().close()
+        if self.health_server:
+            await self.health_server.close()
+        await self.watchdog.close()
+        # Whatever is still journaled goes to the next instance
+        await self.drain.journal.close()
+        self.state_store.close()
+    
+    async def on_connect(self):
+        self.disconnected_at = None
+    
+    async def on_resumed(self):
+        self.disconnected_at = None
+    
+    async def on_disconnect(self):
+        """Remember when the gateway dropped so health checks can tell a blip from an outage"""
+        if self.disconnected_at is None:
+            self.disconnected_at = time.monotonic()
+    
+    async def on_ready(self):
+        """Called when the bot is ready, including after every reconnect"""
+        logger.info(f'{self.user} has landed! 🦆')
+        self.disconnected_at = None
+        if 'first_ready' not in startup_profiler.marks:
+            startup_profiler.mark('first_ready')
+            startup_profiler.report()
+            asyncio.create_task(self._replay_loop())
+    
+    async def shutdown(self):
+        """Drain running turns, then disconnect; a second call disconnects right away"""
+        if self.drain.draining:
+            logger.warning("Shutdown requested again, closing without waiting for running turns")
+            await self.close()
+            return
+        await self.drain.drain(self.goose_client.cancel)
+        await self.close()
+    
+    async def _replay_loop(self):
+        # A previous instance may still be draining when this one is ready
+        while not self.drain.draining:
+            try:
+                await self.replay_journal()
+            except Exception as e:
+                logger.error(f"Error replaying journaled turns: {e}")
+            await asyncio.sleep(self.journal_adopt_interval)
+    
+    async def replay_journal(self):
+        """Answer turns that instances which have exited accepted but didn't finish"""
+        pending = await self.drain.journal.adopt()
+        if pending:
+            logger.info(f"Replaying {len(pending)} journaled turn(s)")
+        for turn_id, entry in pending:
+            if not self.drain.journal.mark_replayed(turn_id):
+                continue
+            thread_id = entry['thread_id']
+            try:
+                thread = self.get_channel(int(thread_id)) or await self.fetch_channel(int(thread_id))
+            except discord.HTTPException as e:
+                logger.warning(f"Dropping journaled turn for thread {thread_id}: {e}")
+                self.drain.journal.remove(turn_id)
+                continue
+            
+            # Thread registrations don't survive a restart with the in-memory store
+            if not self.thread_manager.is_goose_thread(thread_id):
+                self.thread_manager.register_thread(thread_id, entry['user_id'])
+            asyncio.create_task(self.run_turn(thread, turn_id))
+    
+    async def run_turn(self, thread, turn_id: str):
+        """Run a journaled turn and post the answer in its thread"""
+        entry = self.drain.journal.entries[turn_id]
+        thread_id = entry['thread_id']
+        self.drain.begin(turn_id, thread_id)
+        try:
+            async with thread.typing():
+                if entry['kind'] == TURN_SESSION:
+                    # Initial prompt for a session uses the barebones recipe
+                    response = await self.goose_client.run_barebones(thread_id, entry['prompt'])
+                elif entry['kind'] == TURN_ASSISTANT:
+                    response = await self.goose_client.run_initial(thread_id, entry['prompt'], use_help_recipe=True)
+                else:
+                    # A replayed turn may find no session after a restart; the history carries the context
+                    await self.goose_client.ensure_session(thread_id)
+                    # Get full thread history
+                    thread_history = await self.get_thread_history(thread)
+                    response = await self.goose_client.run_with_history(thread_id, thread_history)
+            
+            # A drain cancelled this turn; the next instance will answer it
+            if self.drain.was_interrupted(turn_id):
+                return
+            
+            if response:
+                await self._send_long_message(thread, response)
+            elif entry['kind'] == TURN_THREAD:
+                await thread.send("🦆 *Honk!* Sorry, I couldn't process that right now.")
+            else:
+                await thread.send("🦆 *Sad honking* - I couldn't connect to Goose right now. Please try again!")
+        finally:
+            self.drain.finish(turn_id)
+    
+    async def accept_turn(self, thread, kind: str, user_id: int, **payload):
+        """Journal a new turn and run it, or leave it for the next instance while draining"""
+        turn_id = self.drain.journal.add(kind, str(thread.id), user_id, **payload)
+        if self.drain.draining:
+            await thread.send(RESTARTING_MESSAGE)
+            return
+        await self.run_turn(thread, turn_id)
 
     async def on_message(self, message):
         """Handle incoming messages"""
@@ -51,56 +255,164 @@ class AgentHonk(commands.Bot):
         
         await self.process_commands(message)
     
+    async def on_typing(self, channel, user, when):
+        """Prepare the next turn of a Goose thread while its user is typing it"""
+        if not self.prefetch_on_typing or not isinstance(channel, discord.Thread) or user.bot:
+            return
+        thread_id = str(channel.id)
+        if not self.thread_manager.is_goose_thread(thread_id) or self.drain.draining:
+            return
+        # Discord repeats typing events every few seconds; a busy thread is prepared after its turn
+        if self.history_cache.fresh(thread_id, self.prefetch_interval) or self.goose_client.is_running(thread_id):
+            return
+        
+        history = await self.get_thread_history(channel)
+        if history:
+            await self.goose_client.prepare_turn(thread_id, history)
+    
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        self.history_cache.invalidate(str(payload.channel_id))
+    
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        self.history_cache.invalidate(str(payload.channel_id))
+    
+    async def on_raw_bulk_message_delete(self, payload: discord.RawBulkMessageDeleteEvent):
+        self.history_cache.invalidate(str(payload.channel_id))
+    
+    async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
+        """Cancel the running turn when the thread owner reacts with the cancel emoji"""
+        if str(payload.emoji) != CANCEL_EMOJI or payload.user_id == self.user.id:
+            return
+        
+        thread_id = str(payload.channel_id)
+        if not self.thread_manager.is_goose_thread(thread_id):
+            return
+        if payload.user_id != self.thread_manager.get_thread_owner(thread_id):
+            return
+        
+        if self.goose_client.cancel(thread_id):
+            logger.info(f"User {payload.user_id} cancelled turn in thread {thread_id} via reaction")
+    
+    async def on_raw_thread_delete(self, payload: discord.RawThreadDeleteEvent):
+        """Stop any running work and clean up when a Goose thread is deleted"""
+        thread_id = str(payload.thread_id)
+        if not self.thread_manager.is_goose_thread(thread_id):
+            return
+        
+        logger.info(f"Goose thread {thread_id} was deleted, cancelling and cleaning up")
+        self.goose_client.cancel(thread_id)
+        # The thread's messages are gone with it; only Goose's session logs get archived
+        await self.finish_thread(thread_id, messages=[])
+    
+    async def on_raw_thread_update(self, payload: discord.RawThreadUpdateEvent):
+        """Archive the conversation when a Goose thread is archived
+        
+        Discord archives threads after a spell of inactivity and unarchives them
+        when someone posts again, so the session is kept for the next turn. Each
+        snapshot holds only the messages posted since the previous one.
+        """
+        thread_id = str(payload.thread_id)
+        if not payload.data.get('thread_metadata', {}).get('archived'):
+            return
+        if not self.thread_manager.is_goose_thread(thread_id) or self.goose_client.is_running(thread_id):
+            return
+        
+        logger.info(f"Goose thread {thread_id} was archived, archiving its transcript")
+        archived_through = await asyncio.to_thread(self.archived_through.get, thread_id)
+        try:
+            thread = payload.thread or await self.fetch_channel(payload.thread_id)
+            messages, last_message_id = await self._read_history(thread, archived_through)
+        except discord.HTTPException as e:
+            logger.warning(f"Couldn't read archived thread {thread_id}: {e}")
+            messages, last_message_id = [], archived_through
+        transcript = {'user_id': self.thread_manager.get_thread_owner(thread_id), 'messages': messages}
+        await self.goose_client.archive_transcript(thread_id, transcript)
+        if last_message_id != archived_through:
+            await asyncio.to_thread(self.archived_through.__setitem__, thread_id, last_message_id)
+    
+    async def finish_thread(self, thread_id: str, messages):
+        """Archive a finished thread's transcript, then drop its session and registration"""
+        transcript = {'user_id': self.thread_manager.get_thread_owner(thread_id), 'messages': messages}
+        await self.goose_client.cleanup_session(thread_id, transcript=transcript)
+        self.thread_manager.unregister_thread(thread_id)
+        self.history_cache.invalidate(thread_id)
+        await asyncio.to_thread(self.archived_through.pop, thread_id, None)
+    
     async def handle_thread_message(self, message):
         """Handle messages in existing Goose threads"""
         thread_id = str(message.channel.id)
         logger.info(f"Handling message in thread {thread_id}")
         
         try:
-            # Get full thread history
-            thread_history = await self.get_thread_history(message.channel)
-            
-            # Send to Goose
-            async with message.channel.typing():
-                response = await self.goose_client.run_with_history(
-                    thread_id, 
-                    thread_history
-                )
-                
-                if response:
-                    await self._send_long_message(message.channel, response)
-                else:
-                    await message.channel.send("🦆 *Honk!* Sorry, I couldn't process that right now.")
-                    
+            await self.accept_turn(message.channel, TURN_THREAD, message.author.id)
         except Exception as e:
             logger.error(f"Error handling thread message: {e}")
             await message.channel.send("🦆 *Confused honking* - Something went wrong!")
     
     async def get_thread_history(self, thread):
-        """Get the full message history of a thread"""
-        messages = []
-        try:
-            async for msg in thread.history(limit=None, oldest_first=True):
-                # Skip system messages and only include user/assistant messages
-                if not msg.content.strip():
-                    continue
-                    
-                if msg.author == self.user:
-                    # Bot message (assistant)
-                    messages.append({
-                        "role": "assistant",
-                        "content": msg.content
-                    })
-                elif not msg.author.bot:
-                    # Human message (user)
-                    messages.append({
-                        "role": "user", 
-                        "content": msg.content
-                    })
-        except Exception as e:
-            logger.error(f"Error getting thread history: {e}")
+        """Get the full message history of a thread, fetching only messages newer than the cached ones"""
+        thread_id = str(thread.id)
+        async with self.history_cache.lock(thread_id):
+            cached = self.history_cache.get(thread_id)
+            messages = list(cached.messages) if cached else []
+            last_message_id = cached.last_message_id if cached else None
+            try:
+                newer, last_message_id = await self._read_history(thread, last_message_id)
+                messages.extend(newer)
+            except Exception as e:
+                logger.error(f"Error getting thread history: {e}")
+                self.history_cache.invalidate(thread_id)
+                return messages
             
-        return messages
+            self.history_cache.store(thread_id, messages, last_message_id)
+        return list(messages)
+    
+    async def _read_history(self, thread, after_id):
+        """Get history entries for a thread's messages after `after_id`, and the id of the newest one read"""
+        entries = []
+        after = discord.Object(id=after_id) if after_id else None
+        async for msg in thread.history(limit=None, after=after, oldest_first=True):
+            after_id = msg.id
+            entry = self._history_entry(msg)
+            if entry is not None:
+                entries.append(entry)
+        return entries, after_id
+    
+    def _history_entry(self, msg):
+        """Turn a thread message into a history entry, or None to leave it out"""
+        # Skip system messages and only include user/assistant messages
+        if not msg.content.strip() and not msg.attachments:
+            return None
+            
+        if msg.author == self.user:
+            # The restart notice isn't part of the conversation
+            if msg.content == RESTARTING_MESSAGE:
+                return None
+            # Bot message (assistant)
+            return {
+                "role": "assistant",
+                "content": msg.content
+            }
+        if msg.author.bot:
+            return None
+        
+        # Human message (user); attachments are fetched by whoever runs Goose
+        entry = {
+            "role": "user", 
+            "content": msg.content
+        }
+        if msg.attachments:
+            entry["attachments"] = [
+                {
+                    "id": str(attachment.id),
+                    "filename": attachment.filename,
+                    "url": attachment.url,
+                    "size": attachment.size,
+                    "content_type": attachment.content_type,
+                }
+                for attachment in msg.attachments
+            ]
+        return entry
 
     async def _send_long_message(self, channel, message):
         """Send a long message, splitting it if necessary to fit Discord's limits"""
@@ -185,13 +497,7 @@ async def session(interaction: discord.Interaction, prompt: str):
         await thread.send(f"<@{interaction.user.id}> asked: {prompt}")
         
         # Send initial prompt to Goose using barebones recipe
-        async with thread.typing():
-            response = await bot.goose_client.run_barebones(thread_id, prompt)
-            
-            if response:
-                await bot._send_long_message(thread, response)
-            else:
-                await thread.send("🦆 *Sad honking* - I couldn't connect to Goose right now. Please try again!")
+        await bot.accept_turn(thread, TURN_SESSION, interaction.user.id, prompt=prompt)
                 
     except Exception as e:
         logger.error(f"Error in session command: {e}")
@@ -231,13 +537,7 @@ async def assistant(interaction: discord.Interaction, prompt: str):
         await thread.send(f"<@{interaction.user.id}> asked: {prompt}")
         
         # Send initial prompt to Goose with help recipe
-        async with thread.typing():
-            response = await bot.goose_client.run_initial(thread_id, prompt, use_help_recipe=True)
-            
-            if response:
-                await bot._send_long_message(thread, response)
-            else:
-                await thread.send("🦆 *Sad honking* - I couldn't connect to Goose right now. Please try again!")
+        await bot.accept_turn(thread, TURN_ASSISTANT, interaction.user.id, prompt=prompt)
                 
     except Exception as e:
         logger.error(f"Error in assistant command: {e}")
@@ -248,6 +548,133 @@ async def assistant(interaction: discord.Interaction, prompt: str):
             )
 
 
+# Slash command for /cancel
+@discord.app_commands.command(name="cancel", description="🦆 Stop Goose working on the current request in this thread")
+async def cancel(interaction: discord.Interaction):
+    """Cancel the running Goose turn in the current thread"""
+    bot = interaction.client
+    thread_id = str(interaction.channel_id)
+    
+    if not bot.thread_manager.is_goose_thread(thread_id):
+        await interaction.response.send_message(
+            "🦆 *Puzzled honking* - `/cancel` only works inside a Goose thread.",
+            ephemeral=True
+        )
+        return
+    
+    owner_id = bot.thread_manager.get_thread_owner(thread_id)
+    permissions = interaction.channel.permissions_for(interaction.user)
+    if interaction.user.id != owner_id and not permissions.manage_threads:
+        await interaction.response.send_message(
+            "🦆 *Protective honking* - Only the person who started this thread can cancel it.",
+            ephemeral=True
+        )
+        return
+    
+    if bot.goose_client.cancel(thread_id):
+        logger.info(f"User {interaction.user} cancelled turn in thread {thread_id}")
+        await interaction.response.send_message("🦆 Cancelling...", ephemeral=True)
+    else:
+        await interaction.response.send_message(
+            "🦆 Nothing is running in this thread right now.",
+            ephemeral=True
+        )
+
+
+def format_stats(bot: AgentHonk) -> str:
+    """Render thread and Goose metrics as a short Discord message"""
+    threads = bot.thread_manager.get_stats()
+    metrics = bot.goose_client.get_metrics()
+    
+    lines = [
+        "🦆 **Agent Honk Stats**",
+        f"• Threads: {threads['total_active_threads']} active, {threads['threads_created_today']} created today, {threads['unique_users']} users",
+        f"• Sessions: {metrics['active_sessions']} active, {metrics['running_turns']} turn(s) running",
+    ]
+    drain = bot.drain.get_stats()
+    if drain['draining'] or drain['journaled'] > drain['running']:
+        lines.append(f"• Restart: {'draining, ' if drain['draining'] else ''}{drain['running']} running, {drain['journaled']} journaled")
+    loop = bot.watchdog.get_stats()
+    lines.append(f"• Event loop: p99 lag {loop['p99_lag'] * 1000:.0f} ms, worst {loop['max_lag'] * 1000:.0f} ms, {loop['stalls']} stall(s)")
+    if 'queue' in metrics:
+        queue = metrics['queue']
+        lines.append(f"• Job queue: {queue['queued']} queued, {queue['running']} running, {queue.get('dead', 0)} dead-lettered, {queue['live_workers']} live worker(s)")
+    if 'pool' in metrics:
+        pool = metrics['pool']
+        lines.append(f"• Warm pool: {pool['ready']}/{pool['target']} ready, {pool['hits']} hits, {pool['misses']} misses")
+    if 'prefetch' in metrics:
+        prefetch, history = metrics['prefetch'], bot.history_cache.get_stats()
+        lines.append(
+            f"• Typing prefetch: {prefetch['prepared']} turns prepared, {prefetch['prefix_hits']} prefixes reused, "
+            f"{metrics['pool']['leases_used']}/{metrics['pool']['leases']} leased processes used; "
+            f"history cache {history['hits']} hits, {history['misses']} misses"
+        )
+    if 'coalescing' in metrics:
+        coalescing = metrics['coalescing']
+        lines.append(f"• Recipe runs: {coalescing['runs']} started, {coalescing['coalesced']} saved by coalescing")
+    if metrics.get('transcripts'):
+        transcripts = metrics['transcripts']
+        lines.append(f"• Transcripts: {transcripts['transcripts']} archived, {transcripts['stored_bytes'] // 1024} KiB ({transcripts['ratio']}x compressed)")
+    memory = dict(metrics.get('memory', {}))
+    memory['threads'] = account(bot.thread_manager.threads)
+    memory['thread_owners'] = account(bot.thread_manager.owners)
+    memory['turn_journal'] = account(bot.drain.journal.entries)
+    memory['history_cache'] = account({thread_id: cached.messages for thread_id, cached in bot.history_cache.entries.items()})
+    largest = sorted(memory.items(), key=lambda item: item[1]['bytes'], reverse=True)[:4]
+    rss = process_rss()
+    lines.append(
+        f"• Memory: {f'RSS {rss / 1024 / 1024:.0f} MB, ' if rss else ''}"
+        + ", ".join(f"{name} {usage['entries']} ({usage['bytes'] / 1024:.0f} KiB)" for name, usage in largest)
+        + (" (allocation tracing on)" if bot.heap_profiler.tracing else "")
+    )
+    for name, error in metrics.get('recipes', {}).get('errors', {}).items():
+        lines.append(f"• ⚠️ Recipe `{name}` is invalid: {error[:100]}")
+    hedging = metrics.get('hedging', {})
+    if hedging.get('enabled'):
+        lines.append(f"• Hedging: {hedging['launched']} launched, {hedging['won']} won, {hedging['denied']} over budget")
+    for name, lane in metrics.get('lanes', {}).items():
+        lines.append(f"• Lane `{name}`: {lane['active']}/{lane['concurrency']} running, {lane['waiting']} queued, {lane['rejected']} rejected")
+    for mode, breaker in metrics.get('breakers', {}).items():
+        if breaker['state'] != 'closed':
+            lines.append(f"• ⚠️ `{mode}` circuit {breaker['state'].replace('_', '-')}: failing fast, retry in {breaker['retry_after']:.0f}s")
+    for mode, usage in metrics.get('resources', {}).get('usage', {}).items():
+        lines.append(f"• `{mode}` usage: peak RSS {usage['peak_rss_mb_max']} MB (avg {usage['peak_rss_mb_avg']} MB), CPU up to {usage['cpu_seconds_max']}s")
+    for mode, latency in metrics.get('latency', {}).items():
+        if latency['p50'] is not None:
+            lines.append(f"• `{mode}` latency: p50 {latency['p50']:.1f}s, p95 {latency['p95']:.1f}s, timeout {latency['timeout']:.0f}s")
+        else:
+            lines.append(f"• `{mode}` latency: {latency['samples']} sample(s) so far, timeout {latency['timeout']:.0f}s")
+    return "\n".join(lines)
+
+
+# Slash command for /stats
+@discord.app_commands.command(name="stats", description="🦆 Show Agent Honk runtime statistics")
+async def stats(interaction: discord.Interaction):
+    """Display thread and Goose runtime metrics"""
+    await interaction.response.send_message(format_stats(interaction.client), ephemeral=True)
+
+
+# Slash command for /heap
+@discord.app_commands.command(name="heap", description="🦆 Capture a heap snapshot diff (admins only)")
+@discord.app_commands.describe(action="capture: start tracing or write what grew since the last capture; stop: stop tracing")
+async def heap(interaction: discord.Interaction, action: Literal["capture", "stop"] = "capture"):
+    """Profile the bot's memory without restarting it"""
+    bot = interaction.client
+    if interaction.user.id not in bot.admin_user_ids:
+        await interaction.response.send_message("🦆 *Protective honking* - Only bot admins can do that.", ephemeral=True)
+        return
+    
+    await interaction.response.defer(ephemeral=True, thinking=True)
+    profiler = bot.heap_profiler
+    try:
+        summary = await asyncio.to_thread(profiler.capture if action == "capture" else profiler.stop)
+    except Exception as e:
+        logger.error(f"Heap profiling failed: {e}")
+        summary = f"Heap profiling failed: {e}"
+    logger.info(f"User {interaction.user} ran /heap {action}: {summary}")
+    await interaction.followup.send(f"🦆 {summary}", ephemeral=True)
+
+
 # Slash command for /help
 @discord.app_commands.command(name="help", description="🦆 Show available commands")
 async def help_command(interaction: discord.Interaction):
@@ -258,6 +685,8 @@ async def help_command(interaction: discord.Interaction):
 **Available Commands:**
 • `/session <prompt>` - Start a new Goose AI session with your prompt
 • `/assistant <question>` - Get help with Goose AI questions
+• `/cancel` - Stop Goose working on the current request in a thread
+• `/stats` - Show runtime statistics
 • `/help` - Show this help message
 
 **How to use:**
@@ -265,6 +694,7 @@ async def help_command(interaction: discord.Interaction):
 2. Use `/assistant` for questions about Goose AI specifically
 3. Continue conversations in the created thread
 4. Each command creates a new thread for organized discussions
+5. React with 🛑 or use `/cancel` in a thread to stop a long-running request
 
 **Examples:**
 • `/session Write a Python script to sort a list`
@@ -281,6 +711,9 @@ async def main():
     bot = AgentHonk()
     bot.tree.add_command(session)
     bot.tree.add_command(assistant)
+    bot.tree.add_command(cancel)
+    bot.tree.add_command(stats)
+    bot.tree.add_command(heap)
     bot.tree.add_command(help_command)
     
     token = os.getenv('DISCORD_TOKEN')
@@ -288,10 +721,14 @@ async def main():
         logger.error("DISCORD_TOKEN environment variable is required")
         raise ValueError("DISCORD_TOKEN environment variable is required")
     
+    # Drain running turns on SIGTERM so deploys don't drop answers
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, lambda: asyncio.ensure_future(bot.shutdown()))
+    
     logger.info("Starting Agent Honk...")
     await bot.start(token)
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(main())
@@ -0,0 +1,174 @@
+import os
+import time
+import logging
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict
+
+logger = logging.getLogger(__name__)
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of running Goose while a circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit {name} is open, retry in {retry_after:.0f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class _Call:
+    """Lets a guarded call report how it went"""
+
+    def __init__(self, breaker: "CircuitBreaker", probe: bool):
+        self.breaker = breaker
+        self.probe = probe
+        self.reported = False
+
+    def success(self):
+        self.reported = True
+        self.breaker._record_success(self.probe)
+
+    def failure(self):
+        self.reported = True
+        self.breaker._record_failure(self.probe)
+
+
+class CircuitBreaker:
+    """Fast-fails Goose runs after repeated failures until a probe succeeds
+
+    Closed: calls run normally; `failure_threshold` failures within `window`
+    seconds open the circuit. Open: calls fail immediately until `cooldown`
+    has passed. Half-open: a single probe call is let through; success closes
+    the circuit, failure re-opens it with a doubled cooldown (up to
+    `max_cooldown`).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, window: float = 60.0, cooldown: float = 30.0, max_cooldown: float = 300.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.state = STATE_CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self.trips = 0
+        self._failures: Deque[float] = deque()
+        self._probe_in_flight = False
+
+    @property
+    def enabled(self) -> bool:
+        return self.failure_threshold > 0
+
+    @contextmanager
+    def guard(self):
+        """Guard a call, raising CircuitOpenError if it shouldn't run
+
+        The block should report its outcome with success() or failure() on the
+        yielded object; calls that report neither (e.g. cancelled) don't count.
+        """
+        probe = self._admit()
+        call = _Call(self, probe)
+        try:
+            yield call
+        finally:
+            if probe and not call.reported:
+                self._probe_in_flight = False
+
+    def retry_after(self) -> float:
+        """Seconds until the circuit will let a probe through"""
+        return max(0.0, self.opened_at + self.cooldown - time.monotonic())
+
+    def _admit(self) -> bool:
+        if not self.enabled:
+            return False
+        if self.state == STATE_OPEN:
+            if self.retry_after() > 0:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.retry_after())
+            self.state = STATE_HALF_OPEN
+            logger.info(f"Circuit {self.name} is half-open, letting a probe through")
+        if self.state == STATE_HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(self.name, self.base_cooldown)
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def _record_success(self, probe: bool):
+        if probe:
+            self._probe_in_flight = False
+        if self.state != STATE_CLOSED:
+            logger.info(f"Circuit {self.name} closed again after a successful probe")
+        self.state = STATE_CLOSED
+        self.cooldown = self.base_cooldown
+        self._failures.clear()
+
+    def _record_failure(self, probe: bool):
+        now = time.monotonic()
+        if probe:
+            self._probe_in_flight = False
+            self.cooldown = min(self.max_cooldown, self.cooldown * 2)
+            self._open(now)
+            return
+        if not self.enabled or self.state != STATE_CLOSED:
+            return
+
+        self._failures.append(now)
+        while self._failures and self._failures[0] < now - self.window:
+            self._failures.popleft()
+        if len(self._failures) >= self.failure_threshold:
+            self._open(now)
+
+    def _open(self, now: float):
+        self.state = STATE_OPEN
+        self.opened_at = now
+        self.trips += 1
+        self._failures.clear()
+        logger.warning(f"Circuit {self.name} opened, failing fast for {self.cooldown:.0f}s")
+
+    def get_stats(self) -> Dict:
+        """Get breaker state and counters"""
+        return {
+            'state': self.state,
+            'recent_failures': len(self._failures),
+            'trips': self.trips,
+            'rejected': self.rejected,
+            'retry_after': round(self.retry_after(), 1) if self.state == STATE_OPEN else 0.0,
+        }
+
+
+class BreakerRegistry:
+    """One circuit breaker per execution mode"""
+
+    def __init__(self, failure_threshold: int = 5, window: float = 60.0, cooldown: float = 30.0, max_cooldown: float = 300.0):
+        self.settings = dict(failure_threshold=failure_threshold, window=window, cooldown=cooldown, max_cooldown=max_cooldown)
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_env(cls) -> "BreakerRegistry":
+        """Build breakers from GOOSE_BREAKER_* environment variables"""
+        return cls(
+            failure_threshold=int(os.getenv('GOOSE_BREAKER_FAILURES', '5')),
+            window=float(os.getenv('GOOSE_BREAKER_WINDOW', '60')),
+            cooldown=float(os.getenv('GOOSE_BREAKER_COOLDOWN', '30')),
+            max_cooldown=float(os.getenv('GOOSE_BREAKER_MAX_COOLDOWN', '300')),
+        )
+
+    def for_mode(self, mode: str) -> CircuitBreaker:
+        """Get the breaker for a mode, creating it on first use"""
+        breaker = self.breakers.get(mode)
+        if breaker is None:
+            breaker = self.breakers[mode] = CircuitBreaker(mode, **self.settings)
+        return breaker
+
+    def get_stats(self) -> Dict:
+        """Get stats for every breaker"""
+        return {mode: breaker.get_stats() for mode, breaker in self.breakers.items()}
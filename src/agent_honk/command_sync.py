@@ -0,0 +1,65 @@
+import hashlib
+import json
+import os
+import logging
+from typing import Optional
+
+import discord
+
+logger = logging.getLogger(__name__)
+
+
+def command_tree_hash(tree: discord.app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """Hash the payload Discord would receive for the registered commands"""
+    payload = [command.to_dict(tree) for command in tree.get_commands(guild=guild)]
+    payload.sort(key=lambda command: (command.get('type', 1), command['name']))
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class CommandSyncer:
+    """Syncs slash commands only when the registered command tree changed"""
+
+    def __init__(self, tree: discord.app_commands.CommandTree, state_dir: str, guild_id: Optional[int] = None, force: bool = False):
+        self.tree = tree
+        self.state_dir = state_dir
+        self.guild = discord.Object(id=guild_id) if guild_id else None
+        self.force = force
+
+    def _hash_path(self) -> str:
+        scope = f"guild-{self.guild.id}" if self.guild else "global"
+        return os.path.join(self.state_dir, f"command_tree.{self.tree.client.application_id}.{scope}.sha256")
+
+    def _load_hash(self) -> Optional[str]:
+        try:
+            with open(self._hash_path(), 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _save_hash(self, digest: str):
+        path = self._hash_path()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(digest)
+        os.replace(tmp_path, path)
+
+    async def sync_if_changed(self) -> bool:
+        """Sync the command tree if it differs from the last synced one
+
+        Returns True if a sync was performed.
+        """
+        if self.guild:
+            # Guild commands update instantly, which is handy during development
+            self.tree.copy_global_to(guild=self.guild)
+
+        digest = command_tree_hash(self.tree, guild=self.guild)
+        if not self.force and digest == self._load_hash():
+            logger.info("Command tree unchanged since last sync, skipping")
+            return False
+
+        synced = await self.tree.sync(guild=self.guild)
+        self._save_hash(digest)
+        scope = f"guild {self.guild.id}" if self.guild else "globally"
+        logger.info(f"Synced {len(synced)} command(s) {scope}")
+        return True
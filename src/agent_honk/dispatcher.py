@@ -0,0 +1,180 @@
+import asyncio
+import os
+import time
+import logging
+from typing import Dict, List, Optional, Set
+
+from .goose_client import CANCELLED_MESSAGE
+from .job_queue import JobQueue, load_job_queue
+from .memory import account
+
+logger = logging.getLogger(__name__)
+
+
+class GooseDispatcher:
+    """Drop-in replacement for GooseClient that hands Goose runs to workers
+
+    Turns are put on a job queue and picked up by `agent_honk.worker`
+    processes, which may run on other machines. The dispatcher just waits for
+    the results, so the bot process never spawns Goose itself.
+    """
+    
+    def __init__(self, queue: Optional[JobQueue] = None, poll_interval: float = 0.25, turn_timeout: float = 900.0, heartbeat_timeout: float = 30.0, stats_interval: float = 5.0):
+        self.queue = queue or load_job_queue()
+        self.poll_interval = poll_interval
+        self.turn_timeout = turn_timeout
+        self.heartbeat_timeout = heartbeat_timeout
+        self.stats_interval = stats_interval
+        # Queue depth and live workers as of the last poll, for /stats and readiness probes
+        self.queue_stats: Dict = {'queued': 0, 'running': 0, 'dead': 0, 'live_workers': 0}
+        self._stats_task: Optional[asyncio.Task] = None
+        self.sessions: Dict[str, bool] = {}  # thread_id -> started through this dispatcher
+        self._waiting: Dict[str, Set[int]] = {}  # thread_id -> job ids being waited on
+    
+    @classmethod
+    def from_env(cls) -> "GooseDispatcher":
+        """Build a dispatcher from GOOSE_JOB_QUEUE and GOOSE_DISPATCH_* environment variables"""
+        return cls(
+            poll_interval=float(os.getenv('GOOSE_DISPATCH_POLL_SECONDS', '0.25')),
+            turn_timeout=float(os.getenv('GOOSE_DISPATCH_TIMEOUT', '900')),
+            heartbeat_timeout=float(os.getenv('GOOSE_WORKER_HEARTBEAT_TIMEOUT', '30')),
+            stats_interval=float(os.getenv('GOOSE_DISPATCH_STATS_SECONDS', '5')),
+        )
+    
+    async def start(self):
+        """Read the queue stats and keep them fresh in the background"""
+        await self._refresh_stats()
+        if self._stats_task is None:
+            self._stats_task = asyncio.create_task(self._stats_loop())
+    
+    async def close(self):
+        if self._stats_task is not None:
+            self._stats_task.cancel()
+            try:
+                await self._stats_task
+            except asyncio.CancelledError:
+                pass
+            self._stats_task = None
+        self.queue.close()
+    
+    async def _refresh_stats(self):
+        try:
+            self.queue_stats = await asyncio.to_thread(self.queue.get_stats, self.heartbeat_timeout)
+        except Exception as e:
+            logger.error(f"Error reading job queue stats: {e}")
+    
+    async def _stats_loop(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            await self._refresh_stats()
+    
+    async def run_barebones(self, thread_id: str, prompt: str) -> Optional[str]:
+        """Start a new Goose session with barebones recipe on a worker"""
+        self.sessions[thread_id] = True
+        return await self._submit(thread_id, "barebones", {"prompt": prompt})
+    
+    async def run_initial(self, thread_id: str, prompt: str, use_help_recipe: bool = False) -> Optional[str]:
+        """Start a new Goose session with initial prompt on a worker"""
+        self.sessions[thread_id] = True
+        return await self._submit(thread_id, "initial", {"prompt": prompt, "use_help_recipe": use_help_recipe})
+    
+    async def ensure_session(self, thread_id: str):
+        """Track a thread as a session; the worker running its next turn creates the workspace"""
+        self.sessions[thread_id] = True
+    
+    async def run_with_history(self, thread_id: str, history: List[Dict]) -> Optional[str]:
+        """Continue a Goose session on the worker holding it"""
+        return await self._submit(thread_id, "history", {"history": history})
+    
+    async def prepare_turn(self, thread_id: str, history: List[Dict]) -> bool:
+        """Ask the worker holding a thread's session to get its next turn ready"""
+        try:
+            await asyncio.to_thread(self.queue.enqueue, thread_id, "prepare", {"history": history})
+        except Exception as e:
+            logger.error(f"Error queueing prepare for thread {thread_id}: {e}")
+            return False
+        return True
+    
+    async def _submit(self, thread_id: str, kind: str, payload: Dict) -> Optional[str]:
+        """Queue a job and wait for a worker to finish it"""
+        try:
+            job_id = await asyncio.to_thread(self.queue.enqueue, thread_id, kind, payload)
+        except Exception as e:
+            logger.error(f"Error queueing {kind} job: {e}")
+            return None
+        
+        logger.info(f"Queued {kind} job {job_id} for thread {thread_id}")
+        waiting = self._waiting.setdefault(thread_id, set())
+        waiting.add(job_id)
+        deadline = time.monotonic() + self.turn_timeout
+        try:
+            while True:
+                result = await asyncio.to_thread(self.queue.take_result, job_id)
+                if result is not None:
+                    return result.get("response")
+                if time.monotonic() > deadline:
+                    logger.error(f"Job {job_id} for thread {thread_id} was not finished within {self.turn_timeout:.0f}s")
+                    self.cancel(thread_id)
+                    return "🦆 *Tired honking* - That took too long, please try a simpler request!"
+                await asyncio.sleep(self.poll_interval)
+        finally:
+            waiting.discard(job_id)
+            if not waiting:
+                self._waiting.pop(thread_id, None)
+    
+    def cancel(self, thread_id: str) -> bool:
+        """Cancel queued and running turns for a thread, returning True if there were any"""
+        if not self.is_running(thread_id):
+            return False
+        
+        logger.info(f"Cancelling turns for thread {thread_id}")
+        asyncio.ensure_future(self._cancel_jobs(thread_id, len(self._waiting[thread_id])))
+        return True
+    
+    async def _cancel_jobs(self, thread_id: str, waiting: int):
+        try:
+            cancelled = await asyncio.to_thread(self.queue.cancel_queued, thread_id, {"response": CANCELLED_MESSAGE})
+            if cancelled < waiting:
+                # Some turns are already running; ask the worker holding them to stop
+                await asyncio.to_thread(self.queue.enqueue, thread_id, "cancel", {})
+        except Exception as e:
+            logger.error(f"Error cancelling turns for thread {thread_id}: {e}")
+    
+    def is_running(self, thread_id: str) -> bool:
+        """Check if a thread has a turn queued or running"""
+        return bool(self._waiting.get(thread_id))
+    
+    async def archive_transcript(self, thread_id: str, transcript: Dict):
+        """Ask the worker holding a thread's session to archive the conversation so far"""
+        try:
+            await asyncio.to_thread(self.queue.enqueue, thread_id, "archive", {"transcript": transcript})
+        except Exception as e:
+            logger.error(f"Error queueing archive for thread {thread_id}: {e}")
+    
+    async def cleanup_session(self, thread_id: str, transcript: Optional[Dict] = None):
+        """Ask the worker holding a thread's session to clean it up, archiving the transcript there"""
+        self.sessions.pop(thread_id, None)
+        try:
+            await asyncio.to_thread(self.queue.enqueue, thread_id, "cleanup", {"transcript": transcript} if transcript is not None else {})
+        except Exception as e:
+            logger.error(f"Error queueing cleanup for thread {thread_id}: {e}")
+    
+    def get_active_sessions(self) -> List[str]:
+        """Get list of session thread IDs started through this dispatcher"""
+        return list(self.sessions.keys())
+    
+    def get_metrics(self) -> Dict:
+        """Get runtime metrics for the stats surface"""
+        return {
+            'active_sessions': len(self.sessions),
+            'running_turns': sum(len(jobs) for jobs in self._waiting.values()),
+            'queue': self.queue_stats,
+            'memory': {
+                'sessions': account(self.sessions),
+                'waiting_turns': account(self._waiting),
+            },
+        }
+    
+    def readiness_state(self) -> Dict:
+        """Get the last polled queue stats for readiness probes"""
+        return {'queue': self.queue_stats}
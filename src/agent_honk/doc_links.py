@@ -0,0 +1,193 @@
+import os
+import re
+import logging
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DOC_EXTENSIONS = ('.md', '.mdx')
+
+# Markdown links first so their label can be kept when the URL is dropped
+MARKDOWN_LINK = re.compile(r'\[([^\]]*)\]\((https?://[^\s)]+)\)')
+BARE_URL = re.compile(r'(?<![(\w/])https?://[^\s<>)\]]+')
+# Docs pages linked as source files, e.g. github.com/block/goose/blob/main/documentation/docs/guides/tips.md
+GITHUB_DOC = re.compile(r'https?://github\.com/block/goose/(?:tree|blob)/[^/]+/documentation/(?:docs/)?(?P<path>[^\s#?)]+?)(?:\.mdx?)?/?(?P<anchor>#[^\s)]*)?$')
+NUMBER_PREFIX = re.compile(r'^\d+[-_]')
+FRONT_MATTER = re.compile(r'\A---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+
+UNVERIFIED_NOTE = " *(link not found in the docs)*"
+
+
+def _front_matter(path: str) -> Dict[str, str]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            head = f.read(4096)
+    except OSError:
+        return {}
+    match = FRONT_MATTER.match(head)
+    fields = {}
+    if match:
+        for line in match.group(1).splitlines():
+            key, _, value = line.partition(':')
+            if value.strip():
+                fields[key.strip()] = value.strip().strip('"\'')
+    if 'title' not in fields:
+        heading = re.search(r'^#\s+(.+)$', head, re.MULTILINE)
+        if heading:
+            fields['title'] = heading.group(1).strip()
+    return fields
+
+
+class DocLinkIndex:
+    """Valid documentation URLs, built from a local checkout of the docs
+
+    Every page under `docs_path` maps to `docs_url` plus its slug the way
+    Docusaurus builds it: the path without extension or number prefixes,
+    `index`/`README` pages standing for their directory, and a front matter
+    `slug:` winning over both. The list is written to a file the help recipe
+    reads, and links in responses are checked against it without fetching
+    anything: docs links given as GitHub source paths or with a `.md`
+    extension are rewritten to the page URL, and links to pages that don't
+    exist are unlinked or flagged.
+    """
+
+    def __init__(self, docs_path: str, docs_url: str, output_path: str):
+        self.docs_path = docs_path
+        self.docs_url = docs_url.rstrip('/') + '/'
+        self.output_path = output_path
+        self.pages: Dict[str, str] = {}  # slug (no leading or trailing slash) -> title
+        self.rewritten = 0
+        self.flagged = 0
+
+    @classmethod
+    def from_env(cls, default_output_path: str) -> "DocLinkIndex":
+        """Build an index of GOOSE_DOCS_PATH pages under GOOSE_DOCS_URL, written to GOOSE_DOC_LINKS_FILE"""
+        return cls(
+            os.path.expanduser(os.getenv('GOOSE_DOCS_PATH', '')),
+            os.getenv('GOOSE_DOCS_URL', 'https://block.github.io/goose/docs/'),
+            os.path.expanduser(os.getenv('GOOSE_DOC_LINKS_FILE', default_output_path)),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.pages)
+
+    def _docs_root(self) -> str:
+        # GOOSE_DOCS_PATH may point at the Docusaurus site rather than its docs/ folder
+        nested = os.path.join(self.docs_path, 'docs')
+        return nested if os.path.isdir(nested) else self.docs_path
+
+    def build(self) -> int:
+        """Scan the docs tree and write the link list, returning the number of pages"""
+        if not self.docs_path or not os.path.isdir(self.docs_path):
+            logger.warning(f"GOOSE_DOCS_PATH {self.docs_path!r} is not a directory, documentation links won't be checked")
+            self.pages = {}
+            self._write()
+            return 0
+
+        root = self._docs_root()
+        pages = {}
+        for directory, dirs, files in os.walk(root):
+            # Docusaurus skips files and folders starting with an underscore
+            dirs[:] = sorted(d for d in dirs if not d.startswith(('_', '.')))
+            for name in sorted(files):
+                stem, extension = os.path.splitext(name)
+                if extension not in DOC_EXTENSIONS or stem.startswith('_'):
+                    continue
+                path = os.path.join(directory, name)
+                relative_dir = os.path.relpath(directory, root)
+                parts = [] if relative_dir == '.' else [NUMBER_PREFIX.sub('', part) for part in relative_dir.split(os.sep)]
+                fields = _front_matter(path)
+                slug = fields.get('slug')
+                if slug:
+                    slug = slug.strip('/') if slug.startswith('/') else '/'.join(parts + [slug.strip('/')])
+                elif stem.lower() in ('index', 'readme'):
+                    slug = '/'.join(parts)
+                else:
+                    slug = '/'.join(parts + [NUMBER_PREFIX.sub('', stem)])
+                pages[slug] = fields.get('title') or slug or 'Documentation home'
+
+        self.pages = pages
+        self._write()
+        logger.info(f"Indexed {len(pages)} documentation page(s) from {root}")
+        return len(pages)
+
+    def _write(self):
+        if self.pages:
+            lines = [f"# Valid Goose documentation links ({len(self.pages)} pages); only link to these", ""]
+            lines += [f"{self.docs_url}{slug} - {title}" for slug, title in sorted(self.pages.items())]
+        else:
+            lines = ["# No documentation index is available; only use links given in your instructions"]
+        os.makedirs(os.path.dirname(self.output_path) or '.', exist_ok=True)
+        with open(f"{self.output_path}.tmp", 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(f"{self.output_path}.tmp", self.output_path)
+
+    def resolve(self, url: str) -> Tuple[Optional[str], bool]:
+        """Check a URL, returning (the URL to use, whether it is a docs link at all)
+
+        The returned URL is None for a docs link to a page that doesn't exist.
+        """
+        github = GITHUB_DOC.match(url)
+        if github:
+            # A source path, so number prefixes are still in it
+            slug = '/'.join(NUMBER_PREFIX.sub('', part) for part in github.group('path').split('/'))
+            anchor = github.group('anchor') or ''
+        elif url.startswith(self.docs_url) or url.rstrip('/') + '/' == self.docs_url:
+            rest = url[len(self.docs_url):] if url.startswith(self.docs_url) else ''
+            slug, hash_mark, anchor = rest.partition('#')
+            anchor = hash_mark + anchor
+            slug = slug.split('?', 1)[0]
+            slug = re.sub(r'\.mdx?$', '', slug)
+        else:
+            return url, False
+
+        slug = slug.strip('/')
+        slug = re.sub(r'/(index|README)$', '', slug)
+        if slug not in self.pages:
+            return None, True
+        trailing = '/' if url.split('#', 1)[0].endswith('/') and slug else ''
+        return f"{self.docs_url}{slug}{trailing}{anchor}", True
+
+    def clean(self, text: str) -> str:
+        """Rewrite fixable docs links in a response and unlink or flag broken ones"""
+        if not self.enabled:
+            return text
+
+        def markdown(match):
+            label, url = match.group(1), match.group(2)
+            resolved, is_docs = self.resolve(url)
+            if not is_docs or resolved == url:
+                return match.group(0)
+            if resolved is None:
+                self.flagged += 1
+                logger.info(f"Unlinked documentation link to a missing page: {url}")
+                return label
+            self.rewritten += 1
+            return f"[{label}]({resolved})"
+
+        def bare(match):
+            url = match.group(0)
+            trailing = ''
+            while url and url[-1] in '.,;:!?\'"*_':
+                url, trailing = url[:-1], url[-1] + trailing
+            resolved, is_docs = self.resolve(url)
+            if not is_docs or resolved == url:
+                return match.group(0)
+            if resolved is None:
+                self.flagged += 1
+                logger.info(f"Flagged documentation link to a missing page: {url}")
+                return url + UNVERIFIED_NOTE + trailing
+            self.rewritten += 1
+            return resolved + trailing
+
+        text = MARKDOWN_LINK.sub(markdown, text)
+        return BARE_URL.sub(bare, text)
+
+    def get_stats(self) -> Dict:
+        """Get the index size and how many links were fixed"""
+        return {
+            'pages': len(self.pages),
+            'rewritten': self.rewritten,
+            'flagged': self.flagged,
+        }
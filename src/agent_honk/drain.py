@@ -0,0 +1,266 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+import logging
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Kinds of journaled turns
+TURN_SESSION = "session"      # /session prompt, run with the barebones recipe
+TURN_ASSISTANT = "assistant"  # /assistant question, run with the help recipe
+TURN_THREAD = "thread"        # follow-up message in a thread, run with the thread history
+
+# A turn that was replayed this often without finishing probably crashes the bot
+MAX_REPLAYS = 2
+
+
+class TurnJournal:
+    """Turns that were accepted but not answered yet, persisted across restarts
+
+    Every turn is journaled when it is accepted and removed once it has been
+    answered, so whatever is left when the bot stops can be replayed by the
+    next instance.
+
+    Each instance writes its own `<name>.<instance>.json` and holds a lock on
+    it while it runs. During a rolling restart the old and new instance run
+    side by side; the new one only adopts the old one's journal once that
+    lock is released, i.e. once the old process has exited, so a turn is
+    never answered by both. Writes are coalesced and done in a thread.
+    """
+
+    def __init__(self, directory: str, name: str = "turn_journal", instance_id: Optional[str] = None):
+        self.directory = directory
+        self.name = name
+        self.path = os.path.join(directory, f"{name}.{instance_id or uuid.uuid4().hex[:8]}.json")
+        self.entries: Dict[str, Dict] = {}
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = _lock_journal(self.path, blocking=True)
+        self._dirty = False
+        self._saving: Optional[asyncio.Future] = None
+
+    def _write(self, data: str):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def _save(self):
+        self._dirty = True
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            # No event loop (e.g. tools and tests), nothing to block
+            self._dirty = False
+            self._write(json.dumps(self.entries))
+            return
+        if self._saving is None or self._saving.done():
+            self._saving = asyncio.ensure_future(self._flush_writes())
+
+    async def _flush_writes(self):
+        while self._dirty:
+            self._dirty = False
+            await asyncio.to_thread(self._write, json.dumps(self.entries))
+
+    async def flush(self):
+        """Wait until the journal file reflects every change"""
+        while self._saving is not None and not self._saving.done():
+            await self._saving
+
+    async def close(self):
+        """Write out pending changes and let a successor adopt whatever is left"""
+        await self.flush()
+        if not self.entries:
+            for path in (self.path, f"{self.path}.lock"):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    async def adopt(self) -> List[Tuple[str, Dict]]:
+        """Take over the journals of instances that have exited, returning their turns oldest first"""
+        entries, orphans = await asyncio.to_thread(self._collect_orphans)
+        if not orphans:
+            return []
+        self.entries.update(entries)
+        self._save()
+        await self.flush()
+        # The adopted turns are in our journal now
+        await asyncio.to_thread(self._remove_orphans, orphans)
+        return sorted(entries.items(), key=lambda item: item[1]['accepted_at'])
+
+    def _collect_orphans(self) -> Tuple[Dict[str, Dict], List]:
+        entries, orphans = {}, []
+        for file_name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, file_name)
+            # Instance journals, and `<name>.json` written before journals were per instance
+            instance, _, extension = file_name[len(self.name) + 1:].rpartition('.')
+            if not file_name.startswith(f"{self.name}.") or extension != 'json' or '.' in instance or path == self.path:
+                continue
+            lock_file = _lock_journal(path, blocking=False)
+            if lock_file is None:
+                continue  # its instance is still running
+            orphaned = _load_journal(path)
+            logger.info(f"Adopting {len(orphaned)} turn(s) from {path}")
+            entries.update(orphaned)
+            orphans.append((path, lock_file))
+        return entries, orphans
+
+    def _remove_orphans(self, orphans: List):
+        for path, lock_file in orphans:
+            for stale in (path, f"{path}.lock"):
+                try:
+                    os.remove(stale)
+                except FileNotFoundError:
+                    pass
+            lock_file.close()
+
+    def add(self, kind: str, thread_id: str, user_id: int, **payload) -> str:
+        """Journal an accepted turn, returning its id"""
+        turn_id = uuid.uuid4().hex[:12]
+        self.entries[turn_id] = {
+            'kind': kind,
+            'thread_id': thread_id,
+            'user_id': user_id,
+            'accepted_at': time.time(),
+            **payload,
+        }
+        self._save()
+        return turn_id
+
+    def remove(self, turn_id: str):
+        """Forget a turn once it has been answered"""
+        if self.entries.pop(turn_id, None) is not None:
+            self._save()
+
+    def mark_replayed(self, turn_id: str) -> bool:
+        """Count a replay of a turn, dropping it once it was replayed MAX_REPLAYS times
+
+        Returns whether the turn should be replayed.
+        """
+        entry = self.entries[turn_id]
+        if entry.get('replays', 0) >= MAX_REPLAYS:
+            logger.warning(f"Dropping journaled turn {turn_id} for thread {entry['thread_id']} after {MAX_REPLAYS} replays")
+            self.remove(turn_id)
+            return False
+        entry['replays'] = entry.get('replays', 0) + 1
+        self._save()
+        return True
+
+    def pending(self) -> List[Tuple[str, Dict]]:
+        """Get journaled turns, oldest first"""
+        return sorted(self.entries.items(), key=lambda item: item[1]['accepted_at'])
+
+
+def _lock_journal(path: str, blocking: bool):
+    """Lock the file next to a journal that says its instance is alive, or None if it is"""
+    lock_file = open(f"{path}.lock", 'a')
+    if fcntl is None:
+        # No way to tell whether the instance is alive; take the journal over
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def _load_journal(path: str) -> Dict[str, Dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable turn journal {path}: {e}")
+        return {}
+
+
+class DrainController:
+    """Tracks running turns so shutdown can let them finish up to a deadline
+
+    Once draining, new turns are only journaled. Turns still running at the
+    deadline are cancelled and stay in the journal for the next instance.
+    """
+
+    def __init__(self, journal: TurnJournal, timeout: float = 120.0, cancel_grace: float = 15.0):
+        self.journal = journal
+        self.timeout = timeout
+        self.cancel_grace = cancel_grace
+        self.draining = False
+        self.in_flight: Dict[str, str] = {}  # turn_id -> thread_id
+        self.interrupted: Set[str] = set()
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @classmethod
+    def from_env(cls, journal_dir: str, journal_name: str = "turn_journal") -> "DrainController":
+        """Build a controller from GOOSE_DRAIN_* environment variables"""
+        return cls(
+            TurnJournal(journal_dir, journal_name),
+            timeout=float(os.getenv('GOOSE_DRAIN_TIMEOUT', '120')),
+            cancel_grace=float(os.getenv('GOOSE_DRAIN_CANCEL_GRACE', '15')),
+        )
+
+    def begin(self, turn_id: str, thread_id: str):
+        """Mark a journaled turn as running"""
+        self.in_flight[turn_id] = thread_id
+        self._idle.clear()
+
+    def finish(self, turn_id: str):
+        """Mark a turn as done, dropping it from the journal unless a drain interrupted it"""
+        self.in_flight.pop(turn_id, None)
+        if turn_id in self.interrupted:
+            self.interrupted.discard(turn_id)
+        else:
+            self.journal.remove(turn_id)
+        if not self.in_flight:
+            self._idle.set()
+
+    def was_interrupted(self, turn_id: str) -> bool:
+        return turn_id in self.interrupted
+
+    async def drain(self, cancel: Callable[[str], bool]) -> int:
+        """Stop taking turns and wait for running ones, cancelling stragglers at the deadline
+
+        Returns the number of turns left in the journal for the next instance.
+        """
+        self.draining = True
+        logger.info(f"Draining {len(self.in_flight)} running turn(s), deadline {self.timeout:.0f}s")
+        if not await self._wait_idle(self.timeout):
+            for turn_id, thread_id in list(self.in_flight.items()):
+                self.interrupted.add(turn_id)
+                cancel(thread_id)
+            logger.warning(f"Drain deadline passed, interrupted {len(self.interrupted)} turn(s) for replay")
+            # Give cancelled runs a moment to kill and reap their process groups
+            await self._wait_idle(self.cancel_grace)
+        await self.journal.flush()
+        pending = len(self.journal.entries)
+        logger.info(f"Drain finished, {pending} turn(s) journaled for the next instance")
+        return pending
+
+    async def _wait_idle(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    def get_stats(self) -> Dict:
+        """Get drain state and journal size"""
+        return {
+            'draining': self.draining,
+            'running': len(self.in_flight),
+            'journaled': len(self.journal.entries),
+        }
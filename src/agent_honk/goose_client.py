@@ -5,49 +5,172 @@ import os
 import logging
 import shutil
 import re
-from typing import List, Dict, Optional
+import math
+import time
+from typing import List, Dict, Optional, Set, Tuple
+
+from .attachments import AttachmentStore
+from .circuit_breaker import BreakerRegistry, CircuitOpenError
+from .doc_links import DocLinkIndex
+from .hedging import HedgePolicy
+from .lanes import LaneFullError, LaneRouter
+from .latency import LatencyTracker
+from .memory import account
+from .output_capture import BoundedCapture, live_capture_usage, pump_stream
+from .paths import get_recipes_dir, get_state_dir
+from .process_utils import terminate_process_group, reap_process_group
+from .prompt_transport import TRANSPORT_RENDER, PromptTransport, format_command
+from .recipes import CACHE_COALESCE, Recipe, RecipeError, RecipeRegistry
+from .resource_limits import ResourceLimits, ResourceMonitor
+from .session_pool import SessionPool
+from .singleflight import SingleFlight
+from .state_store import MemoryStateStore, StateStore
+from .transcript_archive import TranscriptArchive, read_session_log
+from .workspace_template import WorkspaceTemplate
 
 logger = logging.getLogger(__name__)
 
+# Execution mode of plain `--text` turns; recipes declare their own modes.
+# Modes key per-mode latency statistics, lanes and circuit breakers.
+MODE_SESSION = "session"
+
+# Recipes behind the built-in commands
+BAREBONES_RECIPE = "goose_session"
+HELP_RECIPE = "goose_help"
+
+CANCELLED_MESSAGE = "🦆 *Hushed honking* - Okay, I stopped working on that one."
+
+
+class _AttemptResult:
+    """Outcome of a single goose process run"""
+    
+    def __init__(self, returncode: Optional[int], stdout: BoundedCapture, stderr: BoundedCapture, timed_out: bool):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+    
+    @property
+    def succeeded(self) -> bool:
+        return not self.timed_out and self.returncode == 0
+
 
 class GooseClient:
     """Client for interacting with Goose CLI"""
     
-    def __init__(self):
-        self.sessions = {}  # thread_id -> session_dir
+    def __init__(self, store: Optional[StateStore] = None):
+        store = store or MemoryStateStore()
+        # thread_id -> session_dir, shared with other shards when the store is
+        self.sessions = store.mapping('sessions')
         self.goose_command = os.getenv('GOOSE_COMMAND', 'goose')
         self.docs_path = os.getenv('GOOSE_DOCS_PATH', '')
+        self.latency = LatencyTracker.from_env()
+        self.lanes = LaneRouter.from_env()
+        self.hedging = HedgePolicy.from_env()
+        self.breakers = BreakerRegistry.from_env()
+        self.kill_grace = float(os.getenv('GOOSE_KILL_GRACE_SECONDS', '5'))
+        self.output_tail_bytes = int(os.getenv('GOOSE_OUTPUT_TAIL_BYTES', str(256 * 1024)))
+        self._turns: Dict[str, Set[asyncio.Task]] = {}  # thread_id -> running turn tasks
+        self.limits = ResourceLimits.from_env()
+        self.resources = ResourceMonitor(interval=float(os.getenv('GOOSE_USAGE_SAMPLE_SECONDS', '1')))
+        self.template = WorkspaceTemplate.from_env(get_recipes_dir())
+        self.pool = SessionPool.from_env(self.goose_command, self.template, self.limits)
+        # Valid docs links, listed for the help recipe and checked in responses without fetching
+        self.doc_links = DocLinkIndex.from_env(os.path.join(get_state_dir(), 'doc_links.txt'))
+        self.recipes = RecipeRegistry.from_env(get_recipes_dir(), runtime_params={'doc_links_file': self.doc_links.output_path})
+        self.prompts = PromptTransport.from_env()
+        self.recipe_flights = SingleFlight()  # coalesces identical in-flight runs of `cache: coalesce` recipes
+        self.attachments = AttachmentStore.from_env()
+        self.archive = TranscriptArchive.from_env()
+        self.prune_session_logs = os.getenv('TRANSCRIPT_PRUNE_SESSION_LOGS', '').lower() in ('1', 'true', 'yes')
+        # session_dir -> goose session logs written by its runs, archived with the transcript
+        self.session_logs = store.mapping('session_logs')
+        # Next turn set up while the user types: thread_id -> (messages the prefix covers, context prefix)
+        self.prefetch_lease = float(os.getenv('GOOSE_PREFETCH_LEASE_SECONDS', '15'))
+        self._prefixes: Dict[str, Tuple[List[Dict], str]] = {}
+        self.prepared_turns = 0
+        self.prefix_hits = 0
+    
+    async def start(self):
+        """Start background work such as pre-warming session workspaces"""
+        await asyncio.to_thread(self.doc_links.build)
+        if self.archive is not None:
+            await asyncio.to_thread(self.archive.load_stats)
+        await self.recipes.start()
+        await self.pool.start()
+    
+    async def close(self):
+        """Stop background work and release pre-warmed resources"""
+        await self.pool.close()
+        await self.resources.close()
+        await self.recipes.close()
+        await self.attachments.close()
+        self.template.close()
+        if self.archive is not None:
+            self.archive.close()
+    
+    async def _create_session_dir(self, thread_id: str) -> str:
+        """Get a workspace for a new session, from the warm pool when enabled"""
+        if self.pool.enabled:
+            session_dir = await self.pool.acquire(thread_id)
+        else:
+            session_dir = await asyncio.to_thread(self._new_workspace, thread_id)
+        self.sessions[thread_id] = session_dir
+        logger.info(f"Created session directory: {session_dir}")
+        return session_dir
+    
+    def _new_workspace(self, thread_id: str) -> str:
+        # Copies or links the template files, so it runs in a thread
+        session_dir = tempfile.mkdtemp(prefix=f"goose_session_{thread_id}_")
+        self.template.materialize(session_dir)
+        return session_dir
+    
+    async def ensure_session(self, thread_id: str) -> str:
+        """Get the session directory for a thread, creating a fresh one if it has none"""
+        return self.sessions.get(thread_id) or await self._create_session_dir(thread_id)
     
     async def run_barebones(self, thread_id: str, prompt: str) -> Optional[str]:
         """Start a new Goose session with barebones recipe (no tool calls)"""
+        return await self.run_recipe(thread_id, BAREBONES_RECIPE, prompt)
+    
+    async def run_initial(self, thread_id: str, prompt: str, use_help_recipe: bool = False) -> Optional[str]:
+        """Start a new Goose session with initial prompt"""
+        if use_help_recipe:
+            return await self.run_recipe(thread_id, HELP_RECIPE, prompt)
         try:
-            # Create a temporary directory for this session
-            session_dir = tempfile.mkdtemp(prefix=f"goose_session_{thread_id}_")
-            self.sessions[thread_id] = session_dir
-            logger.info(f"Created session directory: {session_dir}")
+            # Get a workspace directory for this session
+            session_dir = await self._create_session_dir(thread_id)
             
-            # Run goose with barebones recipe
-            result = await self._run_goose_command(session_dir, prompt, thread_id, is_initial=True, use_barebones=True)
+            # Run goose with the initial prompt
+            result = await self._run_turn(thread_id, self._run_goose_command(session_dir, prompt, thread_id))
             return result
             
         except Exception as e:
-            logger.error(f"Error in run_barebones: {e}")
+            logger.error(f"Error in run_initial: {e}")
             return None
     
-    async def run_initial(self, thread_id: str, prompt: str, use_help_recipe: bool = False) -> Optional[str]:
-        """Start a new Goose session with initial prompt"""
+    async def run_recipe(self, thread_id: str, name: str, prompt: str) -> Optional[str]:
+        """Start a new Goose session by running a recipe from the registry on the user's prompt"""
         try:
-            # Create a temporary directory for this session
-            session_dir = tempfile.mkdtemp(prefix=f"goose_session_{thread_id}_")
-            self.sessions[thread_id] = session_dir
-            logger.info(f"Created session directory: {session_dir}")
+            recipe = self.recipes.get(name)
             
-            # Run goose with the initial prompt
-            result = await self._run_goose_command(session_dir, prompt, thread_id, is_initial=True, use_help_recipe=use_help_recipe)
+            # Get a workspace directory for this session
+            session_dir = await self._create_session_dir(thread_id)
+            
+            if recipe.cache == CACHE_COALESCE:
+                # Identical prompts asked at the same time share a single run
+                key = f"{recipe.name}:{recipe.version}:{self._normalize_question(prompt)}"
+                run = self.recipe_flights.do(key, lambda: self._run_shared(session_dir, prompt, thread_id, recipe))
+            else:
+                run = self._run_goose_command(session_dir, prompt, thread_id, recipe=recipe)
+            result = await self._run_turn(thread_id, run)
             return result
             
+        except RecipeError as e:
+            logger.error(str(e))
+            return "🦆 *Confused honking* - That kind of request isn't available right now, please try again later!"
         except Exception as e:
-            logger.error(f"Error in run_initial: {e}")
+            logger.error(f"Error running recipe {name}: {e}")
             return None
     
     async def run_with_history(self, thread_id: str, history: List[Dict]) -> Optional[str]:
@@ -58,129 +181,139 @@ class GooseClient:
                 logger.warning(f"Session not found for thread {thread_id}")
                 return "🦆 Session not found. Please start a new session with `/session` or `/assistant`"
             
+            # Attachments are saved in the workspace and referenced rather than inlined
+            history = await self.attachments.add_references(session_dir, history)
+            
             # Get the latest user message
             user_messages = [msg for msg in history if msg["role"] == "user"]
             if not user_messages:
                 logger.warning("No user messages found in history")
                 return None
                 
-            latest_message = user_messages[-1]["content"]
+            latest_message = self._message_text(user_messages[-1])
             logger.info(f"Processing message: {latest_message[:50]}...")
             
             # Build context from conversation history
-            context_prompt = self._build_context_prompt(history, latest_message)
+            context_prompt = self._build_context_prompt(history, latest_message, thread_id)
             
             # Run goose with the context-aware prompt
-            result = await self._run_goose_command(session_dir, context_prompt, thread_id, use_help_recipe=False)
+            result = await self._run_turn(thread_id, self._run_goose_command(session_dir, context_prompt, thread_id))
             return result
             
         except Exception as e:
             logger.error(f"Error in run_with_history: {e}")
             return None
     
-    async def _run_goose_command(self, session_dir: str, prompt: str, thread_id: str = None, is_initial: bool = False, use_help_recipe: bool = False, use_barebones: bool = False) -> Optional[str]:
-        """Execute goose run command and return the response"""
+    async def prepare_turn(self, thread_id: str, history: List[Dict]) -> bool:
+        """Get the next turn of a thread ready while its user is still typing
+        
+        Attachments in the history are fetched, the context prefix the next
+        prompt starts with is built, and an idle Goose process is reserved in
+        the workspace for a short lease. Returns False if there was nothing to do.
+        """
+        session_dir = self.sessions.get(thread_id)
+        if not session_dir or self.is_running(thread_id):
+            return False
+        try:
+            history = await self.attachments.add_references(session_dir, history)
+            # The message being typed will be the latest, so the prefix covers what came before it
+            earlier = history[-5:]
+            self._prefixes[thread_id] = (earlier, self._render_context_prefix(earlier))
+            if self.prefetch_lease > 0:
+                await self.pool.reserve(session_dir, self.prefetch_lease)
+            self.prepared_turns += 1
+            return True
+        except Exception as e:
+            logger.error(f"Error preparing turn for thread {thread_id}: {e}")
+            return False
+    
+    def _normalize_question(self, question: str) -> str:
+        """Normalize a question so trivially different phrasings coalesce"""
+        return " ".join(question.casefold().split()).rstrip("?!. ")
+    
+    async def _run_turn(self, thread_id: str, coro) -> Optional[str]:
+        """Run a turn as its own task so it can be cancelled via cancel()"""
+        task = asyncio.ensure_future(coro)
+        turns = self._turns.setdefault(thread_id, set())
+        turns.add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            # Propagate if we are being cancelled ourselves (e.g. shutdown)
+            current = asyncio.current_task()
+            if current is not None and current.cancelling():
+                raise
+            logger.info(f"Turn cancelled for thread {thread_id}")
+            return CANCELLED_MESSAGE
+        finally:
+            turns.discard(task)
+            if not turns:
+                self._turns.pop(thread_id, None)
+    
+    def cancel(self, thread_id: str) -> bool:
+        """Cancel any running turns for a thread, returning True if one was running"""
+        tasks = [task for task in self._turns.get(thread_id, ()) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            logger.info(f"Cancelling {len(tasks)} running turn(s) for thread {thread_id}")
+        return bool(tasks)
+    
+    def is_running(self, thread_id: str) -> bool:
+        """Check if a thread has a turn in progress"""
+        return any(not task.done() for task in self._turns.get(thread_id, ()))
+    
+    async def _run_shared(self, session_dir: str, prompt: str, thread_id: str, recipe: Recipe) -> Optional[str]:
+        """Run a recipe for several threads at once, keeping its prompt file out of the first thread's workspace
+        
+        That thread may be cleaned up while the others are still waiting for the answer.
+        """
+        prompt_dir = await asyncio.to_thread(tempfile.mkdtemp, prefix="goose_shared_run_")
+        try:
+            return await self._run_goose_command(session_dir, prompt, thread_id, recipe=recipe, prompt_dir=prompt_dir)
+        finally:
+            await asyncio.to_thread(shutil.rmtree, prompt_dir, True)
+    
+    async def _run_goose_command(self, session_dir: str, prompt: str, thread_id: str = None, recipe: Optional[Recipe] = None, prompt_dir: Optional[str] = None) -> Optional[str]:
+        """Execute goose run command and return the response
+        
+        Prompts too large for the command line are staged in `prompt_dir`, the session directory by default.
+        """
         try:
             logger.info(f"Running goose command in {session_dir}")
-            recipes = "recipes"
-            
-            # Build goose command arguments
-            if use_help_recipe:
-                # Use the recipe for help sessions with parameters
-                recipe_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), f"{recipes}/goose_help.yaml")
-                docs_path = os.getenv('GOOSE_DOCS_PATH', '/Users/dkatz/git/goose/documentation')
-                docs_url = os.getenv('GOOSE_DOCS_URL', 'https://block.github.io/goose/docs/')
-                source_path = os.getenv('GOOSE_SOURCE_PATH', '/Users/dkatz/git/goose')
-                
-                # Log the parameters being used
-                logger.info(f"Help recipe parameters:")
-                logger.info(f"  docs_path: {docs_path}")
-                logger.info(f"  docs_url: {docs_url}")
-                logger.info(f"  source_path: {source_path}")
-                logger.info(f"  user_question: {prompt[:100]}...")
-                
-                # Let Goose manage its own session directory by not specifying cwd
-                # and not using --no-session so it creates a default session
-                cmd_args = [
-                    self.goose_command, 'run', 
-                    '--recipe', recipe_path,
-                    '--params', f'docs_path={docs_path}',
-                    '--params', f'docs_url={docs_url}',
-                    '--params', f'source_path={source_path}',
-                    '--params', f'user_question={prompt}'
-                    # No --session flag, let Goose create a default session
-                ]
-                
-                # Log the full command being executed
-                logger.info(f"Executing command: {' '.join(cmd_args)}")
-                
-                # Run goose command without specifying cwd so it uses default session location
-                process = await asyncio.create_subprocess_exec(
-                    *cmd_args,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                    # No cwd specified - let Goose use its default session directory
-                )
-                
-            elif use_barebones:
-                # Use barebones recipe (no tool calls) with parameters
-                recipe_path = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), f"{recipes}/goose_session.yaml")
-                cmd_args = [
-                    self.goose_command, 'run',
-                    '--recipe', recipe_path,
-                    '--params', f'user_prompt={prompt}',
-                    '--no-session'
-                ]
-                
-                # Run goose command
-                process = await asyncio.create_subprocess_exec(
-                    *cmd_args,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=session_dir
-                )
+            
+            if recipe is not None:
+                mode = recipe.mode
+                cwd = session_dir if recipe.workspace else None
+                session_log = not recipe.streaming
+                # Recipes that can be rendered locally run the same in an idle `goose run -i -`
+                idle_prompt = recipe.render(prompt) if recipe.workspace and recipe.prompt_transport == TRANSPORT_RENDER else None
+                logger.info(f"Running recipe {recipe.name} (version {recipe.version}) with prompt: {prompt[:100]}...")
             else:
-                # Regular session
-                cmd_args = [self.goose_command, 'run', '--text', prompt, '--no-session']
-                
-                # Run goose command
-                process = await asyncio.create_subprocess_exec(
-                    *cmd_args,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
-                    cwd=session_dir
-                )
-            
-            # Set a timeout for the process
+                mode = MODE_SESSION
+                cwd = session_dir
+                session_log = False
+                idle_prompt = prompt
+            
+            # Fail fast while this mode is failing, otherwise wait for a slot
+            # in its lane and run goose
+            breaker = self.breakers.for_mode(mode)
+            lane = self.lanes.for_mode(mode, preferred=recipe.lane if recipe else None)
+            ceiling = min(lane.timeout, recipe.timeout) if recipe and recipe.timeout else lane.timeout
             try:
-                stdout, stderr = await asyncio.wait_for(
-                    process.communicate(), 
-                    timeout=300  # 5 minute timeout
-                )
-            except asyncio.TimeoutError:
-                process.kill()
-                logger.error("Goose command timed out")
-                return "🦆 *Tired honking* - That took too long, please try a simpler request!"
-            
-            if process.returncode == 0:
-                response = stdout.decode('utf-8').strip()
-                
-                if use_help_recipe:
-                    # Try to extract session path from stdout and get clean response
-                    jsonl_response = self._extract_from_stdout_session_path(response)
-                    if jsonl_response:
-                        logger.info(f"Using JSONL response from session path, length: {len(jsonl_response)}")
-                        return self._clean_response(jsonl_response)
-                
-                # Fallback to stdout parsing
-                logger.info(f"Fallback to stdout response, length: {len(response)}")
-                return self._clean_response(response)
-            else:
-                error_msg = stderr.decode('utf-8').strip()
-                logger.error(f"Goose command failed with return code {process.returncode}")
-                logger.error(f"Stderr: {error_msg}")
-                logger.error(f"Stdout: {stdout.decode('utf-8').strip()}")
-                return f"🦆 *Error honking* - Goose encountered an issue: {error_msg[:500]}..."
+                with breaker.guard() as call:
+                    async with lane.slot():
+                        timeout = self.latency.timeout_for(mode, ceiling=ceiling)
+                        # Build goose command arguments; large prompts go through a file
+                        with self.prompts.command(self.goose_command, prompt, prompt_dir or session_dir, recipe) as cmd_args:
+                            logger.debug(f"Executing command: {format_command(cmd_args)}")
+                            return await self._execute(mode, cmd_args, cwd, session_dir, idle_prompt, timeout, call=call, session_log=session_log)
+            except CircuitOpenError as e:
+                logger.warning(str(e))
+                return f"🦆 *Grounded honking* - Goose is having trouble reaching its model right now, so I'm resting my wings. Please try again in about {math.ceil(e.retry_after)}s."
+            except LaneFullError as e:
+                logger.warning(str(e))
+                return "🦆 *Crowded honking* - I'm juggling too many requests right now, please try again in a minute!"
                 
         except FileNotFoundError:
             logger.error(f"Goose command not found: {self.goose_command}")
@@ -189,25 +322,196 @@ class GooseClient:
             logger.error(f"Error running goose command: {e}")
             return f"🦆 *Panicked honking* - Something went wrong: {str(e)[:100]}..."
     
-    def _build_context_prompt(self, history: List[Dict], latest_message: str) -> str:
+    async def _execute(self, mode: str, cmd_args: List[str], cwd: Optional[str], session_dir: str, idle_prompt: Optional[str], timeout: float, call=None, session_log: bool = False) -> str:
+        """Run goose with a timeout, hedging slow runs, and turn its output into a response
+
+        With session_log, the answer is read from the session log goose reports
+        in its output rather than from stdout. `idle_prompt` is what to give an
+        idle process pre-started in the workspace instead, if the run can use one.
+        """
+        deadline = time.monotonic() + timeout
+        primary = asyncio.ensure_future(self._attempt(mode, cmd_args, cwd, timeout, session_dir=session_dir, idle_prompt=idle_prompt, session_log=session_log))
+        attempts = [primary]
+        hedged = False
+        try:
+            threshold = self.hedging.threshold(mode, self.latency)
+            if threshold is not None and threshold < timeout:
+                done, _ = await asyncio.wait(attempts, timeout=threshold)
+                if not done and self.hedging.try_acquire():
+                    hedged = True
+                    logger.info(f"Goose run passed {threshold:.1f}s ({mode} mode), launching a hedged attempt")
+                    remaining = max(0.0, deadline - time.monotonic())
+                    attempts.append(asyncio.ensure_future(self._attempt(mode, cmd_args, cwd, remaining, env=self.hedging.env_overrides, session_log=session_log)))
+            
+            # The first successful attempt wins; otherwise report the primary's failure
+            pending = set(attempts)
+            winner = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.result().succeeded:
+                        winner = attempt
+                        break
+            if winner is None:
+                winner = primary
+        finally:
+            # Cancelling a losing attempt terminates its whole process group
+            for attempt in attempts:
+                if not attempt.done():
+                    attempt.cancel()
+            if hedged:
+                self.hedging.release()
+            await asyncio.gather(*attempts, return_exceptions=True)
+        
+        self.hedging.record_run(hedged=hedged)
+        if winner is not primary:
+            self.hedging.won += 1
+            logger.info(f"Hedged attempt won ({mode} mode)")
+        
+        result = winner.result()
+        if self.archive is not None and result.stdout.session_path:
+            logs = self.session_logs.get(session_dir, [])
+            self.session_logs[session_dir] = logs + [result.stdout.session_path]
+        if call is not None:
+            # Let the circuit breaker know whether this mode is healthy
+            if result.succeeded:
+                call.success()
+            else:
+                call.failure()
+        
+        if result.timed_out:
+            logger.error(f"Goose command timed out after {timeout:.0f}s ({mode} mode)")
+            return "🦆 *Tired honking* - That took too long, please try a simpler request!"
+        
+        stdout_capture, stderr_capture = result.stdout, result.stderr
+        if stdout_capture.truncated:
+            logger.warning(f"Goose printed {stdout_capture.total_bytes} bytes, kept the last {self.output_tail_bytes}")
+        
+        if result.succeeded:
+            response = stdout_capture.text().strip()
+            
+            if session_log and stdout_capture.session_path:
+                # Get the clean response from the session log found in stdout
+                jsonl_response = self._read_session_jsonl(stdout_capture.session_path)
+                if jsonl_response:
+                    logger.info(f"Using JSONL response from session path, length: {len(jsonl_response)}")
+                    return self._clean_response(jsonl_response)
+            
+            # Fallback to stdout parsing
+            logger.info(f"Fallback to stdout response, length: {len(response)}")
+            return self._clean_response(response)
+        else:
+            error_msg = stderr_capture.text().strip()
+            logger.error(f"Goose command failed with return code {result.returncode}")
+            logger.error(f"Stderr: {error_msg}")
+            logger.error(f"Stdout: {stdout_capture.text().strip()}")
+            return f"🦆 *Error honking* - Goose encountered an issue: {error_msg[:500]}..."
+    
+    async def _attempt(self, mode: str, cmd_args: List[str], cwd: Optional[str], timeout: float, session_dir: Optional[str] = None, idle_prompt: Optional[str] = None, env: Optional[Dict[str, str]] = None, session_log: bool = False) -> "_AttemptResult":
+        """Spawn one goose process and wait for it to exit or time out"""
+        # Follow-ups and tool-less recipes can use an idle goose process pre-started in the workspace
+        process = None
+        if idle_prompt is not None and session_dir and not env:
+            process = await self._use_idle_process(session_dir, idle_prompt)
+        
+        if process is None:
+            # Run goose in its own process group so tool processes it spawns
+            # can be terminated along with it
+            process = await asyncio.create_subprocess_exec(
+                *self.limits.wrap_command(cmd_args),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=cwd,
+                env={**os.environ, **env} if env else None,
+                start_new_session=True
+            )
+        self.resources.watch(process.pid)
+        
+        # Stream output into bounded captures instead of buffering it all
+        stdout_capture = BoundedCapture(self.output_tail_bytes, scan_session_path=session_log or self.archive is not None)
+        stderr_capture = BoundedCapture(self.output_tail_bytes)
+        
+        started = time.monotonic()
+        timed_out = False
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(
+                    pump_stream(process.stdout, stdout_capture),
+                    pump_stream(process.stderr, stderr_capture),
+                    process.wait()
+                ),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            await terminate_process_group(process, grace=self.kill_grace)
+            timed_out = True
+        except asyncio.CancelledError:
+            await terminate_process_group(process, grace=self.kill_grace)
+            raise
+        finally:
+            if process.returncode is not None:
+                reap_process_group(process)
+            usage = self.resources.unwatch(process.pid, mode)
+            if usage is not None:
+                logger.info(f"Goose process group {process.pid} peaked at {usage.peak_rss_bytes // (1024 * 1024)} MB RSS, {usage.peak_processes} process(es), {usage.cpu_seconds:.1f}s CPU")
+        
+        result = _AttemptResult(process.returncode, stdout_capture, stderr_capture, timed_out)
+        if result.succeeded:
+            self.latency.record(mode, time.monotonic() - started)
+        elif timed_out:
+            # The run took at least this long; leaving it out would keep the timeout from ever growing
+            self.latency.record(mode, timeout)
+        return result
+    
+    async def _use_idle_process(self, session_dir: str, prompt: str) -> Optional[asyncio.subprocess.Process]:
+        """Hand a prompt to an idle `goose run -i -` process waiting in the workspace"""
+        process = self.pool.take_process(session_dir)
+        if process is None:
+            return None
+        try:
+            process.stdin.write(prompt.encode('utf-8'))
+            await process.stdin.drain()
+            process.stdin.close()
+        except (BrokenPipeError, ConnectionResetError) as e:
+            logger.warning(f"Pre-started goose process was not usable: {e}")
+            await terminate_process_group(process, grace=self.kill_grace)
+            return None
+        logger.info(f"Using pre-started goose process {process.pid} in {session_dir}")
+        return process
+    
+    def _build_context_prompt(self, history: List[Dict], latest_message: str, thread_id: Optional[str] = None) -> str:
         """Build a context-aware prompt from conversation history"""
         # Get the last few messages for context (limit to avoid token limits)
         recent_history = history[-6:]  # Last 6 messages (3 exchanges)
+        earlier = recent_history[:-1]  # Exclude the latest message
         
-        context_parts = ["Here's our conversation so far:\n"]
-        
-        for msg in recent_history[:-1]:  # Exclude the latest message
-            role = "User" if msg["role"] == "user" else "Assistant"
-            content = msg["content"][:200]  # Truncate long messages
-            context_parts.append(f"{role}: {content}")
+        # Use the prefix built while the user was typing if the conversation hasn't moved on since
+        prepared = self._prefixes.pop(thread_id, None) if thread_id is not None else None
+        if prepared is not None and prepared[0] == earlier:
+            self.prefix_hits += 1
+            prefix = prepared[1]
+        else:
+            prefix = self._render_context_prefix(earlier)
         
-        context_parts.extend([
+        return "\n".join([
+            prefix,
             "\nNow please respond to this new message:",
             f"User: {latest_message}"
         ])
-        
+    
+    def _render_context_prefix(self, messages: List[Dict]) -> str:
+        context_parts = ["Here's our conversation so far:\n"]
+        for msg in messages:
+            role = "User" if msg["role"] == "user" else "Assistant"
+            content = self._message_text(msg, limit=200)  # Truncate long messages
+            context_parts.append(f"{role}: {content}")
         return "\n".join(context_parts)
     
+    def _message_text(self, msg: Dict, limit: Optional[int] = None) -> str:
+        """Get a message's text followed by its attachment references, which are never truncated"""
+        content = msg["content"][:limit] if limit is not None else msg["content"]
+        return "\n".join([content] + msg.get("references", [])).strip()
+    
     def _extract_final_response_from_jsonl(self, session_dir: str) -> Optional[str]:
         """Extract the final assistant response from the session JSONL file"""
         try:
@@ -392,23 +696,19 @@ class GooseClient:
 
     def _extract_from_stdout_session_path(self, stdout_response: str) -> Optional[str]:
         """Extract the final assistant response by parsing the session path from stdout"""
+        # Look for the logging path in stdout
+        # Pattern: "logging to /path/to/session.jsonl"
+        logger.info("Searching for session path in stdout...")
+        match = re.search(r'logging to ([^\s]+\.jsonl)', stdout_response)
+        if not match:
+            logger.warning("No session path found in stdout")
+            return None
+        return self._read_session_jsonl(match.group(1))
+
+    def _read_session_jsonl(self, jsonl_path: str) -> Optional[str]:
+        """Extract the final assistant response from a Goose session JSONL file"""
         try:
-            # Look for the logging path in stdout
-            # Pattern: "logging to /path/to/session.jsonl"
-            import re
-            
-            logger.info("Searching for session path in stdout...")
-            
-            # Regex to find the logging path
-            session_path_pattern = r'logging to ([^\s]+\.jsonl)'
-            match = re.search(session_path_pattern, stdout_response)
-            
-            if not match:
-                logger.warning("No session path found in stdout")
-                return None
-            
-            jsonl_path = match.group(1)
-            logger.info(f"Found session JSONL path: {jsonl_path}")
+            logger.info(f"Reading session data from: {jsonl_path}")
             
             # Check if the file exists
             if not os.path.exists(jsonl_path):
@@ -457,7 +757,7 @@ class GooseClient:
                 return None
                 
         except Exception as e:
-            logger.error(f"Error extracting from stdout session path: {e}")
+            logger.error(f"Error reading session JSONL file: {e}")
             return None
 
     def _clean_response(self, response: str) -> str:
@@ -470,24 +770,126 @@ class GooseClient:
         # Basic cleanup - just trim whitespace
         result = result.strip()
         
+        # Fix up documentation links against the local docs tree
+        result = self.doc_links.clean(result)
+        
         # If still empty, provide a default response
         if not result:
             result = "🦆 *Thoughtful honking* - I processed your request, but don't have a specific response."
         
         return result
     
-    def cleanup_session(self, thread_id: str):
-        """Clean up a session directory"""
+    async def cleanup_session(self, thread_id: str, transcript: Optional[Dict] = None):
+        """Clean up a session directory, archiving the conversation first if a transcript is given
+
+        The transcript holds the thread's `user_id` and its Discord `messages`;
+        the Goose session logs written for the session are added to it.
+        Archiving and removing the directory run in a thread, off the event loop.
+        """
         session_dir = self.sessions.get(thread_id)
+        self._prefixes.pop(thread_id, None)
+        if transcript is not None:
+            await self.archive_transcript(thread_id, transcript)
+        if session_dir:
+            self.pool.discard(session_dir)
+            self.session_logs.pop(session_dir, None)
+            self.attachments.forget(session_dir)
         if session_dir and os.path.exists(session_dir):
             try:
-                shutil.rmtree(session_dir)
+                await asyncio.to_thread(shutil.rmtree, session_dir)
                 logger.info(f"Cleaned up session directory: {session_dir}")
             except Exception as e:
                 logger.error(f"Error cleaning up session directory: {e}")
             finally:
                 self.sessions.pop(thread_id, None)
     
+    async def archive_transcript(self, thread_id: str, transcript: Dict):
+        """Archive a thread's conversation so far, keeping its session
+        
+        Session logs already archived are left out of later transcripts of the
+        same thread.
+        """
+        if self.archive is None:
+            return
+        session_dir = self.sessions.get(thread_id)
+        log_paths = list(self.session_logs.get(session_dir, [])) if session_dir else []
+        await asyncio.to_thread(self._archive_transcript, thread_id, log_paths, transcript)
+        if session_dir in self.session_logs:
+            # Keep logs of runs that finished while archiving for the next transcript
+            self.session_logs[session_dir] = self.session_logs[session_dir][len(log_paths):]
+    
+    def _archive_transcript(self, thread_id: str, log_paths: List[str], transcript: Dict):
+        session_logs = [log for log in map(read_session_log, log_paths) if log is not None]
+        if not transcript.get('messages') and not session_logs:
+            return
+        try:
+            self.archive.append(thread_id, transcript.get('user_id'), {
+                'messages': transcript.get('messages', []),
+                'session_logs': session_logs,
+            })
+        except Exception as e:
+            logger.error(f"Error archiving transcript of thread {thread_id}: {e}")
+            return
+        if self.prune_session_logs:
+            # The archive now holds the only copy
+            for log in session_logs:
+                try:
+                    os.remove(log['path'])
+                except OSError as e:
+                    logger.warning(f"Couldn't remove archived session log {log['path']}: {e}")
+    
     def get_active_sessions(self) -> List[str]:
         """Get list of active session thread IDs"""
         return list(self.sessions.keys())
+    
+    def memory_usage(self) -> Dict[str, Dict]:
+        """Count entries and approximate bytes of the structures that grow with use"""
+        return {
+            'sessions': account(self.sessions),
+            'session_logs': account(self.session_logs),
+            'running_turns': account(self._turns),
+            'latency_samples': account(self.latency.samples),
+            'coalescing': account(self.recipe_flights.in_flight),
+            'warm_pool': account(self.pool.ready),
+            'idle_processes': account(self.pool.idle_processes),
+            'usage_history': account(self.resources.by_mode),
+            'attachment_locks': account(self.attachments._locks),
+            'context_prefixes': account(self._prefixes),
+            'doc_links': account(self.doc_links.pages),
+            'output_buffers': live_capture_usage(),
+        }
+    
+    def get_metrics(self) -> Dict:
+        """Get runtime metrics for the stats surface"""
+        return {
+            'active_sessions': len(self.sessions),
+            'running_turns': sum(len(turns) for turns in self._turns.values()),
+            'latency': self.latency.get_stats(),
+            'lanes': self.lanes.get_stats(),
+            'pool': self.pool.get_stats(),
+            'prefetch': {
+                'prepared': self.prepared_turns,
+                'prefix_hits': self.prefix_hits,
+            },
+            'coalescing': self.recipe_flights.get_stats(),
+            'recipes': self.recipes.get_stats(),
+            'prompt_transport': self.prompts.get_stats(),
+            'workspace_template': self.template.get_stats(),
+            'attachments': self.attachments.get_stats(),
+            'doc_links': self.doc_links.get_stats(),
+            'transcripts': self.archive.get_stats() if self.archive is not None else None,
+            'hedging': self.hedging.get_stats(),
+            'breakers': self.breakers.get_stats(),
+            'resources': {
+                'limits': self.limits.describe(),
+                'usage': self.resources.get_stats(),
+            },
+            'memory': self.memory_usage(),
+        }
+    
+    def readiness_state(self) -> Dict:
+        """Get just the breaker states and lane load, cheap enough to read on every readiness probe"""
+        return {
+            'breakers': {mode: breaker.state for mode, breaker in self.breakers.breakers.items()},
+            'lanes': self.lanes.get_stats(),
+        }
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import threading
+import concurrent.futures
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class HealthChecker:
+    """Decides whether the bot is alive and whether it is ready for traffic
+
+    Liveness fails when the gateway is closed or has been disconnected for
+    longer than `disconnect_grace` (discord.py reconnects on its own before
+    that), or the event loop is stalled. Readiness additionally requires a
+    ready gateway, no drain in progress, Goose being usable (not every circuit
+    open, live workers in queue mode) and no saturated lane.
+
+    Liveness only reads plain attributes and the watchdog's last tick, so it
+    is safe to call from the health server thread while the loop is stuck.
+    """
+
+    def __init__(self, bot, disconnect_grace: float = 120.0):
+        self.bot = bot
+        self.disconnect_grace = disconnect_grace
+
+    def _gateway_checks(self) -> Dict[str, bool]:
+        disconnected_at = getattr(self.bot, 'disconnected_at', None)
+        watchdog = getattr(self.bot, 'watchdog', None)
+        return {
+            'gateway_open': not self.bot.is_closed(),
+            'gateway_connected': disconnected_at is None or time.monotonic() - disconnected_at < self.disconnect_grace,
+            'loop_responsive': watchdog is None or not watchdog.stalled,
+        }
+
+    def liveness(self) -> Tuple[bool, Dict]:
+        """Check whether the process should be restarted"""
+        checks = self._gateway_checks()
+        return all(checks.values()), {'checks': checks}
+
+    def readiness(self) -> Tuple[bool, Dict]:
+        """Check whether the bot can take new turns right now"""
+        checks = self._gateway_checks()
+        checks['gateway_ready'] = self.bot.is_ready()
+        checks['not_draining'] = not self.bot.drain.draining
+
+        state = self.bot.goose_client.readiness_state()
+        breakers = state.get('breakers', {})
+        open_modes = [mode for mode, breaker_state in breakers.items() if breaker_state == 'open']
+        checks['goose_available'] = not breakers or len(open_modes) < len(breakers)
+        if 'queue' in state:
+            checks['workers_alive'] = state['queue']['live_workers'] > 0
+
+        saturated = [
+            name for name, lane in state.get('lanes', {}).items()
+            if lane['active'] >= lane['concurrency'] and lane['waiting'] >= lane['max_queue']
+        ]
+        checks['lanes_available'] = not saturated
+
+        details = {'checks': checks, 'open_circuits': open_modes, 'saturated_lanes': saturated}
+        if 'queue' in state:
+            details['queue'] = state['queue']
+        return all(checks.values()), details
+
+
+class HealthServer:
+    """Serves /healthz and /readyz for an orchestrator
+
+    Requests are answered from a thread of their own, so a stalled event loop
+    still gets a failing /healthz instead of a probe that hangs. /readyz runs
+    its checks on the loop and counts a loop that doesn't get to them within
+    `loop_timeout` seconds as not ready.
+    """
+
+    def __init__(self, checker: HealthChecker, host: str = '0.0.0.0', port: int = 8080, loop_timeout: float = 2.0):
+        self.checker = checker
+        self.host = host
+        self.port = port
+        self.loop_timeout = loop_timeout
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls, bot) -> Optional["HealthServer"]:
+        """Build a server if HEALTH_PORT is set (HEALTH_HOST, HEALTH_DISCONNECT_GRACE, HEALTH_LOOP_TIMEOUT optional)"""
+        if not os.getenv('HEALTH_PORT'):
+            return None
+        checker = HealthChecker(bot, disconnect_grace=float(os.getenv('HEALTH_DISCONNECT_GRACE', '120')))
+        return cls(
+            checker,
+            host=os.getenv('HEALTH_HOST', '0.0.0.0'),
+            port=int(os.getenv('HEALTH_PORT')),
+            loop_timeout=float(os.getenv('HEALTH_LOOP_TIMEOUT', '2')),
+        )
+
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._server = ThreadingHTTPServer((self.host, self.port), _HealthHandler)
+        self._server.daemon_threads = True
+        self._server.health = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="health-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving health checks on {self.host}:{self.port}")
+
+    async def close(self):
+        if self._server is not None:
+            await asyncio.to_thread(self._server.shutdown)
+            self._server.server_close()
+            self._server = None
+            self._thread = None
+
+    def respond(self, path: str) -> Tuple[int, Dict]:
+        """Run the checks for a probe path, called from the server thread"""
+        if path == '/healthz':
+            ok, details = self.checker.liveness()
+        elif path == '/readyz':
+            ok, details = self._readiness()
+        else:
+            return 404, {'error': 'not found'}
+        return (200 if ok else 503), details
+
+    def _readiness(self) -> Tuple[bool, Dict]:
+        future = asyncio.run_coroutine_threadsafe(self._check_readiness(), self._loop)
+        try:
+            return future.result(self.loop_timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            return False, {'checks': {'loop_responsive': False}}
+
+    async def _check_readiness(self) -> Tuple[bool, Dict]:
+        return self.checker.readiness()
+
+
+class _HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        status, details = self.server.health.respond(self.path.split('?', 1)[0])
+        body = json.dumps(details).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Probes would flood the log
@@ -0,0 +1,94 @@
+import os
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional, Set
+
+from .latency import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+
+class HedgePolicy:
+    """Decides when a slow Goose run gets a second, racing attempt
+
+    A run is hedged once it has been going for longer than the observed
+    percentile latency of its mode. At most `max_rate` of recent runs may be
+    hedged, so an overall slowdown can't double the load on the provider.
+    Hedges still running count against that budget from the moment they are
+    launched, since during a slowdown many runs stall before any finishes.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        modes: Optional[Set[str]] = None,
+        percentile: float = 95.0,
+        max_rate: float = 0.1,
+        window: int = 100,
+        env_overrides: Optional[Dict[str, str]] = None,
+    ):
+        self.enabled = enabled
+        self.modes = modes if modes is not None else {"barebones", "help"}
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.env_overrides = env_overrides or {}
+        self.launched = 0
+        self.won = 0
+        self.denied = 0
+        self.outstanding = 0  # hedges launched whose runs haven't finished yet
+        self._recent: Deque[bool] = deque(maxlen=window)  # whether each recent run was hedged
+
+    @classmethod
+    def from_env(cls) -> "HedgePolicy":
+        """Build a policy from GOOSE_HEDGE_* environment variables"""
+        env_overrides = {}
+        if os.getenv('GOOSE_HEDGE_PROVIDER'):
+            env_overrides['GOOSE_PROVIDER'] = os.getenv('GOOSE_HEDGE_PROVIDER')
+        if os.getenv('GOOSE_HEDGE_MODEL'):
+            env_overrides['GOOSE_MODEL'] = os.getenv('GOOSE_HEDGE_MODEL')
+
+        modes = os.getenv('GOOSE_HEDGE_MODES')
+        return cls(
+            enabled=os.getenv('GOOSE_HEDGE_ENABLED', '').lower() in ('1', 'true', 'yes'),
+            modes={mode.strip() for mode in modes.split(',') if mode.strip()} if modes is not None else None,
+            percentile=float(os.getenv('GOOSE_HEDGE_PERCENTILE', '95')),
+            max_rate=float(os.getenv('GOOSE_HEDGE_MAX_RATE', '0.1')),
+            window=int(os.getenv('GOOSE_HEDGE_WINDOW', '100')),
+            env_overrides=env_overrides,
+        )
+
+    def threshold(self, mode: str, latency: LatencyTracker) -> Optional[float]:
+        """Seconds after which a run in this mode should be hedged, or None to never hedge"""
+        if not self.enabled or mode not in self.modes:
+            return None
+        return latency.percentile(mode, self.percentile)
+
+    def record_run(self, hedged: bool):
+        """Record that a run finished, and whether it was hedged"""
+        self._recent.append(hedged)
+
+    def try_acquire(self) -> bool:
+        """Check the hedge budget for a run that is about to be hedged; call release() when it ends"""
+        runs = len(self._recent) + self.outstanding + 1
+        hedged = sum(self._recent) + self.outstanding + 1
+        if hedged / runs > self.max_rate:
+            self.denied += 1
+            return False
+        self.launched += 1
+        self.outstanding += 1
+        return True
+
+    def release(self):
+        """Stop counting a hedge acquired with try_acquire() as outstanding"""
+        self.outstanding = max(0, self.outstanding - 1)
+
+    def get_stats(self) -> Dict:
+        """Get hedging statistics"""
+        return {
+            'enabled': self.enabled,
+            'launched': self.launched,
+            'won': self.won,
+            'denied': self.denied,
+            'outstanding': self.outstanding,
+            'recent_rate': round(sum(self._recent) / len(self._recent), 3) if self._recent else 0.0,
+        }
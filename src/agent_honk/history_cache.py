@@ -0,0 +1,94 @@
+import asyncio
+import os
+import time
+import logging
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CachedHistory:
+    """A thread's messages as of the newest message fetched"""
+
+    def __init__(self, messages: List[Dict], last_message_id: Optional[int], fetched_at: float):
+        self.messages = messages
+        self.last_message_id = last_message_id
+        self.fetched_at = fetched_at
+
+
+class HistoryCache:
+    """Remembers the history of recently active threads so only new messages are fetched
+
+    Messages in a thread are only appended to, except when one is edited or
+    deleted; the bot drops a thread's entry on those events, and entries
+    older than `ttl` are refetched whole in case an event was missed while the
+    gateway was down. The least recently used threads are evicted beyond
+    `max_threads`.
+    """
+
+    def __init__(self, max_threads: int = 256, ttl: float = 600.0):
+        self.max_threads = max_threads
+        self.ttl = ttl
+        self.entries: "OrderedDict[str, CachedHistory]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @classmethod
+    def from_env(cls) -> "HistoryCache":
+        """Build a cache sized by GOOSE_HISTORY_CACHE_* environment variables"""
+        return cls(
+            max_threads=int(os.getenv('GOOSE_HISTORY_CACHE_THREADS', '256')),
+            ttl=float(os.getenv('GOOSE_HISTORY_CACHE_TTL', '600')),
+        )
+
+    def lock(self, thread_id: str) -> asyncio.Lock:
+        """Lock held while refreshing a thread, so a prefetch and a turn don't both fetch"""
+        return self._locks.setdefault(thread_id, asyncio.Lock())
+
+    def get(self, thread_id: str) -> Optional[CachedHistory]:
+        """Get a thread's cached history to continue from, or None to fetch it whole"""
+        cached = self.entries.get(thread_id)
+        if cached is not None and time.monotonic() - cached.fetched_at > self.ttl:
+            self.invalidate(thread_id)
+            cached = None
+        if cached is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(thread_id)
+        return cached
+
+    def fresh(self, thread_id: str, max_age: float) -> bool:
+        """Whether a thread was fetched within the last `max_age` seconds"""
+        cached = self.entries.get(thread_id)
+        return cached is not None and time.monotonic() - cached.fetched_at <= max_age
+
+    def store(self, thread_id: str, messages: List[Dict], last_message_id: Optional[int]):
+        """Remember a thread's full history up to its newest message"""
+        if self.max_threads <= 0:
+            return
+        self.entries[thread_id] = CachedHistory(messages, last_message_id, time.monotonic())
+        self.entries.move_to_end(thread_id)
+        while len(self.entries) > self.max_threads:
+            evicted, _ = self.entries.popitem(last=False)
+            self._drop_lock(evicted)
+
+    def invalidate(self, thread_id: str):
+        """Forget a thread, e.g. because one of its messages was edited or deleted"""
+        self.entries.pop(thread_id, None)
+        self._drop_lock(thread_id)
+
+    def _drop_lock(self, thread_id: str):
+        lock = self._locks.get(thread_id)
+        if lock is not None and not lock.locked():
+            del self._locks[thread_id]
+
+    def get_stats(self) -> Dict:
+        """Get the number of cached threads and how often a fetch could continue from one"""
+        return {
+            'threads': len(self.entries),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
@@ -0,0 +1,299 @@
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Job kinds that run Goose and occupy a worker slot
+TURN_KINDS = ("barebones", "initial", "history")
+# Job kinds that only poke at a worker's local state and are always claimable
+CONTROL_KINDS = ("cancel", "cleanup", "archive", "prepare")
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_DEAD = "dead"  # gave up on after too many attempts
+
+
+class Job:
+    """A unit of work for a Goose worker"""
+
+    def __init__(self, job_id: int, thread_id: str, kind: str, payload: Dict, attempts: int = 0):
+        self.job_id = job_id
+        self.thread_id = thread_id
+        self.kind = kind
+        self.payload = payload
+        self.attempts = attempts
+
+
+class JobQueue:
+    """Interface for the queue connecting the dispatcher to Goose workers
+
+    Besides jobs, the queue tracks worker heartbeats and which worker holds
+    each thread's session directory, so turns for a thread are only claimed by
+    that worker while it is alive.
+    """
+
+    def enqueue(self, thread_id: str, kind: str, payload: Dict) -> int:
+        """Add a job, returning its id"""
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, kinds: Iterable[str], heartbeat_timeout: float) -> Optional[Job]:
+        """Claim the oldest queued job of the given kinds that this worker may run"""
+        raise NotImplementedError
+
+    def complete(self, job_id: int, result: Dict):
+        """Store the result of a job"""
+        raise NotImplementedError
+
+    def take_result(self, job_id: int) -> Optional[Dict]:
+        """Get and remove the result of a finished or dead job, or None if it isn't done"""
+        raise NotImplementedError
+
+    def cancel_queued(self, thread_id: str, result: Dict) -> int:
+        """Finish all not-yet-claimed turn jobs for a thread with the given result"""
+        raise NotImplementedError
+
+    def heartbeat(self, worker_id: str):
+        """Record that a worker is alive"""
+        raise NotImplementedError
+
+    def requeue_dead(self, heartbeat_timeout: float, max_attempts: int = 3) -> int:
+        """Put jobs claimed by workers that stopped heartbeating back in the queue
+
+        Jobs that were already claimed `max_attempts` times are dead-lettered
+        instead, so a turn that kills every worker it runs on can't take down
+        the whole fleet. Returns the number of jobs re-queued.
+        """
+        raise NotImplementedError
+
+    def prune_done(self, max_age: float) -> int:
+        """Delete finished and dead jobs nobody collected within max_age seconds"""
+        raise NotImplementedError
+
+    def assign_session(self, thread_id: str, worker_id: str):
+        """Record that a worker holds the session directory for a thread"""
+        raise NotImplementedError
+
+    def session_worker(self, thread_id: str) -> Optional[str]:
+        """Get the worker holding a thread's session directory"""
+        raise NotImplementedError
+
+    def release_session(self, thread_id: str):
+        """Forget which worker holds a thread's session"""
+        raise NotImplementedError
+
+    def get_stats(self, heartbeat_timeout: float) -> Dict:
+        """Get queue depth and worker counts"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class SQLiteJobQueue(JobQueue):
+    """Job queue stored in a SQLite database
+
+    Good for tests and for workers sharing a host; use a network backend
+    when workers run on separate machines.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    thread_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    claimed_by TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    result TEXT,
+                    created_at REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+                CREATE TABLE IF NOT EXISTS workers (
+                    worker_id TEXT PRIMARY KEY,
+                    last_heartbeat REAL NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS sessions (
+                    thread_id TEXT PRIMARY KEY,
+                    worker_id TEXT NOT NULL
+                );
+            """)
+
+    def enqueue(self, thread_id: str, kind: str, payload: Dict) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (thread_id, kind, payload, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                (thread_id, kind, json.dumps(payload), STATUS_QUEUED, time.time()),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker_id: str, kinds: Iterable[str], heartbeat_timeout: float) -> Optional[Job]:
+        kinds = list(kinds)
+        placeholders = ",".join("?" for _ in kinds)
+        stale = time.time() - heartbeat_timeout
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs for threads whose session lives on another live worker are left for it
+                row = self._conn.execute(
+                    f"""
+                    SELECT j.id, j.thread_id, j.kind, j.payload, j.attempts FROM jobs j
+                    LEFT JOIN sessions s ON s.thread_id = j.thread_id
+                    LEFT JOIN workers w ON w.worker_id = s.worker_id
+                    WHERE j.status = ? AND j.kind IN ({placeholders})
+                      AND (s.worker_id IS NULL OR s.worker_id = ? OR w.last_heartbeat IS NULL OR w.last_heartbeat < ?)
+                    ORDER BY j.id LIMIT 1
+                    """,
+                    (STATUS_QUEUED, *kinds, worker_id, stale),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, claimed_by = ?, attempts = attempts + 1 WHERE id = ?",
+                    (STATUS_RUNNING, worker_id, row['id']),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job(row['id'], row['thread_id'], row['kind'], json.loads(row['payload']), row['attempts'] + 1)
+
+    def complete(self, job_id: int, result: Dict):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ? WHERE id = ?",
+                (STATUS_DONE, json.dumps(result), job_id),
+            )
+
+    def take_result(self, job_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT status, result FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None or row['status'] not in (STATUS_DONE, STATUS_DEAD):
+                return None
+            self._conn.execute("DELETE FROM jobs WHERE id = ?", (job_id,))
+        return json.loads(row['result'])
+
+    def cancel_queued(self, thread_id: str, result: Dict) -> int:
+        placeholders = ",".join("?" for _ in TURN_KINDS)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE jobs SET status = ?, result = ? WHERE thread_id = ? AND status = ? AND kind IN ({placeholders})",
+                (STATUS_DONE, json.dumps(result), thread_id, STATUS_QUEUED, *TURN_KINDS),
+            )
+            return cursor.rowcount
+
+    def heartbeat(self, worker_id: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO workers (worker_id, last_heartbeat) VALUES (?, ?) "
+                "ON CONFLICT(worker_id) DO UPDATE SET last_heartbeat = excluded.last_heartbeat",
+                (worker_id, time.time()),
+            )
+
+    def requeue_dead(self, heartbeat_timeout: float, max_attempts: int = 3) -> int:
+        stale = time.time() - heartbeat_timeout
+        orphaned = "status = ? AND claimed_by IN (SELECT worker_id FROM workers WHERE last_heartbeat < ?)"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                dead = self._conn.execute(
+                    f"SELECT id, thread_id, kind, attempts FROM jobs WHERE {orphaned} AND attempts >= ?",
+                    (STATUS_RUNNING, stale, max_attempts),
+                ).fetchall()
+                for row in dead:
+                    error = f"Worker died running this job {row['attempts']} times"
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, claimed_by = NULL, result = ? WHERE id = ?",
+                        (STATUS_DEAD, json.dumps({"response": None, "error": error}), row['id']),
+                    )
+                cursor = self._conn.execute(
+                    f"UPDATE jobs SET status = ?, claimed_by = NULL WHERE {orphaned}",
+                    (STATUS_QUEUED, STATUS_RUNNING, stale),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        for row in dead:
+            logger.warning(f"Dead-lettered {row['kind']} job {row['id']} for thread {row['thread_id']} after {row['attempts']} attempts")
+        return cursor.rowcount
+
+    def prune_done(self, max_age: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN (?, ?) AND created_at < ?",
+                (STATUS_DONE, STATUS_DEAD, time.time() - max_age),
+            )
+            return cursor.rowcount
+
+    def assign_session(self, thread_id: str, worker_id: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO sessions (thread_id, worker_id) VALUES (?, ?) "
+                "ON CONFLICT(thread_id) DO UPDATE SET worker_id = excluded.worker_id",
+                (thread_id, worker_id),
+            )
+
+    def session_worker(self, thread_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT worker_id FROM sessions WHERE thread_id = ?", (thread_id,)).fetchone()
+        return row['worker_id'] if row else None
+
+    def release_session(self, thread_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM sessions WHERE thread_id = ?", (thread_id,))
+
+    def get_stats(self, heartbeat_timeout: float) -> Dict:
+        stale = time.time() - heartbeat_timeout
+        with self._lock:
+            counts = dict(self._conn.execute(
+                "SELECT status, COUNT(*) FROM jobs WHERE status != ? GROUP BY status", (STATUS_DONE,)
+            ).fetchall())
+            workers = self._conn.execute(
+                "SELECT COUNT(*) FROM workers WHERE last_heartbeat >= ?", (stale,)
+            ).fetchone()[0]
+        return {
+            'queued': counts.get(STATUS_QUEUED, 0),
+            'running': counts.get(STATUS_RUNNING, 0),
+            'dead': counts.get(STATUS_DEAD, 0),
+            'live_workers': workers,
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def load_job_queue(url: Optional[str] = None) -> JobQueue:
+    """Create a job queue from a URL
+
+    `sqlite:///path/to/jobs.db` uses the built-in SQLite backend. Any other
+    value of the form `package.module:ClassName[?argument]` loads a custom
+    backend class, which is constructed with the text after `?` (if any).
+    """
+    url = url or os.getenv('GOOSE_JOB_QUEUE', '')
+    if not url or url.startswith('sqlite://'):
+        from .paths import get_state_dir
+        path = url[len('sqlite://'):] if url else ''
+        return SQLiteJobQueue(path or os.path.join(get_state_dir(), 'jobs.db'))
+
+    target, _, argument = url.partition('?')
+    module_name, _, class_name = target.partition(':')
+    backend = getattr(importlib.import_module(module_name), class_name)
+    logger.info(f"Using job queue backend {target}")
+    return backend(argument) if argument else backend()
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LANE_INTERACTIVE = "interactive"
+LANE_RESEARCH = "research"
+
+# name -> (concurrency, max queued, timeout seconds)
+DEFAULT_LANES = {
+    LANE_INTERACTIVE: (8, 32, 300.0),
+    LANE_RESEARCH: (2, 16, 300.0),
+}
+
+# Lanes for modes that don't come from a recipe; recipes declare their own lane
+DEFAULT_MODE_LANES = {
+    "session": LANE_INTERACTIVE,
+}
+
+
+class LaneFullError(Exception):
+    """Raised when a lane's queue is full and a run cannot even wait for a slot"""
+
+
+class ExecutionLane:
+    """A named group of Goose execution slots with its own queue and timeout"""
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold an execution slot for the duration of the block
+
+        Raises LaneFullError if no slot is free and the queue is already full.
+        """
+        if self._semaphore.locked() and self.waiting >= self.max_queue:
+            self.rejected += 1
+            raise LaneFullError(f"Lane {self.name} is full ({self.active} running, {self.waiting} queued)")
+
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield self
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def get_stats(self) -> Dict:
+        """Get statistics about the lane"""
+        return {
+            'concurrency': self.concurrency,
+            'active': self.active,
+            'waiting': self.waiting,
+            'max_queue': self.max_queue,
+            'rejected': self.rejected,
+            'timeout': self.timeout,
+        }
+
+
+def lane_from_env(name: str) -> ExecutionLane:
+    """Build a lane from its GOOSE_LANE_<NAME>_* environment variables"""
+    concurrency, max_queue, timeout = DEFAULT_LANES.get(name, DEFAULT_LANES[LANE_INTERACTIVE])
+    prefix = f"GOOSE_LANE_{name.upper()}_"
+    return ExecutionLane(
+        name,
+        concurrency=int(os.getenv(prefix + 'CONCURRENCY', str(concurrency))),
+        max_queue=int(os.getenv(prefix + 'QUEUE', str(max_queue))),
+        timeout=float(os.getenv(prefix + 'TIMEOUT', str(timeout))),
+    )
+
+
+class LaneRouter:
+    """Maps execution modes onto lanes"""
+
+    def __init__(self, lanes: Dict[str, ExecutionLane], mode_lanes: Dict[str, str], default_lane: str = LANE_INTERACTIVE, overrides: Optional[Dict[str, str]] = None):
+        self.lanes = lanes
+        self.mode_lanes = mode_lanes
+        self.default_lane = default_lane
+        self.overrides = overrides or {}  # mode -> lane set by the operator, wins over recipes
+
+    @classmethod
+    def from_env(cls) -> "LaneRouter":
+        """Build lanes from GOOSE_LANE_<NAME>_* and GOOSE_MODE_LANES environment variables
+
+        GOOSE_MODE_LANES looks like "help=research,barebones=interactive". Lanes
+        named there that have no defaults are created from their env settings.
+        """
+        overrides = {}
+        for pair in os.getenv('GOOSE_MODE_LANES', '').split(','):
+            if '=' in pair:
+                mode, lane = pair.split('=', 1)
+                overrides[mode.strip()] = lane.strip()
+
+        lanes = {name: lane_from_env(name) for name in set(DEFAULT_LANES) | set(overrides.values())}
+        return cls(lanes, dict(DEFAULT_MODE_LANES), overrides=overrides)
+
+    def for_mode(self, mode: str, preferred: Optional[str] = None) -> ExecutionLane:
+        """Get the lane that runs a mode
+
+        GOOSE_MODE_LANES wins, then the lane the recipe asks for, then the
+        built-in mapping. Lanes without defaults are created on first use.
+        """
+        name = self.overrides.get(mode) or preferred or self.mode_lanes.get(mode, self.default_lane)
+        lane = self.lanes.get(name)
+        if lane is None:
+            lane = self.lanes[name] = lane_from_env(name)
+        return lane
+
+    def get_stats(self) -> Dict:
+        """Get statistics for every lane"""
+        return {name: lane.get_stats() for name, lane in self.lanes.items()}
@@ -0,0 +1,83 @@
+import os
+import logging
+from collections import deque
+from typing import Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Tracks recent Goose run durations per mode and derives adaptive timeouts"""
+
+    def __init__(
+        self,
+        window: int = 200,
+        min_samples: int = 20,
+        percentile: float = 99.0,
+        multiplier: float = 2.0,
+        min_timeout: float = 60.0,
+        max_timeout: float = 300.0,
+    ):
+        self.window = window
+        self.min_samples = min_samples
+        self.percentile_target = percentile
+        self.multiplier = multiplier
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.samples: Dict[str, Deque[float]] = {}  # mode -> recent durations (seconds)
+
+    @classmethod
+    def from_env(cls) -> "LatencyTracker":
+        """Build a tracker from GOOSE_TIMEOUT_* environment variables"""
+        return cls(
+            window=int(os.getenv('GOOSE_LATENCY_WINDOW', '200')),
+            min_samples=int(os.getenv('GOOSE_LATENCY_MIN_SAMPLES', '20')),
+            percentile=float(os.getenv('GOOSE_TIMEOUT_PERCENTILE', '99')),
+            multiplier=float(os.getenv('GOOSE_TIMEOUT_MULTIPLIER', '2.0')),
+            min_timeout=float(os.getenv('GOOSE_TIMEOUT_MIN', '60')),
+            max_timeout=float(os.getenv('GOOSE_TIMEOUT_MAX', '300')),
+        )
+
+    def record(self, mode: str, seconds: float):
+        """Record the duration of a completed run"""
+        samples = self.samples.get(mode)
+        if samples is None:
+            samples = self.samples[mode] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, mode: str, pct: float) -> Optional[float]:
+        """Get the given percentile of recent durations, or None without enough data"""
+        samples = self.samples.get(mode)
+        if not samples or len(samples) < self.min_samples:
+            return None
+
+        ordered = sorted(samples)
+        # Nearest-rank percentile
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def timeout_for(self, mode: str, ceiling: Optional[float] = None) -> float:
+        """Get the timeout for the next run in a mode
+
+        Uses the configured percentile of observed latency times the multiplier,
+        clamped to [min_timeout, ceiling]. The ceiling defaults to max_timeout and
+        is used as-is until enough samples have been collected.
+        """
+        ceiling = self.max_timeout if ceiling is None else min(ceiling, self.max_timeout)
+        observed = self.percentile(mode, self.percentile_target)
+        if observed is None:
+            return ceiling
+        return max(min(self.min_timeout, ceiling), min(ceiling, observed * self.multiplier))
+
+    def get_stats(self) -> Dict:
+        """Get latency statistics per mode"""
+        stats = {}
+        for mode, samples in self.samples.items():
+            stats[mode] = {
+                'samples': len(samples),
+                'p50': self.percentile(mode, 50),
+                'p95': self.percentile(mode, 95),
+                'p99': self.percentile(mode, 99),
+                'timeout': self.timeout_for(mode),
+            }
+        return stats
@@ -0,0 +1,149 @@
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import logging
+from collections import deque
+from collections.abc import Mapping
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Objects deep_sizeof visits at most, so accounting stays cheap on a big structure
+MAX_VISITED = 100_000
+
+
+def deep_sizeof(obj, max_visited: int = MAX_VISITED) -> int:
+    """Approximate bytes held by a structure of containers, strings and numbers
+
+    Shared objects are counted once. Objects other than builtin containers
+    count only their own size, not what they point to, so an asyncio.Task
+    doesn't pull in the whole event loop.
+    """
+    seen = set()
+    total = 0
+    stack = [obj]
+    while stack and len(seen) < max_visited:
+        item = stack.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, (str, bytes, bytearray, int, float, bool)) or item is None:
+            continue
+        if isinstance(item, Mapping):
+            stack.extend(item.keys())
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset, deque)):
+            stack.extend(item)
+    return total
+
+
+def account(structure) -> Dict:
+    """Count entries and approximate bytes of an in-memory structure
+
+    Mappings backed by a shared store hold nothing in this process, so only
+    their entries are counted.
+    """
+    if isinstance(structure, (dict, list, set, deque)):
+        return {'entries': len(structure), 'bytes': deep_sizeof(structure)}
+    return {'entries': len(structure), 'bytes': 0}
+
+
+def process_rss() -> Optional[int]:
+    """Current resident set size in bytes, where the platform reports it"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current outside Linux; kilobytes on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+class HeapProfiler:
+    """Captures tracemalloc snapshots on demand and writes what grew between them
+
+    The first capture starts tracing (which slows allocation down, so it is
+    off until an admin asks for it) and records a baseline. Each later capture
+    writes the top allocation sites by growth since the previous one, and the
+    largest overall, to a file in `output_dir`.
+    """
+
+    def __init__(self, output_dir: str, frames: int = 10, top: int = 30):
+        self.output_dir = output_dir
+        self.frames = frames
+        self.top = top
+        self.snapshots = 0
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+        self._baseline_at: Optional[float] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def _filtered(self, snapshot: tracemalloc.Snapshot) -> tracemalloc.Snapshot:
+        return snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def capture(self) -> str:
+        """Start tracing, or snapshot and diff against the previous capture; returns a summary"""
+        if not tracemalloc.is_tracing() or self._baseline is None:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            self._baseline = self._filtered(tracemalloc.take_snapshot())
+            self._baseline_at = time.time()
+            logger.info(f"Started tracemalloc with {self.frames} frame(s) per allocation")
+            return "Started tracing allocations; capture again later to see what grew."
+
+        gc.collect()
+        snapshot = self._filtered(tracemalloc.take_snapshot())
+        now = time.time()
+        growth = snapshot.compare_to(self._baseline, 'traceback')
+        current, peak = tracemalloc.get_traced_memory()
+
+        lines = [
+            f"Heap snapshot at {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))}, "
+            f"{now - self._baseline_at:.0f}s after the previous one",
+            f"Traced memory: {current / 1024 / 1024:.1f} MiB now, {peak / 1024 / 1024:.1f} MiB peak",
+            f"Process RSS: {(process_rss() or 0) / 1024 / 1024:.1f} MiB",
+            "",
+            f"Top {self.top} allocation sites by growth:",
+        ]
+        for stat in growth[:self.top]:
+            lines.append(f"{stat.size_diff / 1024:+.1f} KiB ({stat.count_diff:+d} blocks), {stat.size / 1024:.1f} KiB total")
+            lines.extend(f"    {line}" for line in stat.traceback.format())
+        lines += ["", f"Top {self.top} allocation sites overall:"]
+        for stat in snapshot.statistics('lineno')[:self.top]:
+            lines.append(f"{stat.size / 1024:.1f} KiB ({stat.count} blocks) {stat.traceback}")
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        path = os.path.join(self.output_dir, f"heap-{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.txt")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+        self._baseline, self._baseline_at = snapshot, now
+        self.snapshots += 1
+        total_growth = sum(stat.size_diff for stat in growth)
+        logger.info(f"Wrote heap snapshot diff to {path}")
+        return f"Traced memory grew {total_growth / 1024:+.1f} KiB since the previous capture; top allocators written to `{path}`."
+
+    def stop(self) -> str:
+        """Stop tracing and drop the baseline"""
+        if not tracemalloc.is_tracing():
+            return "Allocation tracing is not running."
+        tracemalloc.stop()
+        self._baseline = self._baseline_at = None
+        logger.info("Stopped tracemalloc")
+        return "Stopped tracing allocations."
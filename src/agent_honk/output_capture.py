@@ -0,0 +1,113 @@
+import asyncio
+import re
+import weakref
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SESSION_PATH_PATTERN = re.compile(rb'logging to ([^\s]+\.jsonl)')
+ANSI_PATTERN = re.compile(rb'\x1b\[[0-9;]*m')
+# An escape sequence cut off at the end of a chunk
+PARTIAL_ANSI_PATTERN = re.compile(rb'\x1b(\[[0-9;]*)?$')
+
+# How much already-seen output to keep around so matches can span chunks
+SCAN_CARRY_BYTES = 4096
+MAX_PARTIAL_ANSI_BYTES = 32
+
+# Captures of running processes, for memory accounting
+_live_captures: "weakref.WeakSet[BoundedCapture]" = weakref.WeakSet()
+
+
+def live_capture_usage() -> Dict:
+    """Count running captures and the output they hold in memory"""
+    captures = list(_live_captures)
+    return {
+        'entries': len(captures),
+        'bytes': sum(len(capture._tail) + len(capture._scan_carry) + len(capture._ansi_carry) for capture in captures),
+    }
+
+
+class BoundedCapture:
+    """Incrementally captures a subprocess stream with bounded memory
+
+    ANSI color codes are stripped and the Goose session path is located as bytes
+    arrive. Only the last `max_bytes` of output are kept; anything older is
+    dropped and counted.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024, scan_session_path: bool = False):
+        self.max_bytes = max_bytes
+        self.scan_session_path = scan_session_path
+        self.session_path: Optional[str] = None
+        self.total_bytes = 0
+        self.dropped_bytes = 0
+        self._tail = bytearray()
+        self._ansi_carry = b''
+        self._scan_carry = b''
+        _live_captures.add(self)
+
+    @property
+    def truncated(self) -> bool:
+        """Whether output was dropped and text() only returns the tail"""
+        return self.dropped_bytes > 0
+
+    def feed(self, data: bytes):
+        """Process a chunk of raw output"""
+        self.total_bytes += len(data)
+        data = self._ansi_carry + data
+        self._ansi_carry = b''
+
+        # Hold back an escape sequence that may continue in the next chunk
+        partial = PARTIAL_ANSI_PATTERN.search(data)
+        if partial and len(data) - partial.start() <= MAX_PARTIAL_ANSI_BYTES:
+            self._ansi_carry = data[partial.start():]
+            data = data[:partial.start()]
+
+        cleaned = ANSI_PATTERN.sub(b'', data)
+        if self.scan_session_path and self.session_path is None:
+            self._scan(cleaned, final=False)
+        self._append(cleaned)
+
+    def finish(self):
+        """Flush any held-back bytes once the stream has ended"""
+        if self._ansi_carry:
+            carry, self._ansi_carry = self._ansi_carry, b''
+            self._append(carry)
+        if self.scan_session_path and self.session_path is None:
+            self._scan(b'', final=True)
+
+    def text(self) -> str:
+        """Get the in-memory tail of the output as text"""
+        return self._tail.decode('utf-8', errors='replace')
+
+    def _scan(self, cleaned: bytes, final: bool):
+        buffer = self._scan_carry + cleaned
+        match = SESSION_PATH_PATTERN.search(buffer)
+        # A match touching the end of the buffer may still be growing
+        if match and (final or match.end() < len(buffer)):
+            self.session_path = match.group(1).decode('utf-8', errors='replace')
+            self._scan_carry = b''
+            logger.info(f"Found session JSONL path in output: {self.session_path}")
+            return
+        keep_from = len(buffer) - SCAN_CARRY_BYTES
+        if match:
+            keep_from = min(keep_from, match.start())
+        self._scan_carry = buffer[max(0, keep_from):]
+
+    def _append(self, data: bytes):
+        self._tail += data
+        overflow = len(self._tail) - self.max_bytes
+        if overflow > 0:
+            del self._tail[:overflow]
+            self.dropped_bytes += overflow
+
+
+async def pump_stream(stream: asyncio.StreamReader, capture: BoundedCapture, chunk_size: int = 64 * 1024):
+    """Read a stream to EOF, feeding each chunk into a capture"""
+    while True:
+        data = await stream.read(chunk_size)
+        if not data:
+            break
+        capture.feed(data)
+    capture.finish()
@@ -0,0 +1,13 @@
+import os
+
+
+def get_state_dir() -> str:
+    """Get the directory where the bot persists state between restarts"""
+    state_dir = os.path.expanduser(os.getenv('AGENT_HONK_STATE_DIR', '~/.agent_honk'))
+    os.makedirs(state_dir, exist_ok=True)
+    return state_dir
+
+
+def get_recipes_dir() -> str:
+    """Get the directory containing the bundled Goose recipes"""
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'recipes')
@@ -0,0 +1,46 @@
+import asyncio
+import os
+import signal
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def _signal_group(pgid: int, sig: int) -> bool:
+    """Send a signal to a process group, returning False if it no longer exists"""
+    try:
+        os.killpg(pgid, sig)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError as e:
+        logger.warning(f"Not allowed to signal process group {pgid}: {e}")
+        return False
+
+
+async def terminate_process_group(process: asyncio.subprocess.Process, grace: float = 5.0):
+    """Terminate a process started with start_new_session=True and all its descendants
+
+    Sends SIGTERM to the whole process group, waits up to `grace` seconds for the
+    leader to exit, then SIGKILLs whatever is left in the group.
+    """
+    pgid = process.pid
+    if process.returncode is None:
+        if _signal_group(pgid, signal.SIGTERM):
+            logger.info(f"Sent SIGTERM to process group {pgid}")
+        try:
+            await asyncio.wait_for(process.wait(), timeout=grace)
+        except asyncio.TimeoutError:
+            logger.warning(f"Process group {pgid} ignored SIGTERM, sending SIGKILL")
+
+    # Tool processes spawned by Goose may outlive the leader, so always sweep the group
+    if _signal_group(pgid, signal.SIGKILL):
+        logger.info(f"Killed remaining processes in group {pgid}")
+    if process.returncode is None:
+        await process.wait()
+
+
+def reap_process_group(process: asyncio.subprocess.Process):
+    """Kill any stragglers left in the group of a process that already exited"""
+    if _signal_group(process.pid, signal.SIGKILL):
+        logger.info(f"Reaped leftover processes in group {process.pid}")
@@ -0,0 +1,102 @@
+import os
+import uuid
+import logging
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# How a recipe receives prompts that are too large for the command line
+TRANSPORT_ARGV = "argv"                      # always inline, as a --params value
+TRANSPORT_RENDER = "render"                  # render the recipe locally and pass it with `-i <file>`
+TRANSPORT_FILE_REFERENCE = "file_reference"  # save the prompt to a file and pass a note pointing at it
+TRANSPORTS = (TRANSPORT_ARGV, TRANSPORT_RENDER, TRANSPORT_FILE_REFERENCE)
+
+# Longest argument shown when logging a command
+LOG_ARG_CHARS = 120
+
+
+def format_command(cmd_args: List[str]) -> str:
+    """Render a command for logs, shortening long arguments such as prompts"""
+    shown = []
+    for arg in cmd_args:
+        if len(arg) > LOG_ARG_CHARS:
+            arg = f"{arg[:LOG_ARG_CHARS]}...({len(arg)} chars)"
+        shown.append(arg)
+    return ' '.join(shown)
+
+
+class PromptTransport:
+    """Builds goose command lines, moving large prompts out of argv
+
+    Prompts up to `max_arg_bytes` are passed inline, which avoids any file I/O
+    for the common case. Larger ones are written to a file in the session
+    directory: plain turns read it with `-i <file>`, and recipes use the
+    transport they declare. Linux rejects any single argument over 128 KiB,
+    so the threshold must stay below that.
+    """
+
+    def __init__(self, max_arg_bytes: int = 16 * 1024):
+        self.max_arg_bytes = max_arg_bytes
+        self.inline = 0
+        self.via_file = 0
+
+    @classmethod
+    def from_env(cls) -> "PromptTransport":
+        """Build a transport using GOOSE_PROMPT_ARG_MAX_BYTES"""
+        return cls(max_arg_bytes=int(os.getenv('GOOSE_PROMPT_ARG_MAX_BYTES', str(16 * 1024))))
+
+    def is_large(self, prompt: str) -> bool:
+        return len(prompt.encode('utf-8')) > self.max_arg_bytes
+
+    @contextmanager
+    def command(self, goose_command: str, prompt: str, directory: str, recipe=None) -> Iterator[List[str]]:
+        """Get the command line for a prompt; any prompt file is removed when the block exits"""
+        path: Optional[str] = None
+        try:
+            if not self.is_large(prompt):
+                self.inline += 1
+                if recipe is None:
+                    yield [goose_command, 'run', '--text', prompt, '--no-session']
+                else:
+                    yield recipe.command_args(goose_command, prompt)
+                return
+
+            transport = recipe.prompt_transport if recipe is not None else TRANSPORT_RENDER
+            if transport == TRANSPORT_ARGV:
+                logger.warning(f"Passing a {len(prompt)} character prompt inline; recipe {recipe.name} has no other transport")
+                self.inline += 1
+                yield recipe.command_args(goose_command, prompt)
+                return
+
+            self.via_file += 1
+            if recipe is None:
+                path = self._write(directory, prompt)
+                yield [goose_command, 'run', '-i', path, '--no-session']
+            elif transport == TRANSPORT_RENDER:
+                path = self._write(directory, recipe.render(prompt))
+                yield [goose_command, 'run', '-i', path, '--no-session']
+            else:
+                path = self._write(directory, prompt)
+                note = f"[This text was too long to include here, so it was saved to {path}. Read that file and use its full contents in place of this note.]"
+                yield recipe.command_args(goose_command, note)
+        finally:
+            if path is not None:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _write(self, directory: str, text: str) -> str:
+        path = os.path.join(directory, f".goose_prompt_{uuid.uuid4().hex[:12]}.md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def get_stats(self) -> Dict:
+        """Get how prompts were passed and the current threshold"""
+        return {
+            'max_arg_bytes': self.max_arg_bytes,
+            'inline': self.inline,
+            'via_file': self.via_file,
+        }
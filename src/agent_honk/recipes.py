@@ -0,0 +1,295 @@
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+from .prompt_transport import TRANSPORT_ARGV, TRANSPORT_RENDER, TRANSPORTS
+
+logger = logging.getLogger(__name__)
+
+# Top-level recipe key holding Agent Honk's execution policy; stripped before Goose sees the recipe
+POLICY_KEY = "agent_honk"
+
+CACHE_NONE = "none"
+CACHE_COALESCE = "coalesce"  # identical in-flight prompts share one run
+
+TEMPLATE_VARIABLE = re.compile(r"{{\s*([A-Za-z_][A-Za-z0-9_]*)\s*}}")
+
+
+class RecipeError(Exception):
+    """Raised when a recipe file is invalid"""
+
+
+class Recipe:
+    """A validated recipe with its execution policy and precompiled command arguments
+
+    The `agent_honk` block of a recipe file declares:
+      mode: name used for lanes, latency, breakers and metrics (default: file name)
+      prompt_param: parameter that receives the user's prompt
+      params: other parameters, as {name: {env: VAR, default: value}}; values the
+        bot provides at runtime (see RecipeRegistry) come between the two
+      lane: execution lane to run in
+      timeout: upper bound on a run in seconds
+      cache: `none` or `coalesce`
+      streaming: whether stdout carries the answer; if not, it is read from the session log
+      workspace: whether to run in the thread's workspace directory
+      prompt_transport: how prompts too large for argv are passed (see prompt_transport.py)
+    """
+
+    def __init__(self, name: str, source_path: str, path: str, version: str, data: Dict, policy: Dict, runtime_params: Optional[Dict[str, str]] = None):
+        self.name = name
+        self.source_path = source_path
+        self.path = path  # compiled copy passed to goose
+        self.version = version
+        self.title = data.get('title', name)
+        self.mode = policy.get('mode', name)
+        self.prompt_param = policy['prompt_param']
+        self.lane: Optional[str] = policy.get('lane')
+        self.timeout: Optional[float] = float(policy['timeout']) if policy.get('timeout') else None
+        self.cache = policy.get('cache', CACHE_NONE)
+        self.streaming = policy.get('streaming', True)
+        self.workspace = policy.get('workspace', True)
+        self.prompt_transport = policy.get('prompt_transport', TRANSPORT_ARGV)
+        self._instructions = data.get('instructions') or ''
+        self._prompt_template = data.get('prompt') or ''
+
+        # Everything but the prompt is known now, so build those arguments once
+        runtime_params = runtime_params or {}
+        self.param_values = {}
+        for key, spec in (policy.get('params') or {}).items():
+            value = runtime_params.get(key, str(spec.get('default', '')))
+            self.param_values[key] = os.getenv(spec['env'], value) if spec.get('env') else value
+        self._base_args = ['run', '--recipe', path]
+        for key, value in self.param_values.items():
+            self._base_args += ['--params', f'{key}={value}']
+
+    def command_args(self, goose_command: str, prompt: str) -> List[str]:
+        """Get the goose command line for a prompt"""
+        args = [goose_command, *self._base_args, '--params', f'{self.prompt_param}={prompt}']
+        if self.streaming:
+            # The answer comes from stdout, so there's no need to keep a session log
+            args.append('--no-session')
+        return args
+
+    def render(self, prompt: str) -> str:
+        """Fill in the recipe's instructions and prompt locally, for running it without --recipe"""
+        values = {**self.param_values, self.prompt_param: prompt}
+
+        def fill(text: str) -> str:
+            return TEMPLATE_VARIABLE.sub(lambda match: values.get(match.group(1), ''), text)
+
+        return "\n\n".join(part for part in (fill(self._instructions), fill(self._prompt_template)) if part)
+
+    def describe(self) -> Dict:
+        """Get the recipe's policy for metrics"""
+        return {
+            'mode': self.mode,
+            'version': self.version,
+            'lane': self.lane,
+            'timeout': self.timeout,
+            'cache': self.cache,
+            'streaming': self.streaming,
+            'prompt_transport': self.prompt_transport,
+        }
+
+
+def _validate(name: str, data, policy) -> None:
+    if not isinstance(data, dict):
+        raise RecipeError(f"{name}: recipe must be a mapping")
+    for key in ('title', 'description'):
+        if not data.get(key):
+            raise RecipeError(f"{name}: missing `{key}`")
+    if not data.get('prompt') and not data.get('instructions'):
+        raise RecipeError(f"{name}: needs `prompt` or `instructions`")
+    if not isinstance(policy, dict):
+        raise RecipeError(f"{name}: missing `{POLICY_KEY}` block")
+
+    declared = {}
+    for parameter in data.get('parameters') or []:
+        if not isinstance(parameter, dict) or not parameter.get('key'):
+            raise RecipeError(f"{name}: every parameter needs a `key`")
+        if parameter['key'] in declared:
+            raise RecipeError(f"{name}: parameter `{parameter['key']}` is declared twice")
+        declared[parameter['key']] = parameter
+
+    used = set()
+    for field in ('prompt', 'instructions'):
+        used.update(TEMPLATE_VARIABLE.findall(data.get(field) or ''))
+    undeclared = used - set(declared)
+    if undeclared:
+        raise RecipeError(f"{name}: undeclared parameter(s) used: {', '.join(sorted(undeclared))}")
+
+    params = policy.get('params') or {}
+    if not isinstance(params, dict) or not all(isinstance(spec, dict) for spec in params.values()):
+        raise RecipeError(f"{name}: `params` must map parameter names to {{env, default}}")
+    if policy.get('prompt_param') not in declared:
+        raise RecipeError(f"{name}: `prompt_param` must name a declared parameter")
+    supplied = set(params) | {policy['prompt_param']}
+    unknown = supplied - set(declared)
+    if unknown:
+        raise RecipeError(f"{name}: values given for undeclared parameter(s): {', '.join(sorted(unknown))}")
+    missing = {
+        key for key, parameter in declared.items()
+        if key not in supplied and 'default' not in parameter and parameter.get('requirement') != 'optional'
+    }
+    if missing:
+        raise RecipeError(f"{name}: no value for required parameter(s): {', '.join(sorted(missing))}")
+
+    if policy.get('cache', CACHE_NONE) not in (CACHE_NONE, CACHE_COALESCE):
+        raise RecipeError(f"{name}: `cache` must be `{CACHE_NONE}` or `{CACHE_COALESCE}`")
+    timeout = policy.get('timeout')
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        raise RecipeError(f"{name}: `timeout` must be a positive number of seconds")
+    for key in ('streaming', 'workspace'):
+        if not isinstance(policy.get(key, True), bool):
+            raise RecipeError(f"{name}: `{key}` must be true or false")
+    transport = policy.get('prompt_transport', TRANSPORT_ARGV)
+    if transport not in TRANSPORTS:
+        raise RecipeError(f"{name}: `prompt_transport` must be one of {', '.join(TRANSPORTS)}")
+    if transport == TRANSPORT_RENDER and (not policy.get('streaming', True) or data.get('extensions')):
+        raise RecipeError(f"{name}: `render` only works for streaming recipes without extensions")
+    for key in ('mode', 'lane'):
+        if policy.get(key) is not None and not isinstance(policy[key], str):
+            raise RecipeError(f"{name}: `{key}` must be a string")
+
+
+def _block_strings(dumper, value):
+    # Keep multi-line prompts readable in the compiled copies
+    style = '|' if '\n' in value else None
+    return dumper.represent_scalar('tag:yaml.org,2002:str', value, style=style)
+
+
+class _RecipeDumper(yaml.SafeDumper):
+    pass
+
+
+_RecipeDumper.add_representer(str, _block_strings)
+
+
+class RecipeRegistry:
+    """Loads every recipe under a directory once and reloads the ones that change
+
+    Each recipe is validated and compiled into a temporary copy without the
+    `agent_honk` block, which is what goose is given. A file that fails
+    validation is logged and, if it was loaded before, the last good version
+    stays in use. `runtime_params` supplies parameter values only known to
+    the running bot, such as paths of files it generates.
+    """
+
+    def __init__(self, recipes_dir: str, reload_interval: float = 5.0, runtime_params: Optional[Dict[str, str]] = None):
+        self.recipes_dir = recipes_dir
+        self.reload_interval = reload_interval
+        self.runtime_params = runtime_params or {}
+        self.recipes: Dict[str, Recipe] = {}
+        self.errors: Dict[str, str] = {}  # name -> last validation error
+        self.reloads = 0
+        self._mtimes: Dict[str, float] = {}
+        self._compiled_dir = tempfile.mkdtemp(prefix="goose_recipes_")
+        self._reload_task: Optional[asyncio.Task] = None
+        self.reload()
+
+    @classmethod
+    def from_env(cls, recipes_dir: str, runtime_params: Optional[Dict[str, str]] = None) -> "RecipeRegistry":
+        """Build a registry using GOOSE_RECIPE_RELOAD_SECONDS (0 disables hot reload)"""
+        return cls(recipes_dir, reload_interval=float(os.getenv('GOOSE_RECIPE_RELOAD_SECONDS', '5')), runtime_params=runtime_params)
+
+    def get(self, name: str) -> Recipe:
+        """Get a loaded recipe by file name (without extension)"""
+        recipe = self.recipes.get(name)
+        if recipe is None:
+            reason = self.errors.get(name, "no such recipe")
+            raise RecipeError(f"Recipe {name} is not available: {reason}")
+        return recipe
+
+    def _scan(self) -> Dict[str, Tuple[str, float]]:
+        found = {}
+        try:
+            entries = list(os.scandir(self.recipes_dir))
+        except FileNotFoundError:
+            logger.warning(f"Recipes directory {self.recipes_dir} does not exist")
+            return found
+        for entry in entries:
+            name, extension = os.path.splitext(entry.name)
+            if extension in ('.yaml', '.yml') and entry.is_file():
+                found[name] = (entry.path, entry.stat().st_mtime)
+        return found
+
+    def reload(self) -> int:
+        """Load new and changed recipes and drop deleted ones, returning how many changed"""
+        found = self._scan()
+        changed = 0
+        for name in set(self.recipes) - set(found):
+            logger.info(f"Recipe {name} was removed")
+            del self.recipes[name]
+            self._mtimes.pop(name, None)
+            changed += 1
+        for name, (path, mtime) in found.items():
+            if self._mtimes.get(name) == mtime:
+                continue
+            self._mtimes[name] = mtime
+            try:
+                recipe = self._load(name, path)
+            except (OSError, yaml.YAMLError, RecipeError) as e:
+                self.errors[name] = str(e)
+                logger.error(f"Invalid recipe {path}: {e}")
+                continue
+            self.errors.pop(name, None)
+            previous = self.recipes.get(name)
+            if previous is None or previous.version != recipe.version:
+                self.recipes[name] = recipe
+                changed += 1
+                logger.info(f"Loaded recipe {name} ({recipe.mode} mode, version {recipe.version})")
+        return changed
+
+    def _load(self, name: str, path: str) -> Recipe:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        data = yaml.safe_load(raw)
+        policy = data.get(POLICY_KEY) if isinstance(data, dict) else None
+        _validate(name, data, policy)
+
+        version = hashlib.sha256(raw).hexdigest()[:12]
+        compiled = {key: value for key, value in data.items() if key != POLICY_KEY}
+        compiled_path = os.path.join(self._compiled_dir, f"{name}.{version}.yaml")
+        if not os.path.exists(compiled_path):
+            with open(compiled_path, 'w', encoding='utf-8') as f:
+                yaml.dump(compiled, f, Dumper=_RecipeDumper, sort_keys=False, allow_unicode=True)
+        return Recipe(name, path, compiled_path, version, data, policy, self.runtime_params)
+
+    async def start(self):
+        """Start watching the recipes directory for changes"""
+        if self.reload_interval > 0 and self._reload_task is None:
+            self._reload_task = asyncio.create_task(self._reload_loop())
+
+    async def close(self):
+        if self._reload_task is not None:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+        shutil.rmtree(self._compiled_dir, ignore_errors=True)
+
+    async def _reload_loop(self):
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                if self.reload():
+                    self.reloads += 1
+            except Exception as e:
+                logger.warning(f"Failed to reload recipes: {e}")
+
+    def get_stats(self) -> Dict:
+        """Get loaded recipes, their policies and any validation errors"""
+        return {
+            'loaded': {name: recipe.describe() for name, recipe in self.recipes.items()},
+            'errors': dict(self.errors),
+            'reloads': self.reloads,
+        }
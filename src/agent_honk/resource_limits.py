@@ -0,0 +1,222 @@
+import asyncio
+import os
+import shutil
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+IONICE_CLASSES = {'realtime': '1', 'best-effort': '2', 'idle': '3'}
+
+
+def _env_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+class ResourceLimits:
+    """OS-level limits and scheduling priority applied to each Goose process
+
+    Limits are inherited by every tool process Goose spawns. Note that
+    RLIMIT_NPROC counts all processes of the bot's user, not just the group.
+    They are applied by prefixing the command with `prlimit`, `nice` and
+    `ionice` rather than in a preexec_fn, which isn't safe to run after a
+    fork in a process with threads.
+    """
+
+    def __init__(
+        self,
+        cpu_seconds: Optional[int] = None,
+        address_space_bytes: Optional[int] = None,
+        open_files: Optional[int] = None,
+        processes: Optional[int] = None,
+        nice: Optional[int] = None,
+        ionice_class: Optional[str] = None,
+        ionice_level: Optional[int] = None,
+    ):
+        self.cpu_seconds = cpu_seconds
+        self.address_space_bytes = address_space_bytes
+        self.open_files = open_files
+        self.processes = processes
+        self.nice = nice
+        self.ionice_class = ionice_class
+        self.ionice_level = ionice_level
+        self._ionice = shutil.which('ionice') if ionice_class else None
+        if ionice_class and not self._ionice:
+            logger.warning("GOOSE_IONICE_CLASS is set but the ionice command is not available")
+        self._prlimit = shutil.which('prlimit') if self._rlimits() else None
+        if self._rlimits() and not self._prlimit:
+            logger.warning("GOOSE_RLIMIT_* is set but the prlimit command is not available")
+        self._nice = shutil.which('nice') if nice else None
+        if nice and not self._nice:
+            logger.warning("GOOSE_NICE is set but the nice command is not available")
+
+    @classmethod
+    def from_env(cls) -> "ResourceLimits":
+        """Build limits from GOOSE_RLIMIT_*, GOOSE_NICE and GOOSE_IONICE_* environment variables"""
+        address_space_mb = _env_int('GOOSE_RLIMIT_AS_MB')
+        return cls(
+            cpu_seconds=_env_int('GOOSE_RLIMIT_CPU_SECONDS'),
+            address_space_bytes=address_space_mb * 1024 * 1024 if address_space_mb else None,
+            open_files=_env_int('GOOSE_RLIMIT_NOFILE'),
+            processes=_env_int('GOOSE_RLIMIT_NPROC'),
+            nice=_env_int('GOOSE_NICE'),
+            ionice_class=os.getenv('GOOSE_IONICE_CLASS') or None,
+            ionice_level=_env_int('GOOSE_IONICE_LEVEL'),
+        )
+
+    def _rlimits(self) -> List[Tuple[str, int]]:
+        """(prlimit option, value) pairs, soft limits capped at the hard limit the child inherits"""
+        if resource is None:
+            return []
+        limits = []
+        for option, limit, value in (
+            ('--cpu', resource.RLIMIT_CPU, self.cpu_seconds),
+            ('--as', resource.RLIMIT_AS, self.address_space_bytes),
+            ('--nofile', resource.RLIMIT_NOFILE, self.open_files),
+            ('--nproc', resource.RLIMIT_NPROC, self.processes),
+        ):
+            if not value:
+                continue
+            _, hard = resource.getrlimit(limit)
+            if hard != resource.RLIM_INFINITY:
+                value = min(value, hard)
+            limits.append((option, value))
+        return limits
+
+    def wrap_command(self, cmd_args: List[str]) -> List[str]:
+        """Prefix a command with ionice, nice and prlimit for whatever is configured"""
+        prefix = []
+        if self._ionice:
+            prefix += [self._ionice, '-c', IONICE_CLASSES.get(self.ionice_class, self.ionice_class)]
+            if self.ionice_level is not None and self.ionice_class != 'idle':
+                prefix += ['-n', str(self.ionice_level)]
+        if self._nice:
+            prefix += [self._nice, '-n', str(self.nice)]
+        if self._prlimit:
+            # `value:` sets only the soft limit, leaving the hard limit as inherited
+            prefix += [self._prlimit] + [f'{option}={value}:' for option, value in self._rlimits()]
+        return prefix + cmd_args
+
+    def describe(self) -> Dict:
+        """Get the configured limits"""
+        return {
+            'cpu_seconds': self.cpu_seconds,
+            'address_space_mb': self.address_space_bytes // (1024 * 1024) if self.address_space_bytes else None,
+            'open_files': self.open_files,
+            'processes': self.processes,
+            'nice': self.nice if self._nice else None,
+            'ionice_class': self.ionice_class if self._ionice else None,
+        }
+
+
+class ProcessUsage:
+    """Peak resource usage observed for one process group"""
+
+    def __init__(self):
+        self.samples = 0
+        self.peak_rss_bytes = 0
+        self.peak_processes = 0
+        self.cpu_seconds = 0.0
+
+
+class ResourceMonitor:
+    """Samples /proc to record peak memory and CPU time of watched process groups
+
+    One background task scans /proc for all watched groups at once, so the
+    cost doesn't grow with the number of concurrent Goose runs.
+    """
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.available = os.path.isdir('/proc/self')
+        self.watched: Dict[int, ProcessUsage] = {}  # pgid -> usage so far
+        self.by_mode: Dict[str, List[ProcessUsage]] = {}  # mode -> recent finished runs
+        self._task: Optional[asyncio.Task] = None
+        self._clock_ticks = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+        self._page_size = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+    def watch(self, pgid: int):
+        """Start sampling a process group"""
+        if not self.available:
+            return
+        self.watched[pgid] = ProcessUsage()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._sample_loop())
+
+    def unwatch(self, pgid: int, mode: str) -> Optional[ProcessUsage]:
+        """Stop sampling a process group and record its usage under a mode"""
+        usage = self.watched.pop(pgid, None)
+        if usage is None or not usage.samples:
+            return None
+        history = self.by_mode.setdefault(mode, [])
+        history.append(usage)
+        del history[:-100]
+        return usage
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _sample_loop(self):
+        while self.watched:
+            try:
+                totals = await asyncio.to_thread(self._scan, set(self.watched))
+            except Exception as e:
+                logger.warning(f"Failed to sample process usage: {e}")
+                totals = {}
+            for pgid, (rss, cpu, count) in totals.items():
+                usage = self.watched.get(pgid)
+                if usage is None:
+                    continue
+                usage.samples += 1
+                usage.peak_rss_bytes = max(usage.peak_rss_bytes, rss)
+                usage.peak_processes = max(usage.peak_processes, count)
+                usage.cpu_seconds = max(usage.cpu_seconds, cpu)
+            await asyncio.sleep(self.interval)
+
+    def _scan(self, pgids) -> Dict[int, Tuple[int, float, int]]:
+        totals: Dict[int, Tuple[int, float, int]] = {}
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat', 'r') as f:
+                    fields = f.read().rsplit(')', 1)[1].split()
+            except (OSError, IndexError):
+                continue
+            pgid = int(fields[2])
+            if pgid not in pgids:
+                continue
+            # utime, stime, cutime, cstime are in clock ticks; rss is in pages
+            cpu = sum(int(value) for value in fields[11:15]) / self._clock_ticks
+            rss = int(fields[21]) * self._page_size
+            previous = totals.get(pgid, (0, 0.0, 0))
+            totals[pgid] = (previous[0] + rss, previous[1] + cpu, previous[2] + 1)
+        return totals
+
+    def get_stats(self) -> Dict:
+        """Get peak usage statistics per mode over recent runs"""
+        stats = {}
+        for mode, runs in self.by_mode.items():
+            peaks = [usage.peak_rss_bytes for usage in runs]
+            cpu = [usage.cpu_seconds for usage in runs]
+            stats[mode] = {
+                'runs_sampled': len(runs),
+                'peak_rss_mb_max': round(max(peaks) / (1024 * 1024), 1),
+                'peak_rss_mb_avg': round(sum(peaks) / len(peaks) / (1024 * 1024), 1),
+                'cpu_seconds_max': round(max(cpu), 2),
+                'cpu_seconds_avg': round(sum(cpu) / len(cpu), 2),
+                'peak_processes_max': max(usage.peak_processes for usage in runs),
+            }
+        return stats
@@ -0,0 +1,268 @@
+import asyncio
+import math
+import os
+import shutil
+import tempfile
+import time
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from .process_utils import terminate_process_group
+from .resource_limits import ResourceLimits
+from .workspace_template import WorkspaceTemplate
+
+logger = logging.getLogger(__name__)
+
+
+class IdleProcess:
+    """A started `goose run -i -` process waiting for its prompt on stdin"""
+
+    def __init__(self, process: asyncio.subprocess.Process, expires_at: float, leased: bool = False):
+        self.process = process
+        self.expires_at = expires_at
+        self.leased = leased  # reserved for a thread's next turn rather than started for the pool
+
+
+class SessionPool:
+    """Keeps ready-to-use session workspaces created ahead of demand
+
+    Workspaces are temp directories seeded from the workspace template. Optionally each
+    one also gets an idle Goose process started in it, which the next plain
+    turn or tool-less recipe run in that workspace (such as the first turn of
+    a /session thread) can use instead of spawning a new one. A
+    background task keeps the pool at a target size derived from the recent
+    session creation rate. A thread's own workspace can also have a process
+    reserved with a short lease while its user is typing the next message.
+    """
+
+    def __init__(
+        self,
+        goose_command: str,
+        template: WorkspaceTemplate,
+        limits: Optional[ResourceLimits] = None,
+        min_size: int = 2,
+        max_size: int = 16,
+        lead_seconds: float = 30.0,
+        rate_window: float = 300.0,
+        prestart: bool = False,
+        process_ttl: float = 300.0,
+        refill_interval: float = 1.0,
+        max_leases: int = 4,
+    ):
+        self.goose_command = goose_command
+        self.template = template
+        self.limits = limits or ResourceLimits()
+        self.min_size = min_size
+        self.max_size = max_size
+        self.lead_seconds = lead_seconds
+        self.rate_window = rate_window
+        self.prestart = prestart
+        self.process_ttl = process_ttl
+        self.refill_interval = refill_interval
+        self.max_leases = max_leases
+        self.ready: Deque[str] = deque()  # workspace paths waiting to be handed out
+        self.idle_processes: Dict[str, IdleProcess] = {}  # workspace path -> idle process
+        self.hits = 0
+        self.misses = 0
+        self.leases = 0
+        self.leases_used = 0
+        self.leases_expired = 0
+        self._acquired_at: Deque[float] = deque()
+        self._refill_task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, goose_command: str, template: WorkspaceTemplate, limits: Optional[ResourceLimits] = None) -> "SessionPool":
+        """Build a pool from GOOSE_POOL_* environment variables"""
+        return cls(
+            goose_command,
+            template,
+            limits,
+            min_size=int(os.getenv('GOOSE_POOL_MIN_SIZE', '2')),
+            max_size=int(os.getenv('GOOSE_POOL_MAX_SIZE', '16')),
+            lead_seconds=float(os.getenv('GOOSE_POOL_LEAD_SECONDS', '30')),
+            rate_window=float(os.getenv('GOOSE_POOL_RATE_WINDOW', '300')),
+            prestart=os.getenv('GOOSE_POOL_PRESTART', '').lower() in ('1', 'true', 'yes'),
+            process_ttl=float(os.getenv('GOOSE_POOL_PROCESS_TTL', '300')),
+            max_leases=int(os.getenv('GOOSE_PREFETCH_MAX_LEASES', '4')),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def creation_rate(self) -> float:
+        """Sessions created per second over the recent window"""
+        cutoff = time.monotonic() - self.rate_window
+        while self._acquired_at and self._acquired_at[0] < cutoff:
+            self._acquired_at.popleft()
+        return len(self._acquired_at) / self.rate_window
+
+    def target_size(self) -> int:
+        """Number of workspaces to keep ready to cover the next lead_seconds of demand"""
+        wanted = math.ceil(self.creation_rate() * self.lead_seconds)
+        return max(self.min_size, min(self.max_size, wanted))
+
+    async def acquire(self, thread_id: str) -> str:
+        """Get a workspace for a new session, creating one in a thread if the pool is empty"""
+        self._acquired_at.append(time.monotonic())
+        if self.ready:
+            self.hits += 1
+            session_dir = self.ready.popleft()
+            logger.info(f"Using pre-warmed workspace {session_dir} for thread {thread_id}")
+            return session_dir
+
+        self.misses += 1
+        # Materializing may restage the template, and waits while the refill task uses it
+        return await asyncio.to_thread(self._create_workspace, f"goose_session_{thread_id}_")
+
+    def take_process(self, session_dir: str) -> Optional[asyncio.subprocess.Process]:
+        """Take the idle Goose process waiting in a workspace, if it is still usable"""
+        idle = self.idle_processes.pop(session_dir, None)
+        if idle is None:
+            return None
+        if idle.process.returncode is not None or idle.expires_at < time.monotonic():
+            asyncio.ensure_future(terminate_process_group(idle.process))
+            return None
+        if idle.leased:
+            self.leases_used += 1
+        return idle.process
+
+    async def reserve(self, session_dir: str, lease: float) -> bool:
+        """Have an idle Goose process waiting in a thread's workspace for the next `lease` seconds
+
+        An existing idle process has its lease extended instead. The process is
+        stopped when the lease runs out without a turn taking it.
+        """
+        expires_at = time.monotonic() + lease
+        idle = self.idle_processes.get(session_dir)
+        if idle is not None and idle.process.returncode is None:
+            idle.expires_at = max(idle.expires_at, expires_at)
+            return True
+        if sum(1 for idle in self.idle_processes.values() if idle.leased) >= self.max_leases:
+            return False
+        idle = await self._start_idle_process(session_dir, expires_at, leased=True)
+        if idle is None:
+            return False
+        self.leases += 1
+        asyncio.get_running_loop().call_later(lease, self._end_lease, session_dir, idle)
+        return True
+
+    def _end_lease(self, session_dir: str, idle: IdleProcess):
+        if self.idle_processes.get(session_dir) is not idle:
+            return  # taken by a turn or already stopped
+        remaining = idle.expires_at - time.monotonic()
+        if remaining > 0:
+            # Extended by another reserve() in the meantime
+            asyncio.get_running_loop().call_later(remaining, self._end_lease, session_dir, idle)
+            return
+        self.leases_expired += 1
+        self.discard(session_dir)
+
+    def discard(self, session_dir: str):
+        """Schedule termination of any idle process parked in a workspace"""
+        idle = self.idle_processes.pop(session_dir, None)
+        if idle is not None:
+            asyncio.ensure_future(terminate_process_group(idle.process))
+
+    async def release(self, session_dir: str):
+        """Stop any idle process parked in a workspace that is being cleaned up"""
+        idle = self.idle_processes.pop(session_dir, None)
+        if idle is not None:
+            await terminate_process_group(idle.process)
+
+    async def start(self):
+        """Fill the pool and start the background refill task"""
+        if not self.enabled or self._refill_task is not None:
+            return
+        self._stopping.clear()
+        self._refill_task = asyncio.create_task(self._refill_loop())
+
+    async def close(self):
+        """Stop refilling and remove all workspaces that were never handed out"""
+        if self._refill_task is not None:
+            # Let the refill task stop by itself: cancelling it while it spawns a
+            # process can leave the spawn waiting for its pipes forever
+            self._stopping.set()
+            await self._refill_task
+            self._refill_task = None
+
+        for session_dir in list(self.idle_processes):
+            await self.release(session_dir)
+        while self.ready:
+            shutil.rmtree(self.ready.popleft(), ignore_errors=True)
+
+    def get_stats(self) -> Dict:
+        """Get statistics about the pool"""
+        return {
+            'ready': len(self.ready),
+            'target': self.target_size(),
+            'idle_processes': len(self.idle_processes),
+            'hits': self.hits,
+            'misses': self.misses,
+            'leases': self.leases,
+            'leases_used': self.leases_used,
+            'leases_expired': self.leases_expired,
+            'creation_rate_per_min': round(self.creation_rate() * 60, 2),
+        }
+
+    async def _refill_loop(self):
+        while not self._stopping.is_set():
+            try:
+                await self._expire_processes()
+                target = self.target_size()
+                while len(self.ready) < target and not self._stopping.is_set():
+                    session_dir = await asyncio.to_thread(self._create_workspace)
+                    if self.prestart:
+                        await self._start_idle_process(session_dir, time.monotonic() + self.process_ttl)
+                    self.ready.append(session_dir)
+                if len(self.ready) > target:
+                    # Shrink gently so a short lull doesn't throw away the pool
+                    session_dir = self.ready.pop()
+                    await self.release(session_dir)
+                    await asyncio.to_thread(shutil.rmtree, session_dir, True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error refilling session pool: {e}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _expire_processes(self):
+        now = time.monotonic()
+        expired: List[str] = [
+            session_dir for session_dir, idle in self.idle_processes.items()
+            if idle.expires_at < now or idle.process.returncode is not None
+        ]
+        for session_dir in expired:
+            if self.idle_processes[session_dir].leased:
+                self.leases_expired += 1
+            await self.release(session_dir)
+            # Workspaces still in the pool get a fresh process
+            if self.prestart and session_dir in self.ready:
+                await self._start_idle_process(session_dir, time.monotonic() + self.process_ttl)
+
+    async def _start_idle_process(self, session_dir: str, expires_at: float, leased: bool = False) -> Optional[IdleProcess]:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *self.limits.wrap_command([self.goose_command, 'run', '--no-session', '-i', '-']),
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+                cwd=session_dir,
+                start_new_session=True
+            )
+        except FileNotFoundError:
+            logger.error(f"Goose command not found, disabling process prestart: {self.goose_command}")
+            self.prestart = False
+            return None
+        idle = self.idle_processes[session_dir] = IdleProcess(process, expires_at, leased)
+        return idle
+
+    def _create_workspace(self, prefix: str = "goose_session_pool_") -> str:
+        session_dir = tempfile.mkdtemp(prefix=prefix)
+        self.template.materialize(session_dir)
+        return session_dir
@@ -0,0 +1,62 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class _Flight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into a single in-flight run
+
+    Every caller gets the shared result. A caller being cancelled only stops the
+    shared run when it was the last one still waiting for it.
+    """
+
+    def __init__(self):
+        self.in_flight: Dict[str, _Flight] = {}
+        self.runs = 0
+        self.coalesced = 0
+
+    async def do(self, key: str, factory: Callable[[], Awaitable[T]]) -> T:
+        """Run factory() for key, or join the run already in flight for it"""
+        flight = self.in_flight.get(key)
+        if flight is None:
+            self.runs += 1
+            flight = _Flight(asyncio.ensure_future(factory()))
+            self.in_flight[key] = flight
+            flight.task.add_done_callback(lambda _: self._finished(key, flight))
+        else:
+            self.coalesced += 1
+            logger.info(f"Joining in-flight run for {key[:80]} ({flight.waiters} already waiting)")
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                # Nobody else wants the result, and late joiners should start afresh
+                self._finished(key, flight)
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _finished(self, key: str, flight: _Flight):
+        if self.in_flight.get(key) is flight:
+            del self.in_flight[key]
+
+    def get_stats(self) -> Dict:
+        """Get coalescing statistics"""
+        return {
+            'runs': self.runs,
+            'coalesced': self.coalesced,
+            'in_flight': len(self.in_flight),
+        }
@@ -0,0 +1,29 @@
+import time
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Records how long each phase of bot startup takes"""
+
+    def __init__(self, target_seconds: Optional[float] = None):
+        self.started = time.perf_counter()
+        self.target_seconds = target_seconds
+        self.marks: Dict[str, float] = {}  # phase -> seconds since start
+
+    def mark(self, phase: str):
+        """Record that a phase finished; only the first occurrence counts"""
+        if phase not in self.marks:
+            self.marks[phase] = time.perf_counter() - self.started
+
+    def report(self) -> Dict[str, float]:
+        """Log the startup timeline and warn if it exceeded the target"""
+        timeline = ", ".join(f"{phase}={seconds:.2f}s" for phase, seconds in self.marks.items())
+        logger.info(f"Startup timeline: {timeline}")
+
+        total = max(self.marks.values(), default=0.0)
+        if self.target_seconds is not None and total > self.target_seconds:
+            logger.warning(f"Cold start took {total:.2f}s, over the {self.target_seconds:.2f}s target")
+        return dict(self.marks)
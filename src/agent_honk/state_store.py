@@ -0,0 +1,142 @@
+import importlib
+import json
+import os
+import sqlite3
+import threading
+import logging
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class StateStore:
+    """Pluggable storage for bot state that must be shared between shards
+
+    State is exposed as named mappings of string keys to JSON-compatible
+    values. Values read from a shared store are copies, so changes to a nested
+    value must be written back with `mapping[key] = value`.
+    """
+
+    def mapping(self, namespace: str) -> MutableMapping:
+        """Get the mapping for a namespace"""
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemoryStateStore(StateStore):
+    """Process-local store; the default for a single-process bot"""
+
+    def __init__(self):
+        self.namespaces: Dict[str, Dict[str, Any]] = {}
+
+    def mapping(self, namespace: str) -> MutableMapping:
+        return self.namespaces.setdefault(namespace, {})
+
+
+class SQLiteMapping(MutableMapping):
+    """A namespace of a SQLiteStateStore"""
+
+    def __init__(self, store: "SQLiteStateStore", namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def __getitem__(self, key: str) -> Any:
+        row = self.store._fetchone(
+            "SELECT value FROM state WHERE namespace = ? AND key = ?", (self.namespace, key)
+        )
+        if row is None:
+            raise KeyError(key)
+        return json.loads(row[0])
+
+    def __setitem__(self, key: str, value: Any):
+        self.store._execute(
+            "INSERT INTO state (namespace, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET value = excluded.value",
+            (self.namespace, key, json.dumps(value)),
+        )
+
+    def __delitem__(self, key: str):
+        if not self.store._execute("DELETE FROM state WHERE namespace = ? AND key = ?", (self.namespace, key)):
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        return self.store._fetchone(
+            "SELECT 1 FROM state WHERE namespace = ? AND key = ?", (self.namespace, key)
+        ) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        rows = self.store._fetchall("SELECT key FROM state WHERE namespace = ?", (self.namespace,))
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        return self.store._fetchone("SELECT COUNT(*) FROM state WHERE namespace = ?", (self.namespace,))[0]
+
+    def items(self):
+        rows = self.store._fetchall("SELECT key, value FROM state WHERE namespace = ?", (self.namespace,))
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+
+class SQLiteStateStore(StateStore):
+    """Store backed by a SQLite file that every shard process on a host opens"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False, timeout=30)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS state ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "PRIMARY KEY (namespace, key))"
+            )
+
+    def _execute(self, sql: str, params=()) -> int:
+        with self._lock:
+            return self._conn.execute(sql, params).rowcount
+
+    def _fetchone(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _fetchall(self, sql: str, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def mapping(self, namespace: str) -> MutableMapping:
+        return SQLiteMapping(self, namespace)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def load_state_store(url: Optional[str] = None) -> StateStore:
+    """Create a state store from a URL
+
+    Empty or `memory` keeps state in-process. `sqlite:///path/to/state.db`
+    shares it through a SQLite file. `package.module:ClassName[?argument]`
+    loads a custom backend, constructed with the text after `?` (if any).
+    """
+    url = url if url is not None else os.getenv('AGENT_HONK_STATE_STORE', '')
+    if not url or url == 'memory':
+        return MemoryStateStore()
+    if url.startswith('sqlite://'):
+        path = url[len('sqlite://'):]
+        if not path:
+            from .paths import get_state_dir
+            path = os.path.join(get_state_dir(), 'state.db')
+        logger.info(f"Sharing bot state through {path}")
+        return SQLiteStateStore(path)
+
+    target, _, argument = url.partition('?')
+    module_name, _, class_name = target.partition(':')
+    backend = getattr(importlib.import_module(module_name), class_name)
+    logger.info(f"Using state store backend {target}")
+    return backend(argument) if argument else backend()
@@ -1,109 +1,128 @@
+import time
 import logging
-from typing import Set, Dict, Optional, List
+from collections import OrderedDict
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
 
+from .state_store import MemoryStateStore, StateStore
+
 logger = logging.getLogger(__name__)
 
 
 class ThreadManager:
     """Manages Discord thread state and ownership for Goose sessions"""
-    
-    def __init__(self):
-        self.goose_threads: Set[str] = set()
-        self.thread_owners: Dict[str, int] = {}  # thread_id -> user_id
-        self.thread_created: Dict[str, datetime] = {}  # thread_id -> creation_time
-        self.thread_last_activity: Dict[str, datetime] = {}  # thread_id -> last_message_time
-    
+
+    def __init__(self, store: Optional[StateStore] = None, cache_size: int = 4096, cache_ttl: float = 30.0):
+        # thread_id -> {'owner_id', 'created', 'last_activity'} (times as timestamps)
+        # The store may be shared with other shards, so records are always written back whole
+        self.store = store or MemoryStateStore()
+        self.threads = self.store.mapping('threads')
+        # thread_id -> (owner_id or None for other threads, monotonic time the entry was cached)
+        # Event handlers ask about every message; a shared store would be queried on the event loop
+        self.owners: "OrderedDict[str, Tuple[Optional[int], float]]" = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+
     def register_thread(self, thread_id: str, user_id: int):
         """Register a new Goose thread"""
-        self.goose_threads.add(thread_id)
-        self.thread_owners[thread_id] = user_id
-        now = datetime.now()
-        self.thread_created[thread_id] = now
-        self.thread_last_activity[thread_id] = now
-        
+        now = datetime.now().timestamp()
+        self.threads[thread_id] = {
+            'owner_id': user_id,
+            'created': now,
+            'last_activity': now,
+        }
+        self._remember(thread_id, user_id)
+
         logger.info(f"Registered new Goose thread {thread_id} for user {user_id}")
-    
+
     def is_goose_thread(self, thread_id: str) -> bool:
         """Check if a thread is a registered Goose thread"""
-        return thread_id in self.goose_threads
-    
+        return self.get_thread_owner(thread_id) is not None
+
     def get_thread_owner(self, thread_id: str) -> Optional[int]:
         """Get the owner of a thread"""
-        return self.thread_owners.get(thread_id)
-    
+        cached = self.owners.get(thread_id)
+        # Changes made by other shards are noticed once the entry expires
+        if cached is not None and time.monotonic() - cached[1] < self.cache_ttl:
+            self.owners.move_to_end(thread_id)
+            return cached[0]
+        record = self.threads.get(thread_id)
+        owner_id = record['owner_id'] if record else None
+        self._remember(thread_id, owner_id)
+        return owner_id
+
+    def _remember(self, thread_id: str, owner_id: Optional[int]):
+        self.owners[thread_id] = (owner_id, time.monotonic())
+        self.owners.move_to_end(thread_id)
+        while len(self.owners) > self.cache_size:
+            self.owners.popitem(last=False)
+
     def update_activity(self, thread_id: str):
         """Update the last activity time for a thread"""
-        if thread_id in self.goose_threads:
-            self.thread_last_activity[thread_id] = datetime.now()
-    
+        record = self.threads.get(thread_id)
+        if record:
+            record['last_activity'] = datetime.now().timestamp()
+            self.threads[thread_id] = record
+
     def unregister_thread(self, thread_id: str):
         """Remove a thread from tracking"""
-        if thread_id in self.goose_threads:
-            self.goose_threads.discard(thread_id)
-            self.thread_owners.pop(thread_id, None)
-            self.thread_created.pop(thread_id, None)
-            self.thread_last_activity.pop(thread_id, None)
+        self._remember(thread_id, None)
+        if self.threads.pop(thread_id, None) is not None:
             logger.info(f"Unregistered Goose thread {thread_id}")
-    
+
     def get_thread_info(self, thread_id: str) -> Optional[Dict]:
         """Get information about a thread"""
-        if thread_id not in self.goose_threads:
+        record = self.threads.get(thread_id)
+        if not record:
             return None
-            
+        return self._info(thread_id, record)
+
+    def _info(self, thread_id: str, record: Dict) -> Dict:
         return {
             'thread_id': thread_id,
-            'owner_id': self.thread_owners.get(thread_id),
-            'created': self.thread_created.get(thread_id),
-            'last_activity': self.thread_last_activity.get(thread_id)
+            'owner_id': record['owner_id'],
+            'created': datetime.fromtimestamp(record['created']),
+            'last_activity': datetime.fromtimestamp(record['last_activity'])
         }
-    
+
     def get_all_threads(self) -> List[Dict]:
         """Get information about all registered threads"""
-        threads = []
-        for thread_id in self.goose_threads:
-            info = self.get_thread_info(thread_id)
-            if info:
-                threads.append(info)
-        return threads
-    
+        return [self._info(thread_id, record) for thread_id, record in self.threads.items()]
+
     def get_inactive_threads(self, hours: int = 24) -> List[str]:
         """Get threads that have been inactive for more than specified hours"""
-        cutoff = datetime.now() - timedelta(hours=hours)
-        inactive = []
-        
-        for thread_id, last_activity in self.thread_last_activity.items():
-            if last_activity < cutoff:
-                inactive.append(thread_id)
-                
-        return inactive
-    
+        cutoff = (datetime.now() - timedelta(hours=hours)).timestamp()
+        return [
+            thread_id for thread_id, record in self.threads.items()
+            if record['last_activity'] < cutoff
+        ]
+
     def get_user_threads(self, user_id: int) -> List[str]:
         """Get all threads owned by a specific user"""
         return [
-            thread_id for thread_id, owner_id in self.thread_owners.items()
-            if owner_id == user_id
+            thread_id for thread_id, record in self.threads.items()
+            if record['owner_id'] == user_id
         ]
-    
+
     def get_stats(self) -> Dict:
         """Get statistics about managed threads"""
-        now = datetime.now()
-        active_count = len(self.goose_threads)
-        
+        now = datetime.now().timestamp()
+        records = list(self.threads.values())
+
         # Count threads by age
         recent_count = 0  # < 1 hour
         today_count = 0   # < 24 hours
-        
-        for created_time in self.thread_created.values():
-            age = now - created_time
-            if age < timedelta(hours=1):
+
+        for record in records:
+            age = now - record['created']
+            if age < timedelta(hours=1).total_seconds():
                 recent_count += 1
-            if age < timedelta(hours=24):
+            if age < timedelta(hours=24).total_seconds():
                 today_count += 1
-        
+
         return {
-            'total_active_threads': active_count,
+            'total_active_threads': len(records),
             'threads_created_today': today_count,
             'threads_created_recently': recent_count,
-            'unique_users': len(set(self.thread_owners.values()))
+            'unique_users': len(set(record['owner_id'] for record in records))
         }
@@ -0,0 +1,261 @@
+import json
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+import logging
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# Each record is a header followed by its compressed payload
+RECORD_MAGIC = b'HNK1'
+RECORD_HEADER = struct.Struct('>4sII')  # magic, compressed length, crc32 of the compressed bytes
+
+# Text most transcripts share, given to zlib up front so short transcripts
+# compress well without a window of their own to learn from. Records name the
+# dictionary version they were written with, so this can only be extended by
+# adding a new version.
+ZDICT_VERSION = 1
+ZDICTS = {
+    1: (
+        b'"session_logs":[{"path":"","entries":["{\\"role\\":\\"user\\",\\"created\\":'
+        b',\\"content\\":[{\\"type\\":\\"text\\",\\"text\\":\\"'
+        b'{\\"role\\":\\"assistant\\",\\"created\\":'
+        b'{\\"type\\":\\"toolRequest\\",\\"id\\":\\"'
+        b'{\\"type\\":\\"toolResponse\\",\\"id\\":\\"'
+        b'\\"toolCall\\":{\\"status\\":\\"success\\",\\"value\\":{\\"name\\":\\"developer__shell\\",\\"arguments\\":{\\"command\\":\\"'
+        b'https://block.github.io/goose/docs/ goose recipe session extension provider Goose '
+        b'{"role":"assistant","content":"'
+        b'{"role":"user","content":"'
+        b'"thread_id":"","user_id":,"archived_at":,"messages":['
+    ),
+}
+
+
+def _compress(data: bytes, level: int) -> bytes:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, zlib.MAX_WBITS, zdict=ZDICTS[ZDICT_VERSION])
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(data: bytes, zdict_version: int) -> bytes:
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS, zdict=ZDICTS[zdict_version])
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+class TranscriptArchive:
+    """Append-only, compressed store of finished conversations
+
+    Transcripts are compressed one by one and appended to segment files that
+    roll over at `segment_bytes`; nothing is rewritten once written. A SQLite
+    index maps each transcript to its segment and offset and allows listing by
+    thread, user and day, so reading one back is a single seek and read. Shard
+    processes can share an archive directory: appends take a file lock.
+    """
+
+    def __init__(self, directory: str, segment_bytes: int = 64 * 1024 * 1024, level: int = 9):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.level = level
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        # Index totals for get_stats, loaded once and then counted up by append
+        self._totals: Optional[Dict] = None
+
+    @classmethod
+    def from_env(cls) -> Optional["TranscriptArchive"]:
+        """Build an archive in TRANSCRIPT_ARCHIVE_DIR (default: the state dir), unless TRANSCRIPT_ARCHIVE=false"""
+        if os.getenv('TRANSCRIPT_ARCHIVE', 'true').lower() in ('0', 'false', 'no'):
+            return None
+        directory = os.getenv('TRANSCRIPT_ARCHIVE_DIR')
+        if not directory:
+            from .paths import get_state_dir
+            directory = os.path.join(get_state_dir(), 'transcripts')
+        return cls(
+            os.path.expanduser(directory),
+            segment_bytes=int(os.getenv('TRANSCRIPT_SEGMENT_MB', '64')) * 1024 * 1024,
+        )
+
+    def _db(self) -> sqlite3.Connection:
+        # Opened on first use, so an archive nothing is written to leaves no files behind
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, 'index.sqlite'), isolation_level=None, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS transcripts ("
+                "id INTEGER PRIMARY KEY, thread_id TEXT NOT NULL, user_id INTEGER, day TEXT NOT NULL, "
+                "archived_at REAL NOT NULL, segment INTEGER NOT NULL, offset INTEGER NOT NULL, "
+                "length INTEGER NOT NULL, raw_bytes INTEGER NOT NULL, messages INTEGER NOT NULL, "
+                "zdict INTEGER NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS transcripts_thread ON transcripts (thread_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS transcripts_user ON transcripts (user_id, day)")
+            conn.execute("CREATE INDEX IF NOT EXISTS transcripts_day ON transcripts (day)")
+            self._conn = conn
+        return self._conn
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment:06d}.z")
+
+    def _current_segment(self) -> int:
+        segments = [
+            int(name[len('segment-'):-len('.z')]) for name in os.listdir(self.directory)
+            if name.startswith('segment-') and name.endswith('.z')
+        ]
+        segment = max(segments, default=1)
+        path = self._segment_path(segment)
+        if os.path.exists(path) and os.path.getsize(path) >= self.segment_bytes:
+            segment += 1
+        return segment
+
+    def append(self, thread_id: str, user_id: Optional[int], transcript: Dict) -> int:
+        """Compress and append a transcript, returning its id in the index"""
+        archived_at = time.time()
+        record = dict(transcript, thread_id=thread_id, user_id=user_id, archived_at=archived_at)
+        raw = json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        payload = _compress(raw, self.level)
+        header = RECORD_HEADER.pack(RECORD_MAGIC, len(payload), zlib.crc32(payload))
+        day = datetime.fromtimestamp(archived_at, timezone.utc).strftime('%Y-%m-%d')
+        messages = len(transcript.get('messages', [])) + sum(len(log['entries']) for log in transcript.get('session_logs', []))
+
+        with self._lock, self._append_lock():
+            segment = self._current_segment()
+            with open(self._segment_path(segment), 'ab') as f:
+                offset = f.tell() + RECORD_HEADER.size
+                f.write(header + payload)
+                f.flush()
+                os.fsync(f.fileno())
+            cursor = self._db().execute(
+                "INSERT INTO transcripts (thread_id, user_id, day, archived_at, segment, offset, length, raw_bytes, messages, zdict) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, user_id, day, archived_at, segment, offset, len(payload), len(raw), messages, ZDICT_VERSION),
+            )
+            if self._totals is None:
+                self._totals = self._count_totals()
+            else:
+                self._totals = {
+                    'transcripts': self._totals['transcripts'] + 1,
+                    'segments': self._totals['segments'] | {segment},
+                    'raw_bytes': self._totals['raw_bytes'] + len(raw),
+                    'stored_bytes': self._totals['stored_bytes'] + len(payload),
+                }
+        logger.info(f"Archived transcript of thread {thread_id}: {len(raw)} bytes stored in {len(payload)}")
+        return cursor.lastrowid
+
+    @contextmanager
+    def _append_lock(self):
+        """Hold the archive's file lock so other processes don't append at the same time"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, '.lock'), 'a') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _query(self, sql: str, params=()) -> List:
+        with self._lock:
+            return self._db().execute(sql, params).fetchall()
+
+    def _read(self, segment: int, offset: int, length: int, zdict_version: int) -> Dict:
+        with open(self._segment_path(segment), 'rb') as f:
+            f.seek(offset - RECORD_HEADER.size)
+            magic, stored_length, crc = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            payload = f.read(length)
+        if magic != RECORD_MAGIC or stored_length != length or zlib.crc32(payload) != crc:
+            raise ValueError(f"Corrupt transcript record in segment {segment} at offset {offset}")
+        return json.loads(_decompress(payload, zdict_version))
+
+    def get(self, thread_id: str) -> List[Dict]:
+        """Get every transcript archived for a thread, oldest first"""
+        rows = self._query(
+            "SELECT segment, offset, length, zdict FROM transcripts WHERE thread_id = ? ORDER BY id", (thread_id,)
+        )
+        return [self._read(*row) for row in rows]
+
+    def _where(self, user_id: Optional[int], since: Optional[str], until: Optional[str]):
+        clauses, params = [], []
+        if user_id is not None:
+            clauses.append("user_id = ?")
+            params.append(user_id)
+        if since is not None:
+            clauses.append("day >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("day <= ?")
+            params.append(until)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def find(self, user_id: Optional[int] = None, since: Optional[str] = None, until: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """List index entries by user and/or UTC day range (YYYY-MM-DD, inclusive), newest first"""
+        where, params = self._where(user_id, since, until)
+        rows = self._query(
+            "SELECT id, thread_id, user_id, day, archived_at, raw_bytes, length, messages FROM transcripts"
+            + where + " ORDER BY id DESC LIMIT ?",
+            params + [limit],
+        )
+        keys = ('id', 'thread_id', 'user_id', 'day', 'archived_at', 'raw_bytes', 'stored_bytes', 'messages')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def iter_transcripts(self, user_id: Optional[int] = None, since: Optional[str] = None, until: Optional[str] = None) -> Iterator[Dict]:
+        """Read matching transcripts in the order they are stored, for analytics"""
+        where, params = self._where(user_id, since, until)
+        rows = self._query("SELECT segment, offset, length, zdict FROM transcripts" + where + " ORDER BY segment, offset", params)
+        for row in rows:
+            yield self._read(*row)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _count_totals(self) -> Dict:
+        if self._conn is None and not os.path.exists(os.path.join(self.directory, 'index.sqlite')):
+            return {'transcripts': 0, 'segments': set(), 'raw_bytes': 0, 'stored_bytes': 0}
+        db = self._db()
+        count, raw_bytes, stored_bytes = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(length), 0) FROM transcripts"
+        ).fetchone()
+        segments = {row[0] for row in db.execute("SELECT DISTINCT segment FROM transcripts")}
+        return {'transcripts': count, 'segments': segments, 'raw_bytes': raw_bytes, 'stored_bytes': stored_bytes}
+
+    def load_stats(self):
+        """Count the index totals get_stats reports; blocking, so run it off the event loop"""
+        with self._lock:
+            self._totals = self._count_totals()
+
+    def get_stats(self) -> Dict:
+        """Get the number of transcripts and how well they compress
+
+        Reads totals kept in memory, so it never waits on the index or an
+        append. They are loaded by load_stats or the first append and only
+        count this process's appends after that.
+        """
+        totals = self._totals or {'transcripts': 0, 'segments': set(), 'raw_bytes': 0, 'stored_bytes': 0}
+        raw_bytes, stored_bytes = totals['raw_bytes'], totals['stored_bytes']
+        return {
+            'transcripts': totals['transcripts'],
+            'segments': len(totals['segments']),
+            'raw_bytes': raw_bytes,
+            'stored_bytes': stored_bytes,
+            'ratio': round(raw_bytes / stored_bytes, 1) if stored_bytes else 0.0,
+        }
+
+
+def read_session_log(path: str) -> Optional[Dict]:
+    """Read a Goose session log to archive, keeping its lines as they are"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return {'path': path, 'entries': [line.rstrip('\n') for line in f if line.strip()]}
+    except OSError as e:
+        logger.warning(f"Couldn't read session log {path} for the archive: {e}")
+        return None
@@ -0,0 +1,146 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+import logging
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LoopWatchdog:
+    """Measures event loop lag and dumps stacks when the loop stalls
+
+    A task on the loop ticks every `interval` seconds and records how late each
+    tick ran. A separate thread notices when ticks stop arriving: once the
+    loop has been stuck for `threshold` seconds it logs the loop thread's
+    stack (the code that is blocking) and the stacks of all pending tasks,
+    once per stall.
+    """
+
+    def __init__(self, threshold: float = 1.0, interval: float = 0.1, task_stack_limit: int = 8):
+        self.threshold = threshold
+        self.interval = interval
+        self.task_stack_limit = task_stack_limit
+        self.stalls = 0
+        self.max_lag = 0.0
+        self.lags: Deque[float] = deque(maxlen=600)  # recent tick lags
+        self._last_tick = time.monotonic()
+        self._dumped_for: Optional[float] = None  # tick the last dump was for
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @classmethod
+    def from_env(cls) -> "LoopWatchdog":
+        """Build a watchdog from GOOSE_LOOP_LAG_* environment variables"""
+        return cls(
+            threshold=float(os.getenv('GOOSE_LOOP_LAG_THRESHOLD', '1.0')),
+            interval=float(os.getenv('GOOSE_LOOP_LAG_INTERVAL', '0.1')),
+        )
+
+    async def start(self):
+        """Start ticking on the running loop and watching from a thread"""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._tick_loop())
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    async def close(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval * 5)
+            self._thread = None
+
+    @property
+    def current_lag(self) -> float:
+        """Seconds since the loop last ticked, beyond the expected interval"""
+        return max(0.0, time.monotonic() - self._last_tick - self.interval)
+
+    @property
+    def stalled(self) -> bool:
+        """Whether the loop has gone `threshold` seconds without ticking, readable from any thread"""
+        return self._task is not None and self.current_lag >= self.threshold
+
+    async def _tick_loop(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self.lags.append(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                logger.warning(f"Event loop was blocked for {lag:.2f}s")
+            self._last_tick = now
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            last_tick = self._last_tick
+            if time.monotonic() - last_tick - self.interval < self.threshold:
+                continue
+            if self._dumped_for == last_tick:
+                continue
+            self._dumped_for = last_tick
+            self.stalls += 1
+            try:
+                logger.warning(self.dump())
+            except Exception as e:
+                logger.warning(f"Event loop is stalled, but dumping stacks failed: {e}")
+
+    def dump(self) -> str:
+        """Describe what the loop thread and its tasks are doing right now"""
+        lines = [f"Event loop stalled for {self.current_lag:.2f}s (threshold {self.threshold:.2f}s)"]
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is not None:
+            lines.append("Loop thread stack (most recent call last):")
+            lines.extend(line.rstrip() for line in traceback.format_stack(frame))
+
+        current = asyncio.current_task(self._loop) if self._loop is not None else None
+        if current is not None:
+            lines.append(f"Running task: {current.get_name()} {current.get_coro()!r}")
+        for task in self._pending_tasks():
+            if task is current or task is self._task:
+                continue
+            lines.append(f"Task {task.get_name()} {task.get_coro()!r}:")
+            for task_frame in task.get_stack(limit=self.task_stack_limit):
+                code = task_frame.f_code
+                lines.append(f"  {code.co_filename}:{task_frame.f_lineno} in {code.co_name}")
+        return "\n".join(lines)
+
+    def _pending_tasks(self) -> List[asyncio.Task]:
+        # The task set can change under us since the loop may resume mid-dump
+        for _ in range(3):
+            try:
+                return [task for task in asyncio.all_tasks(self._loop) if not task.done()]
+            except RuntimeError:
+                continue
+        return []
+
+    def get_stats(self) -> Dict:
+        """Get recent and worst loop lag and the number of stalls"""
+        recent = sorted(self.lags)
+        return {
+            'current_lag': round(self.current_lag, 3),
+            'p99_lag': round(recent[min(len(recent) - 1, int(len(recent) * 0.99))], 3) if recent else 0.0,
+            'max_lag': round(self.max_lag, 3),
+            'stalls': self.stalls,
+            'threshold': self.threshold,
+        }
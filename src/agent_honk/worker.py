@@ -0,0 +1,164 @@
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+import uuid
+from typing import Optional, Set
+
+from .goose_client import GooseClient
+from .job_queue import CONTROL_KINDS, TURN_KINDS, Job, JobQueue, load_job_queue
+
+logger = logging.getLogger(__name__)
+
+
+class GooseWorker:
+    """Claims jobs from the queue and runs them with a local GooseClient
+
+    Heartbeats keep this worker's session affinity alive; any worker notices
+    peers that stopped heartbeating and puts their running jobs back on the
+    queue.
+    """
+    
+    def __init__(
+        self,
+        queue: JobQueue,
+        client: Optional[GooseClient] = None,
+        worker_id: Optional[str] = None,
+        concurrency: int = 4,
+        heartbeat_interval: float = 5.0,
+        heartbeat_timeout: float = 30.0,
+        poll_interval: float = 0.25,
+        max_attempts: int = 3,
+    ):
+        self.queue = queue
+        self.client = client or GooseClient()
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.concurrency = concurrency
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.active: Set[asyncio.Task] = set()
+        self._stopping = asyncio.Event()
+    
+    async def run(self):
+        """Process jobs until stop() is called"""
+        logger.info(f"Worker {self.worker_id} starting with concurrency {self.concurrency}")
+        await self.client.start()
+        await asyncio.to_thread(self.queue.heartbeat, self.worker_id)
+        heartbeat = asyncio.create_task(self._heartbeat_loop())
+        try:
+            while not self._stopping.is_set():
+                claimed = await self._claim_next()
+                if not claimed:
+                    try:
+                        await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            heartbeat.cancel()
+            if self.active:
+                await asyncio.gather(*self.active, return_exceptions=True)
+            await self.client.close()
+            logger.info(f"Worker {self.worker_id} stopped")
+    
+    def stop(self):
+        """Stop claiming new jobs; running jobs are allowed to finish"""
+        self._stopping.set()
+    
+    async def _claim_next(self) -> bool:
+        # Control jobs (cancel, cleanup, archive, prepare) are cheap and must not wait behind turns
+        kinds = CONTROL_KINDS + TURN_KINDS if len(self.active) < self.concurrency else CONTROL_KINDS
+        job = await asyncio.to_thread(self.queue.claim, self.worker_id, kinds, self.heartbeat_timeout)
+        if job is None:
+            return False
+        
+        task = asyncio.create_task(self._handle(job))
+        self.active.add(task)
+        task.add_done_callback(self.active.discard)
+        return True
+    
+    async def _handle(self, job: Job):
+        logger.info(f"Worker {self.worker_id} running {job.kind} job {job.job_id} for thread {job.thread_id} (attempt {job.attempts})")
+        try:
+            response = await self._run(job)
+        except Exception as e:
+            logger.error(f"Error running job {job.job_id}: {e}")
+            response = None
+        await asyncio.to_thread(self.queue.complete, job.job_id, {"response": response})
+    
+    async def _run(self, job: Job):
+        client = self.client
+        thread_id = job.thread_id
+        
+        if job.kind == "cancel":
+            return client.cancel(thread_id)
+        if job.kind == "cleanup":
+            await client.cleanup_session(thread_id, transcript=job.payload.get("transcript"))
+            await asyncio.to_thread(self.queue.release_session, thread_id)
+            return True
+        if job.kind == "archive":
+            await client.archive_transcript(thread_id, job.payload["transcript"])
+            return True
+        if job.kind == "prepare":
+            # Only useful on the worker holding the session; anyone else finds nothing to do
+            return await client.prepare_turn(thread_id, job.payload["history"])
+        
+        # This worker now holds the thread's session directory
+        await asyncio.to_thread(self.queue.assign_session, thread_id, self.worker_id)
+        if job.kind == "barebones":
+            return await client.run_barebones(thread_id, job.payload["prompt"])
+        if job.kind == "initial":
+            return await client.run_initial(thread_id, job.payload["prompt"], use_help_recipe=job.payload.get("use_help_recipe", False))
+        if job.kind == "history":
+            # Adopt threads whose worker died; the history carries the context
+            await client.ensure_session(thread_id)
+            return await client.run_with_history(thread_id, job.payload["history"])
+        raise ValueError(f"Unknown job kind: {job.kind}")
+    
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await asyncio.to_thread(self.queue.heartbeat, self.worker_id)
+                requeued = await asyncio.to_thread(self.queue.requeue_dead, self.heartbeat_timeout, self.max_attempts)
+                if requeued:
+                    logger.warning(f"Re-queued {requeued} job(s) from dead workers")
+                await asyncio.to_thread(self.queue.prune_done, 3600)
+            except Exception as e:
+                logger.error(f"Worker heartbeat failed: {e}")
+
+
+async def main(argv=None):
+    """Run a Goose worker that takes jobs from the dispatcher's queue"""
+    parser = argparse.ArgumentParser(description="Run Goose jobs dispatched by Agent Honk")
+    parser.add_argument('--queue', default=os.getenv('GOOSE_JOB_QUEUE'), help="Job queue URL (default: GOOSE_JOB_QUEUE or a SQLite file in the state dir)")
+    parser.add_argument('--worker-id', default=os.getenv('GOOSE_WORKER_ID'), help="Unique id for this worker")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv('GOOSE_WORKER_CONCURRENCY', '4')), help="Turns to run at once")
+    args = parser.parse_args(argv)
+    
+    worker = GooseWorker(
+        load_job_queue(args.queue),
+        worker_id=args.worker_id,
+        concurrency=args.concurrency,
+        heartbeat_interval=float(os.getenv('GOOSE_WORKER_HEARTBEAT_SECONDS', '5')),
+        heartbeat_timeout=float(os.getenv('GOOSE_WORKER_HEARTBEAT_TIMEOUT', '30')),
+        max_attempts=int(os.getenv('GOOSE_JOB_MAX_ATTEMPTS', '3')),
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+    await worker.run()
+
+
+if __name__ == "__main__":
+    from dotenv import load_dotenv
+    
+    load_dotenv()
+    logging.basicConfig(
+        level=getattr(logging, os.getenv('LOG_LEVEL', 'INFO')),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    asyncio.run(main())
@@ -0,0 +1,215 @@
+import errno
+import os
+import shutil
+import stat
+import tempfile
+import threading
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows
+    fcntl = None
+
+# ioctl that makes a file share another's extents (btrfs, XFS, bcachefs); fcntl only names it from Python 3.12
+FICLONE = getattr(fcntl, 'FICLONE', 0x40049409)
+
+LINK_REFLINK = "reflink"
+LINK_HARDLINK = "hardlink"
+LINK_COPY = "copy"
+LINK_MODES = ("auto", LINK_REFLINK, LINK_HARDLINK, LINK_COPY)
+
+# Errors meaning "this filesystem can't do that", as opposed to real failures
+_UNSUPPORTED = {errno.EXDEV, errno.EOPNOTSUPP, errno.ENOTTY, errno.EINVAL, errno.EPERM, errno.EMLINK}
+
+
+def reflink(source: str, destination: str):
+    """Create destination as a copy-on-write clone of source"""
+    source_fd = os.open(source, os.O_RDONLY)
+    try:
+        destination_fd = os.open(destination, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            fcntl.ioctl(destination_fd, FICLONE, source_fd)
+        except OSError:
+            os.close(destination_fd)
+            os.unlink(destination)
+            raise
+        os.close(destination_fd)
+    finally:
+        os.close(source_fd)
+
+
+class WorkspaceTemplate:
+    """Files every session workspace starts with, shared between sessions instead of copied
+
+    The sources are staged once into a directory next to the session
+    workspaces. Each workspace then gets the staged files as reflinks where the
+    filesystem supports them (true copy-on-write), otherwise as hardlinks to
+    read-only files, otherwise as plain copies. Creating a workspace costs one
+    link per file whatever the files' size, and removing it with rmtree leaves
+    the template alone.
+
+    Hardlinked files are read-only in every workspace: tools can replace them
+    but not edit them in place. That protection doesn't hold for root, so
+    force `copy` when goose runs as root on a filesystem without reflinks.
+    """
+
+    def __init__(self, sources: Dict[str, str], link_mode: str = "auto", check_interval: float = 30.0):
+        self.sources = sources  # path inside the workspace ('' for its root) -> source directory
+        self.link_mode = link_mode
+        self.check_interval = check_interval
+        self.mode: Optional[str] = None  # link mode in use once staged
+        self.materialized = 0
+        self.fallbacks = 0
+        self._stage_dir: Optional[str] = None
+        self._dirs: List[str] = []
+        self._files: List[str] = []
+        self._bytes = 0
+        self._fingerprint: Optional[Tuple] = None
+        self._checked_at = 0.0
+        # The pool materializes from a worker thread while sessions may do so inline
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_env(cls, recipes_dir: str) -> "WorkspaceTemplate":
+        """Build a template of the recipes plus GOOSE_WORKSPACE_TEMPLATE, linked per GOOSE_WORKSPACE_LINK_MODE"""
+        sources = {'recipes': recipes_dir}
+        if os.getenv('GOOSE_WORKSPACE_TEMPLATE'):
+            sources[''] = os.path.expanduser(os.getenv('GOOSE_WORKSPACE_TEMPLATE'))
+        link_mode = os.getenv('GOOSE_WORKSPACE_LINK_MODE', 'auto')
+        if link_mode not in LINK_MODES:
+            logger.warning(f"Unknown GOOSE_WORKSPACE_LINK_MODE {link_mode}, using auto")
+            link_mode = "auto"
+        return cls(sources, link_mode=link_mode)
+
+    def _source_files(self):
+        for target, source in self.sources.items():
+            if not os.path.isdir(source):
+                continue
+            for root, dirs, files in os.walk(source):
+                dirs.sort()
+                relative_root = os.path.relpath(root, source)
+                for name in sorted(files):
+                    path = os.path.join(root, name)
+                    yield path, os.path.normpath(os.path.join(target, relative_root, name))
+
+    def _fingerprint_sources(self) -> Tuple:
+        entries = []
+        for path, relative in self._source_files():
+            try:
+                info = os.stat(path)
+            except OSError:
+                continue
+            entries.append((relative, info.st_size, info.st_mtime_ns))
+        return tuple(entries)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Restage the template if its sources changed, returning True if it did"""
+        with self._lock:
+            return self._refresh(force)
+
+    def _refresh(self, force: bool) -> bool:
+        fingerprint = self._fingerprint_sources()
+        self._checked_at = time.monotonic()
+        if not force and self._stage_dir is not None and fingerprint == self._fingerprint:
+            return False
+
+        stage_dir = tempfile.mkdtemp(prefix="goose_template_")
+        dirs, files, total = set(), [], 0
+        for path, relative in self._source_files():
+            destination = os.path.join(stage_dir, relative)
+            parent = os.path.dirname(relative)
+            while parent and parent not in dirs:
+                dirs.add(parent)
+                parent = os.path.dirname(parent)
+            os.makedirs(os.path.dirname(destination), exist_ok=True)
+            shutil.copyfile(path, destination)
+            # Read-only, so hardlinked copies can't be edited in place
+            os.chmod(destination, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+            files.append(relative)
+            total += os.path.getsize(destination)
+
+        previous = self._stage_dir
+        self._stage_dir = stage_dir
+        self._dirs = sorted(dirs, key=lambda d: d.count(os.sep))
+        self._files = files
+        self._bytes = total
+        self._fingerprint = fingerprint
+        if self.mode is None and files:
+            self.mode = self._probe_mode() if self.link_mode == "auto" else self.link_mode
+            logger.info(f"Workspace template: {len(files)} file(s), {total} bytes, linked by {self.mode}")
+        if previous is not None:
+            # Workspaces keep their own links to the old files
+            shutil.rmtree(previous, ignore_errors=True)
+        return True
+
+    def _probe_mode(self) -> str:
+        """Find the cheapest way to share files between the stage and new workspaces"""
+        source = os.path.join(self._stage_dir, self._files[0])
+        probe_dir = tempfile.mkdtemp(prefix="goose_template_probe_")
+        try:
+            if fcntl is not None:
+                try:
+                    reflink(source, os.path.join(probe_dir, "reflink"))
+                    return LINK_REFLINK
+                except OSError:
+                    pass
+            try:
+                os.link(source, os.path.join(probe_dir, "hardlink"))
+                return LINK_HARDLINK
+            except OSError:
+                return LINK_COPY
+        finally:
+            shutil.rmtree(probe_dir, ignore_errors=True)
+
+    def materialize(self, session_dir: str):
+        """Populate an empty workspace with the template files"""
+        with self._lock:
+            self._materialize(session_dir)
+
+    def _materialize(self, session_dir: str):
+        if self._stage_dir is None or time.monotonic() - self._checked_at > self.check_interval:
+            self._refresh(False)
+        if not self._files:
+            return
+
+        for relative in self._dirs:
+            os.makedirs(os.path.join(session_dir, relative), exist_ok=True)
+        for relative in self._files:
+            source = os.path.join(self._stage_dir, relative)
+            destination = os.path.join(session_dir, relative)
+            try:
+                if self.mode == LINK_REFLINK:
+                    reflink(source, destination)
+                elif self.mode == LINK_HARDLINK:
+                    os.link(source, destination)
+                else:
+                    shutil.copyfile(source, destination)
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED:
+                    raise
+                # e.g. a workspace on another filesystem or a full link count
+                self.fallbacks += 1
+                shutil.copyfile(source, destination)
+        self.materialized += 1
+
+    def close(self):
+        """Remove the staged template"""
+        with self._lock:
+            if self._stage_dir is not None:
+                shutil.rmtree(self._stage_dir, ignore_errors=True)
+                self._stage_dir = None
+
+    def get_stats(self) -> Dict:
+        """Get the template size, link mode and usage"""
+        return {
+            'files': len(self._files),
+            'bytes': self._bytes,
+            'mode': self.mode,
+            'materialized': self.materialized,
+            'fallbacks': self.fallbacks,
+        }
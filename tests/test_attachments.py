@@ -0,0 +1,100 @@
+# Tests for attachment ingestion into session workspaces
+import asyncio
+import functools
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from src.agent_honk.attachments import AttachmentStore
+from src.agent_honk.goose_client import GooseClient
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _serve(directory):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(_QuietHandler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def _attachment(base_url, attachment_id, filename, size):
+    return {"id": attachment_id, "filename": filename, "url": f"{base_url}/{filename}", "size": size}
+
+
+def test_attachments_are_saved_once_and_referenced(tmp_path):
+    """Test that attachments stream into the workspace, dedupe by content and skip oversized files"""
+    served = tmp_path / "served"
+    served.mkdir()
+    (served / "build.log").write_text("error: honk\n" * 1000)
+    (served / "build-copy.log").write_text("error: honk\n" * 1000)
+    (served / "huge.bin").write_bytes(b"\0" * 5000)
+    session_dir = tmp_path / "session"
+    session_dir.mkdir()
+    server, base_url = _serve(served)
+    
+    store = AttachmentStore(max_bytes=12000, chunk_size=1024)
+    history = [
+        {"role": "user", "content": "Why does my build fail?", "attachments": [
+            _attachment(base_url, "1", "build.log", 12000),
+            _attachment(base_url, "2", "build-copy.log", 12000),
+            _attachment(base_url, "3", "huge.bin", 50000),
+        ]},
+        {"role": "assistant", "content": "Look at line 1."},
+    ]
+    
+    async def scenario():
+        first = await store.add_references(str(session_dir), history)
+        # Later turns pass the same history again
+        second = await store.add_references(str(session_dir), history)
+        await store.close()
+        return first, second
+    
+    try:
+        first, second = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    
+    references = first[0]["references"]
+    assert "saved as attachments/" in references[0]
+    assert references[0].split(" saved as ")[1] == references[1].split(" saved as ")[1]
+    assert "not downloaded" in references[2]
+    assert second[0]["references"] == references
+    assert "references" not in first[1]
+    assert len([name for name in os.listdir(session_dir / "attachments") if not name.startswith(".")]) == 1
+    assert store.get_stats() == {"downloaded": 1, "deduplicated": 1, "skipped": 1, "failed": 0, "bytes": 12000}
+
+
+def test_prompt_gets_references_not_contents(tmp_path):
+    """Test that run_with_history passes attachment references instead of file contents"""
+    served = tmp_path / "served"
+    served.mkdir()
+    (served / "config.yaml").write_text("provider: honk\n" * 500)
+    server, base_url = _serve(served)
+    
+    client = GooseClient()
+    prompts = []
+    
+    async def fake_run(session_dir, prompt, thread_id=None, recipe=None, prompt_dir=None):
+        prompts.append(prompt)
+        return "ok"
+    
+    client._run_goose_command = fake_run
+    session_dir = asyncio.run(client.ensure_session("thread1"))
+    history = [{"role": "user", "content": "Is this right?", "attachments": [_attachment(base_url, "9", "config.yaml", 7500)]}]
+    
+    async def scenario():
+        result = await client.run_with_history("thread1", history)
+        await client.attachments.close()
+        return result
+    
+    try:
+        assert asyncio.run(scenario()) == "ok"
+    finally:
+        server.shutdown()
+    assert "provider: honk" not in prompts[0]
+    assert "config.yaml (7.3 KiB) saved as attachments/" in prompts[0]
+    assert len(os.listdir(os.path.join(session_dir, "attachments"))) == 2  # the file and the manifest
+    asyncio.run(client.cleanup_session("thread1"))
@@ -0,0 +1,69 @@
+# Tests for the headless batch runner
+import asyncio
+import json
+
+import pytest
+
+from src.agent_honk.batch import BatchRunner
+from src.agent_honk.goose_client import GooseClient
+
+
+def _fake_client(calls):
+    client = GooseClient()
+    
+    async def fake_run(session_dir, prompt, thread_id=None, recipe=None, prompt_dir=None):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return f"answer to {prompt}"
+    
+    client._run_goose_command = fake_run
+    return client
+
+
+def test_batch_writes_results_and_resumes(tmp_path):
+    """Test that results stream to the output file and a resumed run skips finished items"""
+    input_path = tmp_path / "prompts.jsonl"
+    output_path = tmp_path / "answers.jsonl"
+    input_path.write_text(
+        json.dumps({"id": "a", "prompt": "What is Goose?"}) + "\n"
+        + json.dumps({"id": "b", "prompt": "What are recipes?", "mode": "session"}) + "\n"
+        + json.dumps({"id": "c", "prompt": "Hello", "mode": "bogus"}) + "\n"
+    )
+    
+    calls = []
+    summary = asyncio.run(BatchRunner(_fake_client(calls), str(input_path), str(output_path), concurrency=2).run())
+    assert summary['completed'] == 3
+    assert summary['failed'] == 1
+    records = {record['id']: record for record in map(json.loads, output_path.read_text().splitlines())}
+    assert records['a']['response'] == "answer to What is Goose?"
+    assert records['a']['recipe'] == "goose_help"
+    assert records['b']['recipe'] == "goose_session"
+    assert records['b']['ok'] and records['b']['recipe_version']
+    assert not records['c']['ok'] and "Unknown mode" in records['c']['error']
+    
+    # Add an item, then resume: only new and (with retry_errors) failed items run
+    with open(input_path, 'a') as f:
+        f.write(json.dumps({"id": "d", "prompt": "How do I install Goose?", "mode": "text"}) + "\n")
+    calls.clear()
+    runner = BatchRunner(_fake_client(calls), str(input_path), str(output_path), resume=True, retry_errors=True)
+    summary = asyncio.run(runner.run())
+    assert summary['skipped'] == 2
+    assert summary['completed'] == 2
+    assert calls == ["How do I install Goose?"]
+    assert len(output_path.read_text().splitlines()) == 5
+
+
+def test_batch_rejects_duplicate_ids(tmp_path):
+    """Test that a repeated id, explicit or from a line number, fails the run before any item starts"""
+    input_path = tmp_path / "prompts.jsonl"
+    input_path.write_text(
+        json.dumps({"prompt": "What is Goose?"}) + "\n"
+        + json.dumps({"id": "a", "prompt": "What are recipes?"}) + "\n"
+        + json.dumps({"id": 1, "prompt": "Hello"}) + "\n"
+    )
+    
+    calls = []
+    runner = BatchRunner(_fake_client(calls), str(input_path), str(tmp_path / "answers.jsonl"))
+    with pytest.raises(ValueError, match="Duplicate item id '1' on line 3"):
+        asyncio.run(runner.run())
+    assert calls == []
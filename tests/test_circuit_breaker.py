@@ -0,0 +1,58 @@
+# Tests for the circuit breaker
+import time
+
+import pytest
+
+from src.agent_honk.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def fail(breaker):
+    with breaker.guard() as call:
+        call.failure()
+
+
+def test_breaker_opens_after_failures_and_recovers():
+    """Test tripping, fast-failing and half-open recovery"""
+    breaker = CircuitBreaker("help", failure_threshold=3, window=60, cooldown=0.05)
+    
+    for _ in range(3):
+        fail(breaker)
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        with breaker.guard():
+            pass
+    
+    time.sleep(0.06)
+    with breaker.guard() as probe:
+        # Only one probe at a time
+        with pytest.raises(CircuitOpenError):
+            with breaker.guard():
+                pass
+        probe.success()
+    assert breaker.state == "closed"
+    assert breaker.get_stats()['rejected'] == 2
+
+
+def test_failed_probe_backs_off():
+    """Test that a failed probe re-opens the circuit with a longer cooldown"""
+    breaker = CircuitBreaker("help", failure_threshold=1, cooldown=0.01, max_cooldown=1)
+    fail(breaker)
+    time.sleep(0.02)
+    fail(breaker)
+    
+    assert breaker.state == "open"
+    assert breaker.cooldown == 0.02
+
+
+def test_unreported_probe_frees_the_slot():
+    """Test that a cancelled probe doesn't leave the circuit stuck half-open"""
+    breaker = CircuitBreaker("help", failure_threshold=1, cooldown=0.01)
+    fail(breaker)
+    time.sleep(0.02)
+    
+    with pytest.raises(RuntimeError):
+        with breaker.guard():
+            raise RuntimeError("cancelled")
+    with breaker.guard() as probe:
+        probe.success()
+    assert breaker.state == "closed"
@@ -0,0 +1,64 @@
+# Tests for syncing slash commands only when they changed
+import asyncio
+
+import discord
+
+from src.agent_honk.command_sync import CommandSyncer
+
+
+@discord.app_commands.command(name="honk", description="Honk")
+async def honk(interaction: discord.Interaction):
+    pass
+
+
+@discord.app_commands.command(name="stats", description="Stats")
+async def stats(interaction: discord.Interaction):
+    pass
+
+
+def make_tree():
+    """A command tree whose sync() records the scope instead of calling Discord"""
+    client = discord.Client(intents=discord.Intents.none())
+    client._connection.application_id = 1234
+    tree = discord.app_commands.CommandTree(client)
+    tree.add_command(honk)
+    tree.synced = []
+    
+    async def sync(guild=None):
+        tree.synced.append(guild.id if guild else None)
+        return tree.get_commands(guild=guild)
+    
+    tree.sync = sync
+    return tree
+
+
+def test_sync_skipped_when_tree_unchanged(tmp_path):
+    """Test that a second start with the same commands doesn't sync again"""
+    tree = make_tree()
+    
+    assert asyncio.run(CommandSyncer(tree, str(tmp_path)).sync_if_changed())
+    assert not asyncio.run(CommandSyncer(tree, str(tmp_path)).sync_if_changed())
+    
+    tree.add_command(stats)
+    assert asyncio.run(CommandSyncer(tree, str(tmp_path)).sync_if_changed())
+    assert tree.synced == [None, None]
+
+
+def test_forced_sync_runs_even_when_unchanged(tmp_path):
+    """Test that DISCORD_FORCE_SYNC syncs an unchanged tree"""
+    tree = make_tree()
+    asyncio.run(CommandSyncer(tree, str(tmp_path)).sync_if_changed())
+    
+    assert asyncio.run(CommandSyncer(tree, str(tmp_path), force=True).sync_if_changed())
+    assert tree.synced == [None, None]
+
+
+def test_guild_sync_is_tracked_apart_from_global(tmp_path):
+    """Test that a guild-scoped sync copies global commands there and keeps its own hash"""
+    tree = make_tree()
+    asyncio.run(CommandSyncer(tree, str(tmp_path)).sync_if_changed())
+    
+    assert asyncio.run(CommandSyncer(tree, str(tmp_path), guild_id=42).sync_if_changed())
+    assert not asyncio.run(CommandSyncer(tree, str(tmp_path), guild_id=42).sync_if_changed())
+    assert tree.synced == [None, 42]
+    assert [command.name for command in tree.get_commands(guild=discord.Object(id=42))] == ["honk"]
@@ -0,0 +1,55 @@
+# Tests for documentation link checking
+from src.agent_honk.doc_links import UNVERIFIED_NOTE, DocLinkIndex
+
+DOCS_URL = "https://block.github.io/goose/docs/"
+
+
+def _docs(tmp_path):
+    docs = tmp_path / "documentation" / "docs"
+    (docs / "getting-started").mkdir(parents=True)
+    (docs / "guides").mkdir()
+    (docs / "_partials").mkdir()
+    (docs / "getting-started" / "installation.md").write_text("# Install Goose\n")
+    (docs / "getting-started" / "index.md").write_text("# Getting Started\n")
+    (docs / "guides" / "01-tips.mdx").write_text("---\ntitle: Tips\n---\nHonk\n")
+    (docs / "guides" / "config.md").write_text("---\nslug: /guides/config-file\n---\n# Config\n")
+    (docs / "_partials" / "note.md").write_text("partial")
+    return tmp_path / "documentation"
+
+
+def test_index_maps_files_to_urls(tmp_path):
+    """Test that docs files map to their published URLs and are written for the recipe"""
+    index = DocLinkIndex(str(_docs(tmp_path)), DOCS_URL, str(tmp_path / "links.txt"))
+    assert index.build() == 4
+    assert set(index.pages) == {"getting-started", "getting-started/installation", "guides/tips", "guides/config-file"}
+    links = (tmp_path / "links.txt").read_text()
+    assert f"{DOCS_URL}guides/tips - Tips" in links
+    assert f"{DOCS_URL}getting-started/installation - Install Goose" in links
+
+
+def test_clean_rewrites_and_flags_links(tmp_path):
+    """Test that fixable links are rewritten and links to missing pages unlinked or flagged"""
+    index = DocLinkIndex(str(_docs(tmp_path)), DOCS_URL, str(tmp_path / "links.txt"))
+    index.build()
+    response = (
+        f"See [installing]({DOCS_URL}getting-started/installation.md) and "
+        "https://github.com/block/goose/blob/main/documentation/docs/guides/01-tips.mdx#prompts, "
+        f"[recipes]({DOCS_URL}guides/recipes) or {DOCS_URL}guides/nope.\n"
+        f"Fine: {DOCS_URL}getting-started/ and https://github.com/block/goose/blob/main/crates/goose/src/lib.rs"
+    )
+    cleaned = index.clean(response)
+    assert f"[installing]({DOCS_URL}getting-started/installation)" in cleaned
+    assert f"{DOCS_URL}guides/tips#prompts," in cleaned
+    assert "recipes or" in cleaned
+    assert f"{DOCS_URL}guides/nope{UNVERIFIED_NOTE}." in cleaned
+    assert f"Fine: {DOCS_URL}getting-started/ and https://github.com/block/goose/blob/main/crates/goose/src/lib.rs" in cleaned
+    assert index.get_stats() == {"pages": 4, "rewritten": 2, "flagged": 2}
+
+
+def test_clean_is_a_no_op_without_docs(tmp_path):
+    """Test that responses are left alone when there is no docs tree to check against"""
+    index = DocLinkIndex(str(tmp_path / "missing"), DOCS_URL, str(tmp_path / "links.txt"))
+    assert index.build() == 0
+    text = f"[x]({DOCS_URL}anything)"
+    assert index.clean(text) == text
+    assert "No documentation index" in (tmp_path / "links.txt").read_text()
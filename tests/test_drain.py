@@ -0,0 +1,127 @@
+# Tests for draining running turns on shutdown
+import asyncio
+from types import SimpleNamespace
+
+from src.agent_honk.bot import RESTARTING_MESSAGE, AgentHonk
+from src.agent_honk.drain import MAX_REPLAYS, TURN_SESSION, TURN_THREAD, DrainController, TurnJournal
+
+
+def test_journal_survives_restart(tmp_path):
+    """Test that unanswered turns go to the next instance once the previous one has exited"""
+    async def scenario():
+        journal = TurnJournal(str(tmp_path))
+        answered = journal.add(TURN_SESSION, "thread1", 42, prompt="hello")
+        pending = journal.add(TURN_THREAD, "thread2", 43)
+        journal.remove(answered)
+        
+        # In a rolling restart the old instance may still be answering its turns
+        restarted = TurnJournal(str(tmp_path))
+        assert await restarted.adopt() == []
+        await journal.close()
+        assert [turn_id for turn_id, _ in await restarted.adopt()] == [pending]
+        assert restarted.entries[pending]['kind'] == TURN_THREAD
+        assert await restarted.adopt() == []
+        
+        # A turn that keeps failing to finish is eventually given up on
+        for _ in range(MAX_REPLAYS):
+            assert restarted.mark_replayed(pending)
+        assert not restarted.mark_replayed(pending)
+        await restarted.close()
+        assert await TurnJournal(str(tmp_path)).adopt() == []
+    
+    asyncio.run(scenario())
+
+
+def test_drain_waits_then_interrupts(tmp_path):
+    """Test that drain lets quick turns finish and journals the ones past the deadline"""
+    async def scenario():
+        drain = DrainController(TurnJournal(str(tmp_path)), timeout=0.2, cancel_grace=1.0)
+        tasks = {}
+        
+        async def turn(thread_id, duration):
+            turn_id = drain.journal.add(TURN_THREAD, thread_id, 42)
+            drain.begin(turn_id, thread_id)
+            try:
+                await asyncio.sleep(duration)
+            finally:
+                drain.finish(turn_id)
+        
+        def cancel(thread_id):
+            tasks[thread_id].cancel()
+            return True
+        
+        tasks["quick"] = asyncio.create_task(turn("quick", 0.05))
+        tasks["slow"] = asyncio.create_task(turn("slow", 10))
+        await asyncio.sleep(0)
+        
+        assert await drain.drain(cancel) == 1
+        assert drain.draining and not drain.in_flight
+        assert [entry['thread_id'] for _, entry in drain.journal.pending()] == ["slow"]
+        await asyncio.gather(*tasks.values(), return_exceptions=True)
+    
+    asyncio.run(scenario())
+
+
+class FakeThread:
+    def __init__(self, thread_id, messages):
+        self.id = thread_id
+        self.messages = messages
+        self.sent = []
+    
+    def typing(self):
+        return self
+    
+    async def __aenter__(self):
+        pass
+    
+    async def __aexit__(self, *exc):
+        pass
+    
+    async def history(self, limit=None, after=None, oldest_first=True):
+        for msg in self.messages:
+            yield msg
+    
+    async def send(self, content):
+        self.sent.append(content)
+
+
+def test_thread_turn_is_answered_after_restart(tmp_path, monkeypatch):
+    """Test that a journaled thread turn gets a real answer from an instance with a fresh memory store"""
+    monkeypatch.setenv("AGENT_HONK_STATE_DIR", str(tmp_path))
+    monkeypatch.delenv("GOOSE_DISPATCH", raising=False)
+    prompts = []
+    
+    async def fake_run(session_dir, prompt, thread_id=None, recipe=None, prompt_dir=None):
+        prompts.append(prompt)
+        return "honk"
+    
+    async def scenario():
+        # The previous instance accepted the turn, told the user it was restarting and stopped
+        previous = AgentHonk()
+        previous.drain.journal.add(TURN_THREAD, "123", 42)
+        await previous.drain.journal.close()
+        
+        bot = AgentHonk()
+        me = SimpleNamespace(bot=True)
+        bot._connection.user = me
+        user = SimpleNamespace(bot=False)
+        thread = FakeThread(123, [
+            SimpleNamespace(id=1, author=user, content="How do I add an extension?", attachments=[]),
+            SimpleNamespace(id=2, author=me, content=RESTARTING_MESSAGE, attachments=[]),
+        ])
+        bot.get_channel = lambda channel_id: thread
+        bot.goose_client._run_goose_command = fake_run
+        
+        await bot.replay_journal()
+        for _ in range(100):
+            if thread.sent:
+                break
+            await asyncio.sleep(0.01)
+        await bot.goose_client.cleanup_session("123")
+        return bot, thread
+    
+    bot, thread = asyncio.run(scenario())
+    assert thread.sent == ["honk"]
+    assert "How do I add an extension?" in prompts[0]
+    assert RESTARTING_MESSAGE not in prompts[0]
+    assert bot.drain.journal.pending() == []
@@ -0,0 +1,303 @@
+# Tests for GooseClient process handling
+import asyncio
+import os
+import re
+
+from src.agent_honk.goose_client import CANCELLED_MESSAGE, GooseClient
+from src.agent_honk.latency import LatencyTracker
+from src.agent_honk.process_utils import terminate_process_group
+
+
+def test_latency_tracker_adaptive_timeout():
+    """Test that timeouts follow observed latency within bounds"""
+    tracker = LatencyTracker(min_samples=5, percentile=99, multiplier=2.0, min_timeout=10, max_timeout=300)
+    
+    # Not enough samples yet, use the ceiling
+    assert tracker.timeout_for("session") == 300
+    
+    for seconds in [5, 6, 7, 8, 20]:
+        tracker.record("session", seconds)
+    assert tracker.timeout_for("session") == 40
+    
+    # Fast modes are clamped to the floor, other modes are unaffected
+    for _ in range(5):
+        tracker.record("barebones", 1)
+    assert tracker.timeout_for("barebones") == 10
+    assert tracker.timeout_for("help") == 300
+
+
+def test_terminate_process_group_kills_descendants():
+    """Test that terminating a process group also kills its children"""
+    async def scenario():
+        process = await asyncio.create_subprocess_exec(
+            "sh", "-c", "sleep 60 & echo $!; wait",
+            stdout=asyncio.subprocess.PIPE,
+            start_new_session=True
+        )
+        child_pid = int((await process.stdout.readline()).decode().strip())
+        await terminate_process_group(process, grace=1.0)
+        return process, child_pid
+    
+    process, child_pid = asyncio.run(scenario())
+    assert process.returncode is not None
+    # The grandchild must be gone (or at worst a zombie awaiting reparenting)
+    try:
+        with open(f"/proc/{child_pid}/stat") as f:
+            assert f.read().split()[2] == "Z"
+    except FileNotFoundError:
+        pass
+
+
+def test_cancel_running_turn():
+    """Test that cancel() stops a running turn and returns the cancelled message"""
+    client = GooseClient()
+    
+    async def scenario():
+        turn = asyncio.ensure_future(client._run_turn("thread1", asyncio.sleep(60)))
+        await asyncio.sleep(0)
+        assert client.is_running("thread1")
+        assert client.cancel("thread1")
+        result = await turn
+        assert not client.is_running("thread1")
+        assert not client.cancel("thread1")
+        return result
+    
+    assert asyncio.run(scenario()) == CANCELLED_MESSAGE
+
+
+def test_lanes_isolate_modes():
+    """Test that a saturated research lane doesn't block interactive turns"""
+    from src.agent_honk.lanes import ExecutionLane, LaneFullError, LaneRouter
+    
+    router = LaneRouter(
+        {
+            "interactive": ExecutionLane("interactive", concurrency=2, max_queue=0, timeout=60),
+            "research": ExecutionLane("research", concurrency=1, max_queue=1, timeout=300),
+        },
+        {"help": "research", "session": "interactive"},
+    )
+    
+    async def scenario():
+        research = router.for_mode("help")
+        release = asyncio.Event()
+        
+        async def hold():
+            async with research.slot():
+                await release.wait()
+        
+        running = asyncio.ensure_future(hold())
+        queued = asyncio.ensure_future(hold())
+        await asyncio.sleep(0)
+        assert research.active == 1 and research.waiting == 1
+        
+        # Research queue is full, but interactive still has free slots
+        try:
+            async with research.slot():
+                pass
+            assert False, "expected LaneFullError"
+        except LaneFullError:
+            pass
+        async with router.for_mode("session").slot() as lane:
+            assert lane.name == "interactive"
+        
+        release.set()
+        await asyncio.gather(running, queued)
+        assert research.rejected == 1
+    
+    asyncio.run(scenario())
+
+
+def test_identical_help_questions_share_one_run():
+    """Test that concurrent identical questions coalesce into a single run"""
+    client = GooseClient()
+    calls = []
+    
+    async def fake_run(session_dir, prompt, thread_id=None, recipe=None, prompt_dir=None):
+        calls.append(thread_id)
+        await asyncio.sleep(0.05)
+        return f"answer to {prompt}"
+    
+    client._run_goose_command = fake_run
+    
+    async def scenario():
+        return await asyncio.gather(
+            client.run_initial("thread1", "How do I install Goose?", use_help_recipe=True),
+            client.run_initial("thread2", "how do i install   goose", use_help_recipe=True),
+            client.run_initial("thread3", "What are recipes?", use_help_recipe=True),
+        )
+    
+    results = asyncio.run(scenario())
+    for thread_id in ("thread1", "thread2", "thread3"):
+        asyncio.run(client.cleanup_session(thread_id))
+    
+    assert len(calls) == 2
+    assert results[0] == results[1] == "answer to How do I install Goose?"
+    assert client.recipe_flights.get_stats() == {'runs': 2, 'coalesced': 1, 'in_flight': 0}
+
+
+def test_hedged_attempt_wins_over_stalled_run(tmp_path):
+    """Test that a stalled run is hedged and the hedge's answer is used"""
+    script = tmp_path / "goose"
+    script.write_text(
+        "#!/bin/sh\n"
+        "if [ -z \"$GOOSE_PROVIDER\" ]; then sleep 30; fi\n"
+        "echo \"answer from ${GOOSE_PROVIDER:-primary}\"\n"
+    )
+    script.chmod(0o755)
+    
+    client = GooseClient()
+    client.goose_command = str(script)
+    client.latency.min_samples = 1
+    client.latency.record("barebones", 0.1)
+    client.hedging.enabled = True
+    client.hedging.max_rate = 1.0
+    client.hedging.env_overrides = {"GOOSE_PROVIDER": "backup"}
+    
+    async def scenario():
+        return await client._execute("barebones", [str(script)], str(tmp_path), str(tmp_path), "hi", timeout=10)
+    
+    assert asyncio.run(scenario()) == "answer from backup"
+    assert client.hedging.get_stats()['launched'] == 1
+    assert client.hedging.get_stats()['won'] == 1
+
+
+def test_turn_prepared_while_typing_reuses_prefix_and_process(tmp_path):
+    """Test that a prepared turn reuses its context prefix and the process reserved for it"""
+    script = tmp_path / "goose"
+    script.write_text(
+        "#!/bin/sh\n"
+        "if [ \"$2\" = \"--no-session\" ]; then cat > /dev/null; echo warm; else echo cold; fi\n"
+    )
+    script.chmod(0o755)
+    
+    client = GooseClient()
+    client.goose_command = client.pool.goose_command = str(script)
+    asyncio.run(client.ensure_session("thread1"))
+    history = [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "honk"},
+    ]
+    
+    async def scenario():
+        assert await client.prepare_turn("thread1", history)
+        first = await client.run_with_history("thread1", history + [{"role": "user", "content": "and now?"}])
+        # Nothing was prepared for this one
+        second = await client.run_with_history("thread1", history + [{"role": "user", "content": "again"}])
+        return first, second
+    
+    try:
+        assert asyncio.run(scenario()) == ("warm", "cold")
+    finally:
+        asyncio.run(client.cleanup_session("thread1"))
+    assert client.prefix_hits == 1
+    assert client.pool.get_stats()['leases_used'] == 1
+
+
+def test_timed_out_run_counts_toward_latency(tmp_path):
+    """Test that a run killed at its timeout is recorded at that timeout, not dropped"""
+    client = GooseClient()
+    
+    async def scenario():
+        return await client._attempt("barebones", ["sleep", "5"], str(tmp_path), timeout=0.2)
+    
+    result = asyncio.run(scenario())
+    assert result.timed_out
+    assert list(client.latency.samples["barebones"]) == [0.2]
+
+
+def test_first_session_turn_uses_prestarted_process(tmp_path):
+    """Test that a new /session thread's first turn runs in a process pre-started by the pool"""
+    script = tmp_path / "goose"
+    script.write_text(
+        "#!/bin/sh\n"
+        "if [ \"$2\" = \"--no-session\" ]; then grep -q 'Please respond to the following user prompt' && echo warm; else echo cold; fi\n"
+    )
+    script.chmod(0o755)
+    
+    client = GooseClient()
+    client.goose_command = client.pool.goose_command = str(script)
+    client.pool.prestart = True
+    client.pool.min_size = 1
+    client.pool.refill_interval = 0.01
+    
+    async def scenario():
+        await client.pool.start()
+        for _ in range(200):
+            if client.pool.ready and client.pool.idle_processes:
+                break
+            await asyncio.sleep(0.01)
+        try:
+            return await client.run_barebones("thread1", "hi")
+        finally:
+            await client.cleanup_session("thread1")
+            await client.pool.close()
+    
+    assert asyncio.run(scenario()) == "warm"
+    assert client.pool.hits == 1
+
+
+def test_shared_run_prompt_file_outlives_first_thread(tmp_path):
+    """Test that a coalesced run's prompt file survives the first thread being cleaned up"""
+    client = GooseClient()
+    client.prompts.max_arg_bytes = 10
+    release = None
+    seen = []
+    
+    async def fake_execute(mode, cmd_args, cwd, session_dir, idle_prompt, timeout, call=None, session_log=False):
+        path = re.search(r"saved to (\S+)\. Read", " ".join(cmd_args)).group(1)
+        await release.wait()
+        seen.append(path)
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    
+    client._execute = fake_execute
+    question = "How do I write a recipe with several extensions?"
+    
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        first = asyncio.create_task(client.run_initial("thread1", question, use_help_recipe=True))
+        second = asyncio.create_task(client.run_initial("thread2", question, use_help_recipe=True))
+        await asyncio.sleep(0.05)
+        client.cancel("thread1")
+        await client.cleanup_session("thread1")
+        release.set()
+        return await first, await second
+    
+    first, second = asyncio.run(scenario())
+    asyncio.run(client.cleanup_session("thread2"))
+    assert second == question
+    assert not os.path.exists(seen[0])
+    assert not any(seen[0].startswith(session_dir) for session_dir in client.sessions.values())
+
+
+def test_concurrent_stalls_stay_within_hedge_budget(tmp_path):
+    """Test that many runs stalling at once launch no more hedges than the budget allows"""
+    script = tmp_path / "goose"
+    script.write_text(
+        "#!/bin/sh\n"
+        "if [ -z \"$GOOSE_PROVIDER\" ]; then sleep 30; fi\n"
+        "echo \"answer from ${GOOSE_PROVIDER:-primary}\"\n"
+    )
+    script.chmod(0o755)
+    
+    client = GooseClient()
+    client.latency.min_samples = 1
+    client.latency.record("barebones", 0.1)
+    client.hedging.enabled = True
+    client.hedging.max_rate = 0.1
+    client.hedging.env_overrides = {"GOOSE_PROVIDER": "backup"}
+    # 18 unhedged runs so far: 2 more hedges keep the rate at 2/20
+    for _ in range(18):
+        client.hedging.record_run(hedged=False)
+    
+    async def scenario():
+        return await asyncio.gather(*(
+            client._execute("barebones", [str(script)], str(tmp_path), str(tmp_path), None, timeout=1)
+            for _ in range(10)
+        ))
+    
+    results = asyncio.run(scenario())
+    assert results.count("answer from backup") == 2
+    assert client.hedging.get_stats()['launched'] == 2
+    assert client.hedging.get_stats()['outstanding'] == 0
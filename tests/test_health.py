@@ -0,0 +1,127 @@
+# Tests for the event loop watchdog and health checks
+import asyncio
+import json
+import logging
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from src.agent_honk.health import HealthChecker, HealthServer
+from src.agent_honk.watchdog import LoopWatchdog
+
+
+def test_watchdog_dumps_blocking_stack(caplog):
+    """Test that a blocked loop is detected and the blocking call shows up in the dump"""
+    watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+    
+    def blocking_parse():
+        time.sleep(0.4)
+    
+    async def scenario():
+        await watchdog.start()
+        await asyncio.sleep(0.05)
+        blocking_parse()
+        await asyncio.sleep(0.05)
+        await watchdog.close()
+    
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(scenario())
+    assert watchdog.stalls == 1
+    assert watchdog.max_lag >= 0.3
+    dumps = [record.getMessage() for record in caplog.records if "stalled" in record.getMessage()]
+    assert "blocking_parse" in dumps[0]
+
+
+class FakeDrain:
+    draining = False
+
+
+class FakeGoose:
+    def __init__(self):
+        self.state = {
+            'breakers': {'help': 'closed', 'barebones': 'closed'},
+            'lanes': {'interactive': {'active': 1, 'concurrency': 8, 'waiting': 0, 'max_queue': 32}},
+        }
+    
+    def readiness_state(self):
+        return self.state
+
+
+class FakeBot:
+    def __init__(self):
+        self.drain = FakeDrain()
+        self.goose_client = FakeGoose()
+        self.disconnected_at = None
+        self.closed = False
+        self.ready = True
+    
+    def is_closed(self):
+        return self.closed
+    
+    def is_ready(self):
+        return self.ready
+
+
+def test_readiness_reflects_drain_goose_and_lanes():
+    """Test that readiness fails for draining, unusable Goose or saturated lanes, liveness only for the gateway"""
+    bot = FakeBot()
+    checker = HealthChecker(bot, disconnect_grace=60)
+    assert checker.readiness()[0] and checker.liveness()[0]
+    
+    bot.drain.draining = True
+    assert not checker.readiness()[0] and checker.liveness()[0]
+    bot.drain.draining = False
+    
+    # One open circuit leaves the bot usable, all of them don't
+    bot.goose_client.state['breakers']['help'] = 'open'
+    assert checker.readiness()[0]
+    bot.goose_client.state['breakers']['barebones'] = 'open'
+    ok, details = checker.readiness()
+    assert not ok and sorted(details['open_circuits']) == ['barebones', 'help']
+    bot.goose_client.state['breakers'] = {}
+    
+    bot.goose_client.state['lanes']['interactive'].update(active=8, waiting=32)
+    ok, details = checker.readiness()
+    assert not ok and details['saturated_lanes'] == ['interactive']
+    
+    bot.disconnected_at = time.monotonic() - 120
+    assert not checker.liveness()[0]
+
+
+def test_health_server_answers_while_loop_is_stalled():
+    """Test that /healthz fails and /readyz times out instead of hanging while the loop is blocked"""
+    bot = FakeBot()
+    bot.watchdog = LoopWatchdog(threshold=0.1, interval=0.02)
+    server = HealthServer(HealthChecker(bot), host='127.0.0.1', port=0, loop_timeout=0.2)
+    
+    def probe(path):
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}{path}", timeout=5) as response:
+                return response.status, json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read())
+    
+    async def scenario():
+        await bot.watchdog.start()
+        await server.start()
+        healthy = await asyncio.to_thread(probe, '/healthz')
+        ready = await asyncio.to_thread(probe, '/readyz')
+        
+        # Block the loop and probe from a thread the loop isn't running
+        results = {}
+        thread = threading.Thread(target=lambda: results.update(
+            healthz=(time.sleep(0.2), probe('/healthz'))[1],
+            readyz=probe('/readyz'),
+        ))
+        thread.start()
+        time.sleep(0.8)
+        thread.join()
+        await server.close()
+        await bot.watchdog.close()
+        return healthy, ready, results
+    
+    healthy, ready, stalled = asyncio.run(scenario())
+    assert healthy[0] == 200 and ready[0] == 200
+    assert stalled['healthz'][0] == 503 and not stalled['healthz'][1]['checks']['loop_responsive']
+    assert stalled['readyz'][0] == 503 and not stalled['readyz'][1]['checks']['loop_responsive']
@@ -0,0 +1,22 @@
+# Tests for the thread history cache
+import time
+
+from src.agent_honk.history_cache import HistoryCache
+
+
+def test_history_cache_evicts_and_expires():
+    """Test that the least recently used thread is evicted and stale entries are refetched"""
+    cache = HistoryCache(max_threads=2, ttl=60)
+    cache.store("thread1", [{"role": "user", "content": "hi"}], 101)
+    cache.store("thread2", [], 202)
+    assert cache.get("thread1").last_message_id == 101
+    
+    cache.store("thread3", [], 303)
+    assert cache.get("thread2") is None
+    assert cache.get("thread1") is not None and cache.fresh("thread1", 5)
+    
+    cache.entries["thread3"].fetched_at = time.monotonic() - 120
+    assert cache.get("thread3") is None
+    cache.invalidate("thread1")
+    assert not cache.entries
+    assert cache.get_stats() == {'threads': 0, 'hits': 2, 'misses': 2}
@@ -0,0 +1,136 @@
+# Tests for dispatching Goose runs to workers
+import asyncio
+import time
+
+from src.agent_honk.dispatcher import GooseDispatcher
+from src.agent_honk.goose_client import CANCELLED_MESSAGE
+from src.agent_honk.job_queue import TURN_KINDS, SQLiteJobQueue
+from src.agent_honk.worker import GooseWorker
+
+
+def test_session_affinity_and_dead_worker_requeue(tmp_path):
+    """Test that a thread's turns stay on its worker until that worker dies"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    queue.heartbeat("worker-a")
+    queue.heartbeat("worker-b")
+    queue.assign_session("thread1", "worker-a")
+    
+    job_id = queue.enqueue("thread1", "history", {"history": []})
+    assert queue.claim("worker-b", TURN_KINDS, heartbeat_timeout=30) is None
+    job = queue.claim("worker-a", TURN_KINDS, heartbeat_timeout=30)
+    assert job.job_id == job_id
+    
+    # worker-a stops heartbeating: its job goes back and anyone may take it
+    time.sleep(0.05)
+    queue.heartbeat("worker-b")
+    assert queue.requeue_dead(heartbeat_timeout=0.02) == 1
+    job = queue.claim("worker-b", TURN_KINDS, heartbeat_timeout=0.02)
+    assert job.job_id == job_id and job.attempts == 2
+    
+    queue.complete(job_id, {"response": "honk"})
+    assert queue.take_result(job_id) == {"response": "honk"}
+    assert queue.take_result(job_id) is None
+
+
+def test_job_is_dead_lettered_after_max_attempts(tmp_path):
+    """Test that a job that keeps killing its worker is given up on"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    job_id = queue.enqueue("thread1", "history", {"history": []})
+    for attempt in range(1, 4):
+        queue.heartbeat("worker-a")
+        job = queue.claim("worker-a", TURN_KINDS, heartbeat_timeout=30)
+        assert job.job_id == job_id and job.attempts == attempt
+        time.sleep(0.05)
+        assert queue.requeue_dead(heartbeat_timeout=0.02, max_attempts=3) == (1 if attempt < 3 else 0)
+    
+    assert queue.claim("worker-b", TURN_KINDS, heartbeat_timeout=30) is None
+    assert queue.get_stats(heartbeat_timeout=30)["dead"] == 1
+    result = queue.take_result(job_id)
+    assert result["response"] is None and "3 times" in result["error"]
+
+
+class FakeClient:
+    def __init__(self):
+        self.sessions = {}
+    
+    async def start(self):
+        pass
+    
+    async def close(self):
+        pass
+    
+    async def ensure_session(self, thread_id):
+        return self.sessions.setdefault(thread_id, f"/tmp/{thread_id}")
+    
+    async def run_barebones(self, thread_id, prompt):
+        await self.ensure_session(thread_id)
+        return f"barebones: {prompt}"
+    
+    async def run_with_history(self, thread_id, history):
+        return f"{len(history)} messages in {self.sessions[thread_id]}"
+    
+    async def cleanup_session(self, thread_id, transcript=None):
+        self.sessions.pop(thread_id, None)
+
+
+def test_dispatcher_round_trip_through_worker(tmp_path):
+    """Test that turns queued by the dispatcher are answered by a worker"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    dispatcher = GooseDispatcher(queue, poll_interval=0.01)
+    worker = GooseWorker(queue, client=FakeClient(), worker_id="worker-a", poll_interval=0.01)
+    
+    async def scenario():
+        running = asyncio.create_task(worker.run())
+        first = await dispatcher.run_barebones("thread1", "hi")
+        second = await dispatcher.run_with_history("thread1", [{"role": "user", "content": "hi"}])
+        await dispatcher.cleanup_session("thread1")
+        for _ in range(100):
+            if queue.session_worker("thread1") is None:
+                break
+            await asyncio.sleep(0.01)
+        worker.stop()
+        await running
+        return first, second
+    
+    first, second = asyncio.run(scenario())
+    assert first == "barebones: hi"
+    assert second == "1 messages in /tmp/thread1"
+    assert queue.session_worker("thread1") is None
+    assert dispatcher.get_metrics()["queue"]["queued"] == 0
+
+
+def test_dispatcher_cancels_queued_turn(tmp_path):
+    """Test that cancelling a turn no worker has claimed answers it with the cancel message"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    dispatcher = GooseDispatcher(queue, poll_interval=0.01)
+    
+    async def scenario():
+        turn = asyncio.create_task(dispatcher.run_barebones("thread1", "hi"))
+        while not dispatcher.is_running("thread1"):
+            await asyncio.sleep(0.01)
+        assert dispatcher.cancel("thread1")
+        return await asyncio.wait_for(turn, timeout=5)
+    
+    assert asyncio.run(scenario()) == CANCELLED_MESSAGE
+    assert queue.get_stats(heartbeat_timeout=30)["queued"] == 0
+
+
+def test_dispatcher_metrics_use_polled_queue_stats(tmp_path):
+    """Test that metrics report the queue stats from the last poll instead of querying the queue"""
+    queue = SQLiteJobQueue(str(tmp_path / "jobs.db"))
+    dispatcher = GooseDispatcher(queue, stats_interval=0.01)
+    queue.heartbeat("worker-a")
+    
+    async def scenario():
+        await dispatcher.start()
+        assert dispatcher.get_metrics()["queue"]["live_workers"] == 1
+        queue.enqueue("thread1", "history", {"history": []})
+        assert dispatcher.get_metrics()["queue"]["queued"] == 0
+        for _ in range(100):
+            if dispatcher.get_metrics()["queue"]["queued"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        await dispatcher.close()
+    
+    asyncio.run(scenario())
+    assert dispatcher.queue_stats["queued"] == 1
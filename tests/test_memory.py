@@ -0,0 +1,35 @@
+# Tests for memory accounting and heap profiling
+import os
+from collections import deque
+
+from src.agent_honk.memory import HeapProfiler, account, deep_sizeof
+
+
+def test_account_counts_entries_and_nested_bytes():
+    """Test that accounting follows nested containers but counts shared objects once"""
+    shared = "x" * 10_000
+    small = {"a": "short"}
+    large = {"a": shared, "b": [shared, shared], "c": deque([shared])}
+    
+    assert deep_sizeof(large) > deep_sizeof(small) + 10_000
+    assert deep_sizeof(large) < deep_sizeof(small) + 2 * 10_000 + 1024
+    assert account(large)["entries"] == 3
+    assert account({}) == {"entries": 0, "bytes": deep_sizeof({})}
+
+
+def test_heap_profiler_writes_growth_between_captures(tmp_path):
+    """Test that a second capture writes the allocation sites that grew"""
+    profiler = HeapProfiler(str(tmp_path), top=5)
+    try:
+        assert "Started" in profiler.capture()
+        assert profiler.tracing
+        grown = [bytearray(64 * 1024) for _ in range(16)]
+        summary = profiler.capture()
+    finally:
+        profiler.stop()
+    
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0] in summary
+    report = (tmp_path / files[0]).read_text()
+    assert "by growth" in report and "test_memory.py" in report
+    assert grown and profiler.snapshots == 1 and not profiler.tracing
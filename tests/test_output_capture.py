@@ -0,0 +1,38 @@
+# Tests for bounded output capture
+from src.agent_honk.output_capture import BoundedCapture
+
+
+def test_capture_strips_ansi_across_chunks():
+    """Test that escape sequences split between chunks are removed"""
+    capture = BoundedCapture(max_bytes=1024)
+    capture.feed(b"hello \x1b[3")
+    capture.feed(b"2mworld\x1b[0m")
+    capture.finish()
+    
+    assert capture.text() == "hello world"
+    assert not capture.truncated
+
+
+def test_capture_finds_session_path_across_chunks():
+    """Test that the session path is found even when split mid-path"""
+    capture = BoundedCapture(max_bytes=1024, scan_session_path=True)
+    capture.feed(b"starting session | logging to /tmp/sess")
+    assert capture.session_path is None
+    capture.feed(b"ions/abc.jsonl\nworking...\n")
+    capture.finish()
+    
+    assert capture.session_path == "/tmp/sessions/abc.jsonl"
+
+
+def test_capture_keeps_bounded_tail():
+    """Test that only the tail is kept in memory and the rest is counted as dropped"""
+    capture = BoundedCapture(max_bytes=100)
+    for i in range(1000):
+        capture.feed(f"line {i:04d}\n".encode())
+    capture.finish()
+    
+    assert capture.total_bytes == 10000
+    assert capture.dropped_bytes == 9900
+    assert capture.truncated
+    assert capture.text().endswith("line 0999\n")
+    assert len(capture.text()) == 100
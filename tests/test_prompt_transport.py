@@ -0,0 +1,56 @@
+# Tests for passing large prompts to goose through files
+import asyncio
+import os
+
+from src.agent_honk.goose_client import BAREBONES_RECIPE, HELP_RECIPE, GooseClient
+from src.agent_honk.prompt_transport import PromptTransport, format_command
+
+
+def test_small_prompts_stay_inline(tmp_path):
+    """Test that prompts under the threshold are passed as arguments"""
+    transport = PromptTransport(max_arg_bytes=100)
+    with transport.command("goose", "hello", str(tmp_path)) as cmd_args:
+        assert cmd_args == ["goose", "run", "--text", "hello", "--no-session"]
+    assert os.listdir(tmp_path) == []
+
+
+def test_large_prompts_go_through_files(tmp_path):
+    """Test each transport for a prompt over the threshold, and that files are removed"""
+    client = GooseClient()
+    transport = PromptTransport(max_arg_bytes=100)
+    prompt = "honk " * 100
+    
+    with transport.command("goose", prompt, str(tmp_path)) as cmd_args:
+        assert cmd_args[:3] == ["goose", "run", "-i"]
+        with open(cmd_args[3]) as f:
+            assert f.read() == prompt
+    
+    # The tool-less recipe is rendered locally
+    with transport.command("goose", prompt, str(tmp_path), client.recipes.get(BAREBONES_RECIPE)) as cmd_args:
+        assert "--recipe" not in cmd_args
+        with open(cmd_args[3]) as f:
+            rendered = f.read()
+        assert prompt in rendered and "{{" not in rendered
+    
+    # The help recipe gets a short note pointing at the file
+    with transport.command("goose", prompt, str(tmp_path), client.recipes.get(HELP_RECIPE)) as cmd_args:
+        note = cmd_args[-1]
+        assert note.startswith("user_question=[") and len(note) < 300
+    
+    assert os.listdir(tmp_path) == []
+    assert transport.get_stats()['via_file'] == 3
+    assert "(500 chars)" in format_command(["goose", "--text", prompt])
+
+
+def test_prompt_over_arg_limit_reaches_goose(tmp_path):
+    """Test that a prompt larger than Linux allows for one argument still gets through"""
+    script = tmp_path / "goose"
+    script.write_text("#!/bin/sh\nwc -c < \"$3\"\n")
+    script.chmod(0o755)
+    
+    client = GooseClient()
+    client.goose_command = str(script)
+    prompt = "h" * (200 * 1024)
+    
+    result = asyncio.run(client._run_goose_command(str(tmp_path), prompt, "thread1"))
+    assert result.strip() == str(len(prompt))
@@ -0,0 +1,88 @@
+# Tests for the recipe registry
+import os
+
+import pytest
+
+from src.agent_honk.paths import get_recipes_dir
+from src.agent_honk.recipes import RecipeError, RecipeRegistry
+
+RECIPE = """
+title: Echo
+description: Repeats the prompt
+prompt: "Say {{ user_prompt }} in a {{ tone }} way"
+parameters:
+  - key: user_prompt
+    input_type: string
+    requirement: user_prompt
+  - key: tone
+    input_type: string
+    requirement: user_prompt
+agent_honk:
+  prompt_param: user_prompt
+  params:
+    tone: {env: ECHO_TONE_UNSET, default: cheerful}
+  timeout: %s
+"""
+
+
+def test_bundled_recipes_are_valid():
+    """Test that the recipes shipped in recipes/ load without errors"""
+    registry = RecipeRegistry(get_recipes_dir(), reload_interval=0)
+    assert registry.errors == {}
+    assert registry.get("goose_help").mode == "help"
+    assert not registry.get("goose_help").streaming
+    assert registry.get("goose_session").mode == "barebones"
+
+
+def test_runtime_params_fill_recipe_parameters():
+    """Test that values the bot provides at runtime reach the recipe unless overridden by env"""
+    registry = RecipeRegistry(get_recipes_dir(), reload_interval=0, runtime_params={"doc_links_file": "/tmp/links.txt"})
+    args = registry.get("goose_help").command_args("goose", "hi")
+    assert "doc_links_file=/tmp/links.txt" in args
+
+
+def test_compiled_recipe_and_arguments(tmp_path):
+    """Test that recipes compile once and only the prompt is added per call"""
+    (tmp_path / "echo.yaml").write_text(RECIPE % "30")
+    registry = RecipeRegistry(str(tmp_path), reload_interval=0)
+    recipe = registry.get("echo")
+    
+    assert recipe.mode == "echo" and recipe.timeout == 30
+    assert recipe.command_args("goose", "hi") == [
+        "goose", "run", "--recipe", recipe.path,
+        "--params", "tone=cheerful", "--params", "user_prompt=hi", "--no-session",
+    ]
+    # Goose gets a copy without our policy block
+    with open(recipe.path) as f:
+        assert "agent_honk" not in f.read()
+
+
+def test_invalid_edit_keeps_last_good_version(tmp_path):
+    """Test that hot reload picks up changes but ignores broken edits"""
+    path = tmp_path / "echo.yaml"
+    path.write_text(RECIPE % "30")
+    registry = RecipeRegistry(str(tmp_path), reload_interval=0)
+    version = registry.get("echo").version
+    
+    path.write_text(RECIPE % "-1")
+    os.utime(path, (1, 1))
+    assert registry.reload() == 0
+    assert registry.get("echo").version == version
+    assert "timeout" in registry.errors["echo"]
+    
+    path.write_text(RECIPE % "60")
+    os.utime(path, (2, 2))
+    assert registry.reload() == 1
+    assert registry.get("echo").timeout == 60 and not registry.errors
+    
+    path.unlink()
+    registry.reload()
+    with pytest.raises(RecipeError):
+        registry.get("echo")
+
+
+def test_undeclared_template_parameter_is_rejected(tmp_path):
+    """Test that a prompt using an undeclared parameter fails validation"""
+    (tmp_path / "echo.yaml").write_text((RECIPE % "30").replace("{{ tone }}", "{{ mood }}"))
+    registry = RecipeRegistry(str(tmp_path), reload_interval=0)
+    assert "mood" in registry.errors["echo"]
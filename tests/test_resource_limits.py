@@ -0,0 +1,46 @@
+# Tests for per-process resource limits and usage sampling
+import asyncio
+
+from src.agent_honk.resource_limits import ResourceLimits, ResourceMonitor
+
+
+def test_limits_apply_to_child_processes():
+    """Test that rlimits and nice are inherited by the goose process tree"""
+    limits = ResourceLimits(open_files=64, nice=5)
+    
+    async def scenario():
+        process = await asyncio.create_subprocess_exec(
+            *limits.wrap_command(["sh", "-c", "ulimit -n; sh -c 'ulimit -n'; nice"]),
+            stdout=asyncio.subprocess.PIPE
+        )
+        stdout, _ = await process.communicate()
+        return stdout.decode().split()
+    
+    open_files, child_open_files, niceness = asyncio.run(scenario())
+    assert open_files == child_open_files == "64"
+    assert int(niceness) >= 5
+
+
+def test_no_limits_means_no_prefix():
+    """Test that the command runs as-is when no limits are configured"""
+    assert ResourceLimits().wrap_command(["goose", "run"]) == ["goose", "run"]
+
+
+def test_monitor_records_peak_usage():
+    """Test that a watched process group gets sampled and recorded per mode"""
+    monitor = ResourceMonitor(interval=0.02)
+    if not monitor.available:
+        return
+    
+    async def scenario():
+        process = await asyncio.create_subprocess_exec("sleep", "0.2", start_new_session=True)
+        monitor.watch(process.pid)
+        await process.wait()
+        usage = monitor.unwatch(process.pid, "help")
+        await monitor.close()
+        return usage
+    
+    usage = asyncio.run(scenario())
+    assert usage is not None and usage.samples > 0
+    assert usage.peak_rss_bytes > 0
+    assert monitor.get_stats()["help"]["runs_sampled"] == 1
@@ -0,0 +1,101 @@
+# Tests for the pre-warmed session pool
+import asyncio
+import os
+import shutil
+import threading
+
+from src.agent_honk.session_pool import SessionPool
+from src.agent_honk.workspace_template import WorkspaceTemplate
+
+
+def test_session_pool_prewarms_workspaces(tmp_path):
+    """Test that the pool fills in the background and hands out seeded workspaces"""
+    recipes_dir = tmp_path / "recipes"
+    recipes_dir.mkdir()
+    (recipes_dir / "goose_session.yaml").write_text("title: test\n")
+    pool = SessionPool("goose", WorkspaceTemplate({"recipes": str(recipes_dir)}), min_size=2, max_size=4, refill_interval=0.01)
+    
+    async def scenario():
+        await pool.start()
+        for _ in range(100):
+            if len(pool.ready) >= 2:
+                break
+            await asyncio.sleep(0.01)
+        session_dir = await pool.acquire("thread1")
+        await pool.close()
+        return session_dir
+    
+    session_dir = asyncio.run(scenario())
+    assert pool.hits == 1
+    assert os.path.exists(os.path.join(session_dir, "recipes", "goose_session.yaml"))
+    assert not pool.ready
+    shutil.rmtree(session_dir)
+
+
+def test_session_pool_target_tracks_demand(tmp_path):
+    """Test that the target size grows with the session creation rate"""
+    pool = SessionPool("goose", WorkspaceTemplate({}), min_size=1, max_size=8, lead_seconds=60, rate_window=60)
+    assert pool.target_size() == 1
+    
+    session_dirs = [asyncio.run(pool.acquire(f"thread{i}")) for i in range(5)]
+    assert pool.misses == 5
+    assert pool.target_size() == 5
+    
+    for session_dir in session_dirs:
+        shutil.rmtree(session_dir)
+
+
+def test_acquire_waits_for_template_off_the_event_loop(tmp_path):
+    """Test that a pool miss doesn't block the event loop while the template is busy"""
+    template = WorkspaceTemplate({})
+    pool = SessionPool("goose", template, min_size=0)
+    
+    async def scenario():
+        busy = asyncio.Event()
+        release = threading.Event()
+        
+        def hold_template():
+            # Like the refill task restaging the template
+            with template._lock:
+                loop.call_soon_threadsafe(busy.set)
+                release.wait(5)
+        
+        loop = asyncio.get_running_loop()
+        holder = asyncio.ensure_future(asyncio.to_thread(hold_template))
+        await busy.wait()
+        acquiring = asyncio.ensure_future(pool.acquire("thread1"))
+        await asyncio.sleep(0.05)
+        # The loop is still free while acquire waits for the template
+        assert not acquiring.done()
+        release.set()
+        await holder
+        return await acquiring
+    
+    session_dir = asyncio.run(scenario())
+    assert os.path.isdir(session_dir) and pool.misses == 1
+    shutil.rmtree(session_dir)
+
+
+def test_reserved_process_stops_when_lease_runs_out(tmp_path):
+    """Test that a process reserved for a thread is stopped if no turn takes it in time"""
+    script = tmp_path / "goose"
+    script.write_text("#!/bin/sh\ncat > /dev/null\n")
+    script.chmod(0o755)
+    pool = SessionPool(str(script), WorkspaceTemplate({}), max_leases=1)
+    
+    async def scenario():
+        assert await pool.reserve(str(tmp_path), lease=0.3)
+        assert not await pool.reserve(str(tmp_path / "other"), lease=0.3)
+        process = pool.idle_processes[str(tmp_path)].process
+        # Typing again extends the lease
+        await asyncio.sleep(0.1)
+        assert await pool.reserve(str(tmp_path), lease=0.3)
+        await asyncio.sleep(0.25)
+        assert str(tmp_path) in pool.idle_processes
+        await asyncio.sleep(0.3)
+        assert not pool.idle_processes
+        await asyncio.wait_for(process.wait(), timeout=5)
+    
+    asyncio.run(scenario())
+    assert pool.get_stats()['leases'] == 1
+    assert pool.get_stats()['leases_expired'] == 1
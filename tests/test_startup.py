@@ -0,0 +1,20 @@
+# Tests for the startup profiler
+import logging
+
+from src.agent_honk.startup import StartupProfiler
+
+
+def test_startup_profiler_reports_phases_and_target(caplog):
+    """Test that phases are recorded once and a slow start is warned about"""
+    profiler = StartupProfiler(target_seconds=0.0)
+    profiler.mark("imports")
+    first = profiler.marks["imports"]
+    profiler.mark("imports")
+    profiler.mark("login")
+    
+    with caplog.at_level(logging.INFO):
+        timeline = profiler.report()
+    
+    assert list(timeline) == ["imports", "login"]
+    assert timeline["imports"] == first <= timeline["login"]
+    assert any("over the 0.00s target" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,41 @@
+# Tests for sharing thread state between shard processes
+import time
+
+from src.agent_honk.goose_client import GooseClient
+from src.agent_honk.state_store import SQLiteStateStore, load_state_store, MemoryStateStore
+from src.agent_honk.thread_manager import ThreadManager
+
+
+def test_threads_shared_between_shards(tmp_path):
+    """Test that a thread registered on one shard is recognized on another"""
+    path = str(tmp_path / "state.db")
+    shard_a = ThreadManager(SQLiteStateStore(path), cache_ttl=0.05)
+    shard_b = ThreadManager(SQLiteStateStore(path))
+    
+    shard_a.register_thread("thread1", 42)
+    assert shard_b.is_goose_thread("thread1")
+    assert shard_b.get_thread_owner("thread1") == 42
+    assert shard_b.get_user_threads(42) == ["thread1"]
+    
+    # Activity updates are written back and visible everywhere
+    before = shard_b.get_thread_info("thread1")['last_activity']
+    shard_b.update_activity("thread1")
+    assert shard_a.get_thread_info("thread1")['last_activity'] >= before
+    assert shard_a.get_stats()['total_active_threads'] == 1
+    
+    shard_b.unregister_thread("thread1")
+    assert not shard_b.is_goose_thread("thread1")
+    # Other shards see it once their cached lookup expires
+    time.sleep(0.1)
+    assert not shard_a.is_goose_thread("thread1")
+
+
+def test_session_map_in_store(tmp_path):
+    """Test that GooseClient keeps its session map in the given store"""
+    store = load_state_store(f"sqlite://{tmp_path / 'state.db'}")
+    client = GooseClient(store)
+    client.sessions["thread1"] = "/tmp/session"
+    
+    assert store.mapping("sessions")["thread1"] == "/tmp/session"
+    assert client.get_active_sessions() == ["thread1"]
+    assert isinstance(load_state_store(""), MemoryStateStore)
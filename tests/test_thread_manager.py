@@ -1,4 +1,5 @@
 import pytest
+from src.agent_honk.state_store import SQLiteStateStore
 from src.agent_honk.thread_manager import ThreadManager
 
 
@@ -49,3 +50,21 @@ def test_thread_manager_stats():
     assert len(user_threads) == 2
     assert "thread1" in user_threads
     assert "thread3" in user_threads
+
+
+def test_thread_lookups_are_cached(tmp_path):
+    """Test that repeated lookups don't query a shared store"""
+    store = SQLiteStateStore(str(tmp_path / "state.db"))
+    manager = ThreadManager(store)
+    manager.register_thread("thread1", 42)
+    
+    queries = []
+    fetchone = store._fetchone
+    store._fetchone = lambda sql, params=(): queries.append(sql) or fetchone(sql, params)
+    for _ in range(3):
+        assert manager.get_thread_owner("thread1") == 42
+        assert not manager.is_goose_thread("other")
+    assert len(queries) == 1
+    
+    manager.unregister_thread("thread1")
+    assert not manager.is_goose_thread("thread1")
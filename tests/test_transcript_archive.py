@@ -0,0 +1,142 @@
+# Tests for the compressed transcript archive
+import asyncio
+import json
+from types import SimpleNamespace
+
+from src.agent_honk.bot import AgentHonk
+from src.agent_honk.goose_client import GooseClient
+from src.agent_honk.transcript_archive import TranscriptArchive
+
+
+def _messages(n):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"How do I configure extension number {i} in Goose?"}
+        for i in range(n)
+    ]
+
+
+def test_archive_round_trip_and_index(tmp_path):
+    """Test that transcripts read back intact, are indexed and roll over segments"""
+    archive = TranscriptArchive(str(tmp_path / "transcripts"), segment_bytes=512)
+    for thread in range(5):
+        archive.append(f"thread{thread}", thread % 2, {"messages": _messages(20), "session_logs": []})
+    archive.append("thread0", 0, {"messages": _messages(2), "session_logs": []})
+    
+    transcripts = archive.get("thread0")
+    assert [len(t["messages"]) for t in transcripts] == [20, 2]
+    assert transcripts[0]["messages"] == _messages(20)
+    assert transcripts[0]["user_id"] == 0
+    
+    assert [entry["thread_id"] for entry in archive.find(user_id=1)] == ["thread3", "thread1"]
+    assert len(list(archive.iter_transcripts(since="2000-01-01"))) == 6
+    assert archive.find(until="2000-01-01") == []
+    
+    stats = archive.get_stats()
+    assert stats["transcripts"] == 6
+    assert stats["segments"] > 1
+    assert stats["ratio"] > 3
+    archive.close()
+    
+    # A new process counts the totals once, then keeps them up to date itself
+    reopened = TranscriptArchive(str(tmp_path / "transcripts"), segment_bytes=512)
+    assert reopened.get_stats()["transcripts"] == 0
+    reopened.load_stats()
+    assert reopened.get_stats() == stats
+    reopened.append("thread9", 1, {"messages": _messages(2), "session_logs": []})
+    assert reopened.get_stats()["transcripts"] == 7
+    reopened.close()
+
+
+def test_cleanup_archives_session_logs(tmp_path, monkeypatch):
+    """Test that cleaning up with a transcript archives the session's Goose logs"""
+    monkeypatch.setenv("TRANSCRIPT_ARCHIVE_DIR", str(tmp_path / "transcripts"))
+    monkeypatch.setenv("TRANSCRIPT_PRUNE_SESSION_LOGS", "true")
+    client = GooseClient()
+    session_dir = asyncio.run(client.ensure_session("thread1"))
+    log = tmp_path / "session.jsonl"
+    entry = json.dumps({"role": "assistant", "content": "Honk!"})
+    log.write_text(entry + "\n")
+    client.session_logs[session_dir] = [str(log)]
+    
+    asyncio.run(client.cleanup_session("thread1", transcript={"user_id": 7, "messages": _messages(2)}))
+    
+    [transcript] = client.archive.get("thread1")
+    assert transcript["user_id"] == 7
+    assert transcript["session_logs"][0]["entries"] == [entry]
+    assert not log.exists()
+    assert "thread1" not in client.sessions
+    
+    # Without a transcript (e.g. batch runs) nothing is archived
+    asyncio.run(client.ensure_session("thread2"))
+    asyncio.run(client.cleanup_session("thread2"))
+    assert client.archive.get("thread2") == []
+    client.archive.close()
+
+
+def test_archiving_a_thread_keeps_its_session(tmp_path, monkeypatch):
+    """Test that an archived thread stays usable and later transcripts only add new logs"""
+    monkeypatch.setenv("TRANSCRIPT_ARCHIVE_DIR", str(tmp_path / "transcripts"))
+    client = GooseClient()
+    session_dir = asyncio.run(client.ensure_session("thread1"))
+    first, second = tmp_path / "first.jsonl", tmp_path / "second.jsonl"
+    first.write_text(json.dumps({"role": "assistant", "content": "Honk!"}) + "\n")
+    second.write_text(json.dumps({"role": "assistant", "content": "Honk again!"}) + "\n")
+    client.session_logs[session_dir] = [str(first)]
+    
+    asyncio.run(client.archive_transcript("thread1", {"user_id": 7, "messages": _messages(2)}))
+    assert client.sessions["thread1"] == session_dir
+    
+    # The thread is picked up again after Discord unarchives it
+    client.session_logs[session_dir] = client.session_logs[session_dir] + [str(second)]
+    asyncio.run(client.archive_transcript("thread1", {"user_id": 7, "messages": _messages(4)}))
+    
+    transcripts = client.archive.get("thread1")
+    assert [[log["path"] for log in t["session_logs"]] for t in transcripts] == [[str(first)], [str(second)]]
+    assert first.exists()
+    asyncio.run(client.cleanup_session("thread1"))
+    client.archive.close()
+
+
+class FakeThread:
+    def __init__(self, thread_id):
+        self.id = thread_id
+        self.messages = []
+    
+    async def history(self, limit=None, after=None, oldest_first=True):
+        for msg in self.messages:
+            if after is None or msg.id > after.id:
+                yield msg
+
+
+def test_thread_snapshots_only_add_new_messages(tmp_path, monkeypatch):
+    """Test that each time Discord archives a thread only messages since the last snapshot are stored"""
+    monkeypatch.setenv("AGENT_HONK_STATE_DIR", str(tmp_path))
+    monkeypatch.setenv("TRANSCRIPT_ARCHIVE_DIR", str(tmp_path / "transcripts"))
+    monkeypatch.delenv("GOOSE_DISPATCH", raising=False)
+    
+    async def scenario():
+        bot = AgentHonk()
+        bot._connection.user = SimpleNamespace(bot=True)
+        user = SimpleNamespace(bot=False)
+        thread = FakeThread(123)
+        bot.thread_manager.register_thread("123", 7)
+        payload = SimpleNamespace(thread_id=123, thread=thread, data={'thread_metadata': {'archived': True}})
+        
+        for first_id in (1, 3, 5):
+            thread.messages += [
+                SimpleNamespace(id=message_id, author=user, content=f"Question {message_id}", attachments=[])
+                for message_id in (first_id, first_id + 1)
+            ]
+            await bot.on_raw_thread_update(payload)
+            if first_id == 3:
+                # Nothing new since the last snapshot
+                await bot.on_raw_thread_update(payload)
+        return bot
+    
+    bot = asyncio.run(scenario())
+    transcripts = bot.goose_client.archive.get("123")
+    assert [[m["content"] for m in t["messages"]] for t in transcripts] == [
+        ["Question 1", "Question 2"], ["Question 3", "Question 4"], ["Question 5", "Question 6"],
+    ]
+    assert bot.archived_through["123"] == 6
+    bot.goose_client.archive.close()
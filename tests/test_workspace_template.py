@@ -0,0 +1,62 @@
+# Tests for workspace templates shared between sessions
+import os
+import shutil
+import tempfile
+
+from src.agent_honk.workspace_template import LINK_COPY, LINK_HARDLINK, LINK_REFLINK, WorkspaceTemplate
+
+
+def make_template_source(tmp_path):
+    source = tmp_path / "template"
+    (source / "docs").mkdir(parents=True)
+    (source / "docs" / "guide.md").write_text("# Guide\n" * 1000)
+    (source / "config.yaml").write_text("honk: true\n")
+    return source
+
+
+def test_workspaces_share_template_files(tmp_path):
+    """Test that workspaces link to one staged copy and cleanup leaves it intact"""
+    template = WorkspaceTemplate({"": str(make_template_source(tmp_path))})
+    first, second = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        template.materialize(first)
+        template.materialize(second)
+        assert template.mode in (LINK_REFLINK, LINK_HARDLINK, LINK_COPY)
+        
+        guide = os.path.join("docs", "guide.md")
+        with open(os.path.join(second, guide)) as f:
+            assert f.read().startswith("# Guide")
+        if template.mode == LINK_HARDLINK:
+            assert os.stat(os.path.join(first, guide)).st_ino == os.stat(os.path.join(second, guide)).st_ino
+            assert not os.access(os.path.join(first, guide), os.W_OK) or os.geteuid() == 0
+        
+        shutil.rmtree(first)
+        with open(os.path.join(second, "config.yaml")) as f:
+            assert f.read() == "honk: true\n"
+        assert template.get_stats()['files'] == 2
+    finally:
+        shutil.rmtree(second, ignore_errors=True)
+        template.close()
+
+
+def test_template_restages_when_sources_change(tmp_path):
+    """Test that changed sources reach new workspaces but not existing ones"""
+    source = make_template_source(tmp_path)
+    template = WorkspaceTemplate({"": str(source)}, link_mode=LINK_COPY, check_interval=0)
+    old, new = tempfile.mkdtemp(), tempfile.mkdtemp()
+    try:
+        template.materialize(old)
+        (source / "config.yaml").write_text("honk: louder\n")
+        template.materialize(new)
+        
+        with open(os.path.join(old, "config.yaml")) as f:
+            assert f.read() == "honk: true\n"
+        with open(os.path.join(new, "config.yaml")) as f:
+            assert f.read() == "honk: louder\n"
+        # Copies are ordinary writable files
+        with open(os.path.join(new, "config.yaml"), "a") as f:
+            f.write("quack: false\n")
+    finally:
+        shutil.rmtree(old, ignore_errors=True)
+        shutil.rmtree(new, ignore_errors=True)
+        template.close()